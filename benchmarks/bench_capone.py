@@ -0,0 +1,100 @@
+import pytest
+
+pytest.importorskip("playwright")
+
+from capOne.capOne import CapitalOneAutomation
+from capOne.selector_cache import SelectorCache
+from storage.card_store import JsonlCardStore
+from storage.journal import JobJournal
+from tracing.tracer import Tracer
+
+ROUNDS = 3
+
+
+def _automation(mock_bank, browser_pool, tmp_path, tracer, selector_cache, store, num_cards, **kwargs):
+    """An unattended automation pointed at the mock bank, with its checkpoints kept out of jobs/"""
+    return CapitalOneAutomation(
+        username="bench",
+        password="bench",
+        headless=True,
+        num_cards=num_cards,
+        profile="bench",
+        interactive=False,
+        pool=browser_pool,
+        store=store,
+        journal=JobJournal(tmp_path / "jobs"),
+        resume=False,
+        tracer=tracer,
+        signin_url=mock_bank.signin_url,
+        card_manager_url=mock_bank.card_manager_url,
+        selector_cache=selector_cache,
+        **kwargs
+    )
+
+
+def _record(benchmark, tracer, selector_cache, cards_per_round, completed):
+    """Attach throughput and per-step p50/p95 to the benchmark's saved results"""
+    mean = benchmark.stats.stats.mean
+    benchmark.extra_info["cards_per_round"] = cards_per_round
+    benchmark.extra_info["cards_completed"] = completed
+    benchmark.extra_info["cards_per_minute"] = round(cards_per_round / mean * 60, 1) if mean else 0
+    benchmark.extra_info["steps"] = {
+        row["step"]: {"p50": row["p50"], "p95": row["p95"], "count": row["count"], "failures": row["failures"]}
+        for row in tracer.summary()
+    }
+    benchmark.extra_info["selector_cache"] = selector_cache.summary()
+
+
+def bench_create_throughput(benchmark, runner, browser_pool, mock_bank, bench_cards, tmp_path):
+    tracer = Tracer()
+    selector_cache = SelectorCache(str(tmp_path / "selector_cache.json"))
+    store = JsonlCardStore(str(tmp_path / "cards.jsonl"))
+
+    def create_round():
+        automation = _automation(mock_bank, browser_pool, tmp_path, tracer, selector_cache, store, bench_cards)
+        return runner.run(automation.login())
+
+    benchmark.pedantic(create_round, rounds=ROUNDS, iterations=1)
+    store.close()
+
+    _record(benchmark, tracer, selector_cache, bench_cards, mock_bank.created)
+    assert mock_bank.created == bench_cards * ROUNDS
+
+
+def bench_delete_throughput(benchmark, runner, browser_pool, mock_bank, bench_cards, tmp_path):
+    tracer = Tracer()
+    selector_cache = SelectorCache(str(tmp_path / "selector_cache.json"))
+    deleted = []
+
+    def setup():
+        mock_bank.reset(cards=bench_cards)
+
+    def delete_round():
+        automation = _automation(mock_bank, browser_pool, tmp_path, tracer, selector_cache, None, bench_cards)
+        runner.run(automation.delete_cards())
+        deleted.append(mock_bank.deleted)
+
+    benchmark.pedantic(delete_round, setup=setup, rounds=ROUNDS, iterations=1)
+
+    _record(benchmark, tracer, selector_cache, bench_cards, sum(deleted))
+    assert deleted == [bench_cards] * ROUNDS
+
+
+def bench_bulk_delete_throughput(benchmark, runner, browser_pool, mock_bank, bench_cards, tmp_path):
+    tracer = Tracer()
+    selector_cache = SelectorCache(str(tmp_path / "selector_cache.json"))
+    deleted = []
+
+    def setup():
+        mock_bank.reset(cards=bench_cards)
+
+    def bulk_delete_round():
+        automation = _automation(mock_bank, browser_pool, tmp_path, tracer, selector_cache, None, bench_cards,
+                                 bulk_delete=True)
+        runner.run(automation.delete_cards())
+        deleted.append(mock_bank.deleted)
+
+    benchmark.pedantic(bulk_delete_round, setup=setup, rounds=ROUNDS, iterations=1)
+
+    _record(benchmark, tracer, selector_cache, bench_cards, sum(deleted))
+    assert deleted == [bench_cards] * ROUNDS
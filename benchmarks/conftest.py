@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from benchmarks.mock_bank import MockBank
+
+
+def pytest_addoption(parser):
+    parser.addoption("--mock-latency", type=float, default=0.2,
+                     help="Seconds the mock bank holds create/delete responses (default: 0.2)")
+    parser.addoption("--bench-cards", type=int, default=5,
+                     help="Cards created or deleted per benchmark round (default: 5)")
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """One event loop for the whole session so the browser survives between rounds"""
+    with asyncio.Runner() as runner:
+        yield runner
+
+
+@pytest.fixture(scope="session")
+def browser_pool(runner):
+    # Imported here so a plain `pytest` run without Playwright installed still collects cleanly
+    pytest.importorskip("playwright")
+    from capOne.browser_pool import BrowserPool
+
+    pool = BrowserPool(headless=True)
+    yield pool
+    runner.run(pool.close())
+
+
+@pytest.fixture
+def mock_bank(request):
+    latency = request.config.getoption("--mock-latency")
+    with MockBank(create_latency=latency, delete_latency=latency, signin_latency=latency / 2,
+                  close_latency=latency / 4) as bank:
+        yield bank
+
+
+@pytest.fixture
+def bench_cards(request):
+    return request.config.getoption("--bench-cards")
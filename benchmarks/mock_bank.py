@@ -0,0 +1,154 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def _luhn_number(prefix="4", length=16):
+    """A random card number that passes the Luhn check"""
+    digits = [int(d) for d in prefix] + [random.randint(0, 9) for _ in range(length - len(prefix) - 1)]
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return "".join(map(str, digits)) + str((10 - total % 10) % 10)
+
+
+class MockBank:
+    """Local stand-in for the Capital One sign in page and Virtual Cards Manager"""
+
+    def __init__(self, cards=0, create_latency=0.0, delete_latency=0.0, page_latency=0.0,
+                 signin_latency=0.0, close_latency=0.0):
+        self.create_latency = create_latency  # Seconds the create API holds its response
+        self.delete_latency = delete_latency
+        self.page_latency = page_latency  # Delay before serving the HTML pages
+        self.signin_latency = signin_latency
+        self.close_latency = close_latency  # How long a modal backdrop lingers after closing
+        self.cards = {}
+        self.created = 0
+        self.deleted = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.reset(cards)
+
+    def reset(self, cards=0):
+        """Drop every card and start over with this many existing cards"""
+        with self._lock:
+            self.cards = {}
+            self.created = 0
+            self.deleted = 0
+        for _ in range(cards):
+            self._add_card()
+
+    def _add_card(self):
+        with self._lock:
+            card = {
+                "id": str(self._next_id),
+                "number": _luhn_number(),
+                "exp_month": f"{random.randint(1, 12):02d}",
+                "exp_year": f"{(time.localtime().tm_year + 5) % 100:02d}",
+                "cvv": f"{random.randint(0, 999):03d}",
+                "created": time.strftime("%m/%d/%Y"),
+                "used": False,
+            }
+            self._next_id += 1
+            self.cards[card["id"]] = card
+            return card
+
+    def start(self):
+        bank = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+            def _send(self, body, content_type="application/json", status=200):
+                data = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _page(self, name):
+                time.sleep(bank.page_latency)
+                html = (FIXTURES_DIR / name).read_text()
+                html = html.replace("__MOCK_CONFIG__", json.dumps({
+                    "close_latency_ms": int(bank.close_latency * 1000),
+                }))
+                self._send(html, "text/html; charset=utf-8")
+
+            def do_GET(self):
+                if self.path.startswith("/auth/signin"):
+                    self._page("signin.html")
+                elif self.path.startswith("/VirtualCards/Manager"):
+                    self._page("manager.html")
+                elif self.path == "/api/cards":
+                    with bank._lock:
+                        self._send(json.dumps(list(bank.cards.values())))
+                else:
+                    self._send(json.dumps({"error": "not found"}), status=404)
+
+            def do_POST(self):
+                if self.path == "/api/session":
+                    time.sleep(bank.signin_latency)
+                    self._send(json.dumps({"signed_in": True}))
+                elif self.path == "/api/cards":
+                    time.sleep(bank.create_latency)
+                    card = bank._add_card()
+                    with bank._lock:
+                        bank.created += 1
+                    self._send(json.dumps(card))
+                else:
+                    self._send(json.dumps({"error": "not found"}), status=404)
+
+            def do_DELETE(self):
+                match = re.fullmatch(r"/api/cards/(\w+)", self.path)
+                if not match:
+                    self._send(json.dumps({"error": "not found"}), status=404)
+                    return
+                time.sleep(bank.delete_latency)
+                with bank._lock:
+                    card = bank.cards.pop(match.group(1), None)
+                    if card:
+                        bank.deleted += 1
+                self._send(json.dumps({"deleted": card is not None}), status=200 if card else 404)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def url(self, path):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{path}"
+
+    @property
+    def signin_url(self):
+        return self.url("/auth/signin")
+
+    @property
+    def card_manager_url(self):
+        return self.url("/VirtualCards/Manager")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
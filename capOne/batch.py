@@ -0,0 +1,149 @@
+import asyncio
+import os
+import re
+import time
+from capOne.browser_pool import BrowserPool
+from capOne.capOne import CapitalOneAutomation
+from capOne.route_filter import RouteFilter
+from capOne.selector_cache import SelectorCache
+from storage.card_store import open_card_store
+from tracing.tracer import Tracer
+
+
+def load_profiles(env=None):
+    """Find every configured profile: CAPITAL_ONE_USERNAME, CAPITAL_ONE_USERNAME_2, _3, ..."""
+    env = os.environ if env is None else env
+    profiles = []
+
+    if env.get('CAPITAL_ONE_USERNAME') and env.get('CAPITAL_ONE_PASSWORD'):
+        profiles.append(('1', env['CAPITAL_ONE_USERNAME'], env['CAPITAL_ONE_PASSWORD']))
+
+    numbered = []
+    for key in env:
+        match = re.fullmatch(r'CAPITAL_ONE_USERNAME_(\d+)', key)
+        if match and int(match.group(1)) > 1:
+            numbered.append(int(match.group(1)))
+
+    for number in sorted(numbered):
+        username = env.get(f'CAPITAL_ONE_USERNAME_{number}')
+        password = env.get(f'CAPITAL_ONE_PASSWORD_{number}')
+        if username and password:
+            profiles.append((str(number), username, password))
+        else:
+            print(f"Skipping profile {number}: CAPITAL_ONE_PASSWORD_{number} is not set")
+
+    return profiles
+
+
+async def run_profiles(profiles, action, num_cards, max_concurrency=None, headless=False,
+                       persist_session=False, card_choice=None, pool=None, store=None, resume=True,
+                       tracer=None, selector_cache=None, bulk_delete=False, delete_concurrency=4,
+                       card_filter=None):
+    """Run the same create/delete job for every profile concurrently and return one result per profile"""
+    if not profiles:
+        print("No Capital One profiles configured")
+        return []
+
+    # Each profile gets its own browser context, at most max_concurrency at a time
+    max_concurrency = max_concurrency or len(profiles)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # All profiles share one browser process; each gets its own context from the pool
+    owns_pool = pool is None
+    if owns_pool:
+        # Same default as a private browser: blocking only when nobody has to finish sign in in the window
+        pool = BrowserPool(headless=headless, route_filter=RouteFilter() if headless else None)
+
+    # ...and hands its cards to one shared writer
+    owns_store = store is None and action == 'create'
+    if owns_store:
+        store = open_card_store("capone")
+    
+    # Step timings from every profile land in one tracer
+    owns_tracer = tracer is None
+    if owns_tracer:
+        tracer = Tracer()
+    
+    # ...and learn which selectors work from each other
+    owns_selector_cache = selector_cache is None
+    if owns_selector_cache:
+        selector_cache = SelectorCache()
+
+    async def run_one(profile, username, password):
+        async with semaphore:
+            print(f"[profile {profile}] Starting {action} of {num_cards} cards")
+            automation = CapitalOneAutomation(
+                username=username,
+                password=password,
+                headless=headless,
+                num_cards=num_cards,
+                card_choice=card_choice if profile == '1' else None,  # Card selection only applies to Profile 1
+                profile=profile,
+                persist_session=persist_session,
+                interactive=False,  # input() would block every other profile on the event loop
+                pool=pool,
+                store=store,
+                resume=resume,
+                tracer=tracer,
+                selector_cache=selector_cache,
+                bulk_delete=bulk_delete,
+                delete_concurrency=delete_concurrency,
+                card_filter=card_filter
+            )
+
+            start = time.perf_counter()
+            error = None
+            try:
+                if action == 'create':
+                    await automation.login()
+                else:
+                    await automation.delete_cards()
+            except Exception as e:
+                error = str(e)
+                print(f"[profile {profile}] Failed: {e}")
+
+            return {
+                "profile": profile,
+                "action": action,
+                "requested": num_cards,
+                "completed": len(automation.cards_created) if action == 'create' else automation.cards_deleted,
+                "seconds": round(time.perf_counter() - start, 1),
+                "error": error,
+            }
+
+    print(f"Running {action} for {len(profiles)} profiles (max {max_concurrency} at once)...")
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(run_one(*profile) for profile in profiles))
+    finally:
+        if owns_pool:
+            await pool.close()
+            if pool.route_filter is not None:
+                pool.route_filter.print_summary()
+        if owns_store:
+            store.close()
+        if owns_selector_cache:
+            selector_cache.save()
+    print_report(results, time.perf_counter() - start)
+    if owns_tracer:
+        tracer.print_summary()
+    return results
+
+
+def print_report(results, wall_seconds):
+    """Print a merged per-profile summary of a batch run"""
+    print("\n*************************************************************")
+    print("BATCH REPORT")
+    print("*************************************************************")
+    for result in results:
+        status = "✅" if result["error"] is None and result["completed"] == result["requested"] else "⚠️"
+        line = (f"{status} Profile {result['profile']}: {result['action']} "
+                f"{result['completed']}/{result['requested']} in {result['seconds']}s")
+        if result["error"]:
+            line += f" (error: {result['error']})"
+        print(line)
+
+    total = sum(result["completed"] for result in results)
+    slowest = max((result["seconds"] for result in results), default=0)
+    print(f"Total: {total} cards across {len(results)} profiles in {wall_seconds:.1f}s "
+          f"(slowest profile {slowest}s)")
@@ -0,0 +1,110 @@
+import asyncio
+from playwright.async_api import async_playwright
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+
+
+class BrowserPool:
+    """Keep one Playwright driver and Chromium browser alive and hand out lightweight contexts"""
+
+    def __init__(self, headless=False, policy="recycle", max_uses=20, max_idle_per_key=1, route_filter=None):
+        self.headless = headless
+        self.route_filter = route_filter  # RouteFilter installed on every new context; None loads everything
+        # "recycle" keeps a released context for the next job on the same key (profile) until it
+        # has served max_uses jobs; "teardown" closes every context as soon as it is released.
+        # Contexts are never shared between keys so cookies can't leak between accounts.
+        self.policy = policy
+        self.max_uses = max_uses
+        self.max_idle_per_key = max_idle_per_key
+        self._playwright = None
+        self._browser = None
+        self._idle = {}  # key -> [context, ...] ready to be reused
+        self._uses = {}  # context -> number of jobs it has served
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        """Start the Playwright driver and launch the shared browser (only once)"""
+        async with self._start_lock:
+            if self._browser is not None:
+                return
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=["--disable-blink-features=AutomationControlled"]
+            )
+            print(f"Started shared browser (headless={self.headless}, policy={self.policy})")
+
+    async def acquire(self, key, storage_state=None):
+        """Return a context for key, reusing an idle one when the policy allows it"""
+        await self.start()
+
+        idle = self._idle.get(key, [])
+        while idle:
+            context = idle.pop()
+            if self._uses[context] < self.max_uses:
+                self._uses[context] += 1
+                return context
+            await self._discard(context)
+
+        context = await self._browser.new_context(
+            user_agent=USER_AGENT,
+            storage_state=storage_state
+        )
+        if self.route_filter is not None:
+            await self.route_filter.install(context)
+        self._uses[context] = 1
+        return context
+
+    def uses(self, context):
+        """How many jobs (including the current one) this context has served"""
+        return self._uses.get(context, 0)
+
+    async def release(self, context, key):
+        """Give a context back; it is kept for reuse or torn down according to the policy"""
+        keep = (
+            self.policy == "recycle"
+            and self._uses.get(context, 0) < self.max_uses
+            and len(self._idle.get(key, [])) < self.max_idle_per_key
+        )
+        if not keep:
+            await self._discard(context)
+            return
+
+        # Close the job's pages so the next job starts from a clean tab
+        for page in list(context.pages):
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self._idle.setdefault(key, []).append(context)
+
+    async def _discard(self, context):
+        self._uses.pop(context, None)
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        """Close every context, the browser and the Playwright driver"""
+        for contexts in self._idle.values():
+            for context in contexts:
+                await self._discard(context)
+        self._idle = {}
+
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                print("Browser may already be closed")
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
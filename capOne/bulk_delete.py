@@ -0,0 +1,159 @@
+import asyncio
+import json
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from capOne.card_index import TOKEN_ATTRIBUTE
+
+# Headers Playwright's request context fills in itself (cookies come from the browser context)
+SKIPPED_HEADERS = {"cookie", "content-length", "host", "connection", "accept-encoding"}
+
+MIN_TOKEN_LENGTH = 6  # Shorter attribute values are row numbers and indexes, not card tokens
+
+
+def _find_in_json(value, target, path=()):
+    """Key path to the first value in a JSON document equal to target"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return path if str(value) == target else None
+    for key, child in items:
+        found = _find_in_json(child, target, path + (key,))
+        if found is not None:
+            return found
+    return None
+
+
+def _token_attributes(card, cards):
+    """The card's attributes that could be its token: long enough not to be a position, and unique per row"""
+    # TOKEN_ATTRIBUTE first; the real card manager may name it anything, so every data-*/id value is a candidate
+    names = sorted(card.attributes, key=lambda name: name != TOKEN_ATTRIBUTE)
+    for name in names:
+        value = card.attributes[name]
+        if not value or len(value) < MIN_TOKEN_LENGTH:
+            continue
+        values = [other.attributes.get(name) for other in cards or [card]]
+        if None in values or len(set(values)) != len(values):
+            continue
+        yield name, value
+
+
+def _set_in_json(value, path, new_value):
+    for key in path[:-1]:
+        value = value[key]
+    value[path[-1]] = new_value
+
+
+class DeleteRequestTemplate:
+    """The delete request the UI sent for one card, generalised so it can be replayed for others"""
+
+    def __init__(self, method, url, headers, body, attribute, location, path):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.attribute = attribute  # Which row attribute holds the card's token, learned from the request
+        self.location = location  # "path", "query" or "json"
+        self.path = path  # Path segment index, query key or JSON key path
+
+    @classmethod
+    def infer(cls, method, url, headers, body, card, cards=None):
+        """Find which of the deleted card's attributes is its token and where it sits in the request, or None"""
+        # cards is the whole table as read before the delete, so a value two rows share never counts
+        parts = urlsplit(url)
+        segments = parts.path.split("/")
+        query = parse_qsl(parts.query)
+        try:
+            document = json.loads(body) if body else None
+        except ValueError:
+            document = None
+
+        # Only a per-card token is replayed; a last 4 or positional attribute could hit another card
+        for attribute, value in _token_attributes(card, cards):
+            if value in segments:
+                return cls(method, url, headers, body, attribute, "path", segments.index(value))
+            for key, query_value in query:
+                if query_value == value:
+                    return cls(method, url, headers, body, attribute, "query", key)
+            if document is not None:
+                path = _find_in_json(document, value)
+                if path:
+                    return cls(method, url, headers, body, attribute, "json", list(path))
+        return None
+
+    def token_of(self, card):
+        """The card's value of the token attribute this request uses, or None"""
+        return card.attributes.get(self.attribute) or None
+
+    def for_card(self, card):
+        """The (url, body) that deletes another card"""
+        value = self.token_of(card)
+        if not value:
+            return None
+
+        url, body = self.url, self.body
+        parts = urlsplit(url)
+        if self.location == "path":
+            segments = parts.path.split("/")
+            segments[self.path] = value
+            url = urlunsplit(parts._replace(path="/".join(segments)))
+        elif self.location == "query":
+            query = [(key, value if key == self.path else old) for key, old in parse_qsl(parts.query)]
+            url = urlunsplit(parts._replace(query=urlencode(query)))
+        else:
+            document = json.loads(body)
+            _set_in_json(document, self.path, value)
+            body = json.dumps(document)
+        return url, body
+
+    async def replay(self, context, cards, concurrency=4):
+        """Send the delete request for every card, at most concurrency at a time; returns the cards that got a 2xx"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def delete_one(card):
+            request = self.for_card(card)
+            if request is None:
+                return False
+            url, body = request
+            async with semaphore:
+                try:
+                    response = await context.request.fetch(url, method=self.method, headers=self.headers, data=body)
+                    return response.ok
+                except Exception as replay_error:
+                    print(f"Replayed delete for card ending in {card.last4 or '????'} failed: {replay_error}")
+                    return False
+
+        results = await asyncio.gather(*(delete_one(card) for card in cards))
+        return [card for card, ok in zip(cards, results) if ok]
+
+
+class DeleteRequestRecorder:
+    """Collects the non-GET XHR/fetch requests a page sends while the UI deletes one card"""
+
+    def __init__(self, page):
+        self.page = page
+        self.requests = []
+
+    def _on_request(self, request):
+        if request.resource_type in ("xhr", "fetch") and request.method in ("DELETE", "POST", "PUT", "PATCH"):
+            self.requests.append(request)
+
+    def __enter__(self):
+        self.page.on("request", self._on_request)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.page.remove_listener("request", self._on_request)
+
+    async def template_for(self, card, cards=None):
+        """Build a replayable template from the request that deleted card, trying DELETE requests first"""
+        for request in sorted(self.requests, key=lambda request: request.method != "DELETE"):
+            response = await request.response()
+            if response is None or not response.ok:
+                continue
+            headers = {name: value for name, value in (await request.all_headers()).items()
+                       if name.lower() not in SKIPPED_HEADERS and not name.startswith(":")}
+            template = DeleteRequestTemplate.infer(request.method, request.url, headers, request.post_data, card, cards)
+            if template:
+                return template
+        return None
@@ -1,484 +1,687 @@
 import asyncio
 import os
-from playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
+from capOne.browser_pool import BrowserPool
+from capOne.bulk_delete import DeleteRequestRecorder
+from capOne.card_index import CardIndex
+from capOne.extraction import CardDetails, card_details_from_response, extract_card_details, is_create_response
+from capOne.selector_cache import SelectorCache
+from capOne.selector_race import SelectorRace
+from capOne.session import SessionStore
+from capOne.readiness import Readiness
+from capOne.route_filter import RouteFilter
+from storage.card_store import CardRecord, open_card_store
+from storage.journal import JobJournal
+from tracing.tracer import Tracer, traced
+
+SIGNIN_URL = "https://verified.capitalone.com/auth/signin"
+CARD_MANAGER_URL = "https://myaccounts.capitalone.com/VirtualCards/Manager"
+
+# DOM signals used to decide when a step is ready instead of sleeping for a fixed time
+MANAGER_READY_SELECTOR = 'button:has-text("Create virtual card"), c1-ease-commerce-virtual-cards-table-nickname-column'
+USERNAME_FIELD_SELECTOR = 'input[name="username"], input#username, input[id*="username"]'
+NICKNAME_FIELD_SELECTOR = 'input[placeholder*="Example"], input[aria-label*="nickname"]'
+GOT_IT_BUTTON_SELECTOR = 'button[data-e2e="c1-ease-commerce-create-virtual-card-create-success__button-confirm"]'
+MODAL_SELECTOR = "div.modal-backdrop, div.modal"
+CARD_NUMBER_READY_JS = """() => {
+    const el = document.querySelector('div.vcNumber._TLPRIVATE');
+    return el && el.textContent.replace(/\\s+/g, '').length >= 15;
+}"""
+
+# Candidate selectors for each create step, raced by SelectorRace
+CREATE_CARD_BUTTON_SELECTORS = ['button:has-text("Create virtual card")']
+SUBMIT_BUTTON_SELECTORS = [
+    'button[data-e2e="create-virtual-card-create-submit-button"]',
+    'button.c1-ease-commerce-create-virtual-card-create__submit',
+]
+SUBMIT_BUTTON_JS = """() => {
+    const button = document.querySelector('button[data-e2e="create-virtual-card-create-submit-button"]');
+    if (button) button.click();
+    return !!button;
+}"""
+GOT_IT_BUTTON_SELECTORS = [
+    GOT_IT_BUTTON_SELECTOR,
+    'button:has-text("Got it")',
+    'button.c1-ease-commerce-create-virtual-card-create-success__button-confirm',
+]
+GOT_IT_BUTTON_JS = """() => {
+    const buttons = Array.from(document.querySelectorAll('button'));
+    const button = buttons.find(btn => btn.textContent.trim() === 'Got it')
+        || document.querySelector('button[data-e2e="c1-ease-commerce-create-virtual-card-create-success__button-confirm"]');
+    if (button) button.click();
+    return !!button;
+}"""
+# A card that fails this many times in a row stops the run instead of looping forever
+MAX_CARD_ATTEMPTS = 3
+
+# Candidate selectors for each delete step; SelectorRace waits on all of them at once.
+# Text matches are exact so the confirm step can't hit the "Delete Virtual Card" button.
+MANAGE_BUTTON_SELECTORS = [
+    "button.c1-ease-commerce-virtual-cards-manager__manage-token-button",
+    "button[aria-label^='Manage virtual card Unnamed Virtual Card']",
+]
+MANAGE_BUTTON_JS = """() => {
+    const buttons = document.querySelectorAll('button.c1-ease-commerce-virtual-cards-manager__manage-token-button');
+    if (buttons && buttons.length > 0) {
+        buttons[0].click();
+        return true;
+    }
+    return false;
+}"""
+DELETE_BUTTON_SELECTORS = [
+    "button[data-e2e='manage-virtual-number-delete-button']",
+    "button:has-text('Delete Virtual Card')",
+    "button.grv-button-tertiary--danger",
+]
+DELETE_BUTTON_JS = """() => {
+    let button = document.querySelector("button[data-e2e='manage-virtual-number-delete-button']");
+    if (!button) {
+        const buttons = Array.from(document.querySelectorAll('button'));
+        button = buttons.find(btn => btn.textContent.includes('Delete Virtual Card'));
+    }
+    if (button) {
+        button.click();
+        return true;
+    }
+    return false;
+}"""
+CONFIRM_DELETE_SELECTORS = [
+    "button[data-e2e='manage-virtual-number-delete-confirm']",
+    "button[aria-label='Delete']",
+    "button:text-is('Delete')",
+    "button.deleteButton.grv-button-primary--danger",
+]
+CONFIRM_DELETE_JS = """() => {
+    let button = document.querySelector("button[data-e2e='manage-virtual-number-delete-confirm']")
+        || document.querySelector("button.deleteButton")
+        || document.querySelector("button.grv-button-primary--danger");
+    if (!button) {
+        const buttons = Array.from(document.querySelectorAll('button'));
+        button = buttons.find(btn => btn.textContent.trim() === 'Delete');
+    }
+    if (button) {
+        button.click();
+        return true;
+    }
+    return false;
+}"""
+DELETE_SUCCESS_SELECTORS = [
+    "h1#title:has-text('Success')",
+    "h1.c1-ease-dialog-title:has-text('Success')",
+]
+DELETE_SUCCESS_JS = """() => {
+    const successTitle = document.querySelector("h1#title.c1-ease-dialog-title");
+    if (successTitle && successTitle.textContent.trim() === "Success") {
+        return true;
+    }
+    for (const el of document.querySelectorAll("*")) {
+        if (el.textContent && el.textContent.trim() === "Success") {
+            return true;
+        }
+    }
+    return false;
+}"""
+DISMISS_BUTTON_SELECTORS = ["button:has-text('OK')", "button:has-text('Done')", "button:has-text('Close')"]
+CLICK_OUTSIDE_JS = """() => {
+    const clickEvent = new MouseEvent('click', {
+        bubbles: true,
+        cancelable: true,
+        view: window,
+        clientX: 50,
+        clientY: 50
+    });
+    document.body.dispatchEvent(clickEvent);
+}"""
+
 
 class CapitalOneAutomation:
-    def __init__(self, username, password, headless=False, num_cards=1, card_choice=None, profile='1'):
+    def __init__(self, username, password, headless=False, num_cards=1, card_choice=None, profile='1',
+                 persist_session=False, session_store=None, interactive=True, pool=None,
+                 store=None, journal=None, resume=True, tracer=None, signin_url=SIGNIN_URL,
+                 card_manager_url=CARD_MANAGER_URL, selector_cache=None, bulk_delete=False,
+                 delete_concurrency=4, card_filter=None, route_filter=None):
         self.username = username
         self.password = password
         self.headless = headless
         self.num_cards = num_cards  # Store the number of cards to generate
         self.card_choice = card_choice  # Store the card choice (1 for 8060, 2 for 2653)
         self.profile = profile  # Store which profile is being used (1 or 2)
+        self.persist_session = persist_session  # Reuse a saved signed-in session between runs
+        self.session_store = session_store or SessionStore()
+        self._restored_session = False
+        self.ready = None  # Readiness waits for the current page
+        # Remembers which fallback selector worked for each step, across runs
+        self.selectors = SelectorRace(selector_cache or SelectorCache())
+        self._owns_selector_cache = selector_cache is None
+        self.bulk_delete = bulk_delete  # Replay the UI's delete request for every card instead of clicking through each
+        self.delete_concurrency = delete_concurrency  # Replayed deletes in flight at once
+        self.card_filter = card_filter or {}  # CardIndex.select() filters picking which cards to delete
+        self.card_index = CardIndex()  # Rows of the card table, read once per delete run
+        self.route_filter = route_filter  # Request filter for the private browser when no pool is shared (default: headless only)
+        self.interactive = interactive  # False when running unattended (no input() prompts)
+        self.cards_created = []  # Card detail lines saved during this run
+        self.cards_unreadable = 0  # Cards the bank created whose details couldn't be read
+        self.cards_deleted = 0  # Cards deleted during this run
+        self.pool = pool  # Shared BrowserPool; when None each run launches (and closes) its own browser
+        self.store = store  # Shared CardStore; when None the run opens cap_genned.txt itself
+        self._owns_store = False
+        self.journal = journal or JobJournal()  # Checkpoints so an interrupted job can be resumed
+        self.resume = resume  # Pick up an unfinished job with the same target instead of starting over
+        self.job = None  # Journal entry for the current run
+        # Step timings; a shared tracer collects every profile's steps into one report
+        source = f"capone/{profile}"
+        self.tracer = tracer.child(source) if tracer else Tracer(source)
+        self._owns_tracer = tracer is None  # A shared tracer is summarised once by whoever created it
+        self.signin_url = signin_url  # Overridden to point the automation at the offline mock bank
+        self.card_manager_url = card_manager_url
         
-    async def login(self):
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=self.headless,
-                args=["--disable-blink-features=AutomationControlled"]
-            )
-            
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-            )
-            
-            page = await context.new_page()
-            
-            # Set a smaller zoom level to ensure more content is visible
-            await page.evaluate('() => { document.body.style.zoom = "80%"; }')
-            print("Set page zoom to 80% to ensure buttons are visible")
-            
-            # Navigate to Capital One login page
-            await page.goto("https://verified.capitalone.com/auth/signin")
+    def _start_job(self, action):
+        """Open (or resume) the journal entry for this run and trim num_cards to what's left"""
+        self.job = self.journal.start("capone", self.profile, action, self.num_cards, resume=self.resume)
+        self.num_cards = self.journal.remaining(self.job)
+        if self.job["completed"]:
+            print(f"{self.num_cards} cards left to {action} for profile {self.profile}")
+    
+    def _checkpoint(self, step):
+        """Record the last step that succeeded for this job"""
+        if self.job:
+            self.journal.step(self.job, step)
+    
+    @asynccontextmanager
+    async def _browser_context(self):
+        """Borrow a context for this profile from the shared pool (or a private one-off browser)"""
+        pool = self.pool
+        owns_pool = pool is None
+        if owns_pool:
+            # Blocking is only on by default when nobody is watching the page; an interactive
+            # private browser loads everything, as it always has, unless a filter is passed in
+            route_filter = self.route_filter or (RouteFilter() if self.headless else None)
+            pool = BrowserPool(headless=self.headless, policy="teardown", route_filter=route_filter)
+        
+        storage_state = None
+        if self.persist_session:
+            storage_state = self.session_store.load(self.profile)
+            if storage_state:
+                print(f"Restoring saved session for profile {self.profile}")
+        
+        context = await pool.acquire(self.profile, storage_state=storage_state)
+        # A recycled context from an earlier job is already signed in, same as a restored session
+        self._restored_session = storage_state is not None or pool.uses(context) > 1
+        try:
+            yield context
+        finally:
+            await pool.release(context, self.profile)
+            if owns_pool:
+                await pool.close()
+                if route_filter is not None:
+                    route_filter.print_summary()
+            # A shared cache is saved once by whoever created it
+            if self._owns_selector_cache:
+                self.selectors.cache.save()
+    
+    def _save_card(self, details):
+        """Hand a card to the output store and remember it for the run report"""
+        if self.store is None:
+            self.store = open_card_store("capone")
+            self._owns_store = True
+        
+        source_card = {'1': '8060', '2': '2653'}.get(self.card_choice, "") if self.profile == '1' else ""
+        self.journal.record_card(self.job, self.store, CardRecord(
+            bank="capone",
+            card_number=details.card_number,
+            exp_month=details.exp_month,
+            exp_year=details.exp_year,
+            cvv=details.cvv,
+            profile=self.profile,
+            source_card=source_card
+        ))
+        self.cards_created.append(details.as_line())
+    
+    def _finish_store(self):
+        """Commit buffered cards; close the store if this run opened it"""
+        if self.store is None:
+            return
+        if self._owns_store:
+            self.store.close()
+            self.store = None
+            self._owns_store = False
+        else:
+            self.store.flush()
+    
+    def _manual_card_entry(self):
+        """Ask the user to type in card details, or skip when running unattended"""
+        if not self.interactive:
+            print("Skipping manual card entry (non-interactive run)")
+            return None
+        
+        return CardDetails(
+            card_number=input("Please enter the card number (16 digits): "),
+            exp_month=input("Please enter the expiration month (MM): "),
+            exp_year=input("Please enter the expiration year (YY): "),
+            cvv=input("Please enter the CVV (3 digits): ")
+        )
+    
+    def _on_signin_page(self, page):
+        """Capital One bounces expired sessions back to the sign in page"""
+        return self._is_signin_url(page.url)
+    
+    def _is_signin_url(self, url):
+        return "verified.capitalone.com" in url or "/signin" in url
+    
+    @traced("sign in")
+    async def _sign_in(self, page):
+        """Fill in the username and password on the sign in page"""
+        # Navigate to Capital One login page
+        await page.goto(self.signin_url)
+        
+        # Find and fill username field as soon as the form renders
+        username_field = await self.ready.visible(USERNAME_FIELD_SELECTOR, "sign in form", timeout=30000)
+        await username_field.fill(self.username)
+        
+        # Find and fill password field
+        password_field = await page.wait_for_selector('input[name="password"], input#password, input[type="password"]', state="visible")
+        await password_field.fill(self.password)
+        
+        # Find and click sign in button
+        sign_in_button = await page.wait_for_selector('button[type="submit"], button:has-text("Sign In"), button:has-text("Sign in")', state="visible")
+        await sign_in_button.click()
+        
+        # Authentication is complete once we are redirected away from the sign in host
+        return await self.ready.url(lambda url: not self._is_signin_url(url), "sign in redirect",
+                                    timeout=60000, required=False)
+    
+    async def open_card_manager(self, page, context):
+        """Get the page signed in and onto the Virtual Cards Manager, reusing a saved session when possible"""
+        if self._restored_session:
+            print("Navigating to Virtual Cards Manager with saved session...")
+            with self.tracer.span("navigate to cards"):
+                await page.goto(self.card_manager_url)
+                
+                # Either the manager renders or we get bounced to the sign in form
+                await self.ready.visible(f"{MANAGER_READY_SELECTOR}, {USERNAME_FIELD_SELECTOR}",
+                                         "saved session check", timeout=30000, required=False)
             
-            # Wait for the page to load completely
-            await page.wait_for_load_state("networkidle")
+            if not self._on_signin_page(page):
+                print("✅ Saved session is still valid, skipped sign in")
+                if self.persist_session:
+                    await self.session_store.save(context, self.profile)
+                return
             
-            # Find and fill username field
-            username_field = await page.wait_for_selector('input[name="username"], input#username, input[id*="username"]', state="visible")
-            await username_field.fill(self.username)
+            # Only fall back to a full sign in once the saved session has expired
+            print("Saved session has expired, signing in again...")
+            if self.persist_session:
+                self.session_store.invalidate(self.profile)
+            self._restored_session = False
+        
+        await self._sign_in(page)
+        
+        # Navigate to Virtual Cards Manager
+        print("Navigating to Virtual Cards Manager...")
+        with self.tracer.span("navigate to cards") as span:
+            await page.goto(self.card_manager_url)
             
-            # Find and fill password field
-            password_field = await page.wait_for_selector('input[name="password"], input#password, input[type="password"]', state="visible")
-            await password_field.fill(self.password)
+            # Wait for the manager to render its create button or card table
+            manager = await self.ready.visible(MANAGER_READY_SELECTOR, "Virtual Cards Manager", timeout=30000, required=False)
+            span.ok = manager is not None
+        
+        if self.persist_session:
+            await self.session_store.save(context, self.profile)
+        
+    @traced("open form")
+    async def _open_create_form(self, page, number, timeout=15000):
+        """Step 1: click "Create virtual card" and wait for the card creation form"""
+        if not await self.selectors.click(page, "'Create virtual card' button", CREATE_CARD_BUTTON_SELECTORS, timeout=timeout):
+            return False
+        
+        nickname_field = await self.ready.visible(NICKNAME_FIELD_SELECTOR, "card creation form",
+                                                  timeout=timeout, required=False)
+        if nickname_field is None:
+            print(f"Card creation form for card {number} not found or incomplete")
+            return False
+        return True
+    
+    @traced("verify identity")
+    async def _verify_identity(self, page):
+        """Open the first form; Capital One asks for a one-time code before the first card of a session"""
+        print("Looking for 'Create virtual card' button...")
+        if not await self.selectors.click(page, "'Create virtual card' button", CREATE_CARD_BUTTON_SELECTORS, timeout=30000):
+            return False
+        
+        # Skip the automatic selection and let the user handle it
+        print("\n*************************************************************")
+        print("MANUAL ACTION REQUIRED: Please complete the verification process (if asked)")
+        print("1. Select 'Text me a temporary code' (first box)")
+        print("2. Click 'Send me the code'")
+        print("3. Enter the verification code you receive")
+        print("*************************************************************\n")
+        
+        # Wait up to 5 minutes for the card creation form to show up
+        print("Waiting for verification to complete and card creation form to appear...")
+        nickname_field = await self.ready.visible(NICKNAME_FIELD_SELECTOR, "card creation form",
+                                                  timeout=300000, required=False)
+        single_use_checkbox = await page.query_selector('input[type="checkbox"], label:has-text("Limit to a single use")')
+        if nickname_field is None or single_use_checkbox is None:
+            return False
+        
+        self._checkpoint("verified")
+        print("\n✅ SUCCESS: Verification completed successfully!")
+        print("Card creation form is now visible.")
+        return True
+    
+    async def _await_created_card(self, page, number, response_waiter):
+        """(details, created) from the create response if it carries the details, otherwise from the success modal"""
+        # created says whether the bank made the card, even when its details can't be read
+        created = False
+        # Await success: whichever comes first, the API response or the card number in the modal
+        with self.tracer.span("await card") as span:
+            dom_ready = asyncio.ensure_future(
+                self.ready.condition(CARD_NUMBER_READY_JS, "card details", timeout=60000, required=False))
+            try:
+                done, _ = await asyncio.wait({response_waiter, dom_ready}, return_when=asyncio.FIRST_COMPLETED)
+                
+                if response_waiter in done and response_waiter.exception() is None:
+                    created = response_waiter.result().ok
+                    details = await card_details_from_response(response_waiter.result())
+                    if details and details.is_complete():
+                        print(f"✅ Card {number} details taken from the create response")
+                        return details, True
+                
+                # The response didn't carry the details (or never came): read them off the modal
+                span.ok = await dom_ready is not None
+                created = created or span.ok
+            finally:
+                if not dom_ready.done():
+                    dom_ready.cancel()
+        
+        if await page.query_selector('text="Virtual card created"'):
+            print("✅ Virtual card successfully created!")
+            created = True
+        
+        # Extract number, expiry and CVV in one round-trip
+        print(f"Extracting details for card {number}...")
+        with self.tracer.span("extract") as span:
+            details = await extract_card_details(page)
+            span.ok = details.is_complete()
+        return details, created or bool(details.card_number)
+    
+    async def _create_card(self, page, number, form_open=False):
+        """Run one card through open form → submit → await success → extract → confirm → reset"""
+        # Returns the details (incomplete when the card was created but couldn't be read), or None if no card was created
+        # Open form (the verification flow leaves the first form already open)
+        if not form_open and not await self._open_create_form(page, number):
+            return None
+        
+        # Listen for the card API's answer before submitting so the response can't be missed
+        response_waiter = asyncio.ensure_future(
+            page.wait_for_event("response", predicate=is_create_response, timeout=60000))
+        # A timed out or cancelled waiter is expected when the modal wins; don't report it as unhandled
+        response_waiter.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            # Submit
+            print(f"Clicking 'Create virtual card' button to generate card {number}...")
+            with self.tracer.span("submit") as span:
+                submitted = await self.selectors.click(page, "create virtual card submit button", SUBMIT_BUTTON_SELECTORS,
+                                                       timeout=15000, js_fallback=SUBMIT_BUTTON_JS)
+                span.ok = submitted
+            if not submitted:
+                if not self.interactive:
+                    return None
+                # Let user manually create the card if the automated click failed
+                print("\n*************************************************************")
+                print("MANUAL ACTION REQUIRED: Please click the 'Create virtual card' button")
+                print("*************************************************************\n")
+                input("Press Enter after you have clicked the button and the card is created...")
+            self._checkpoint("submitted")
             
-            # Find and click sign in button
-            sign_in_button = await page.wait_for_selector('button[type="submit"], button:has-text("Sign In"), button:has-text("Sign in")', state="visible")
-            await sign_in_button.click()
+            details, created = await self._await_created_card(page, number, response_waiter)
+        finally:
+            if not response_waiter.done():
+                response_waiter.cancel()
+        
+        print(f"Extracted card number: {details.card_number}")
+        print(f"Extracted expiration: {details.exp_month}/{details.exp_year}")
+        print(f"Extracted CVV: {details.cvv}")
+        
+        if not details.is_complete():
+            if not created:
+                print(f"Card {number} was not created")
+                return None
+            print(f"Failed to extract all card {number} details automatically.")
+            details = self._manual_card_entry() or details
+        
+        if details.is_complete():
+            print(f"Card details extracted: {details.as_line()}")
+            self._save_card(details)
+            print("✅ Card details saved")
+        else:
+            # The bank has the card, so retrying would only create another one
+            print(f"⚠️ Card {number} was created but its details could not be read; recording it instead of retrying")
+        
+        # Confirm: scroll the "Got it" button into view and dismiss the success modal
+        with self.tracer.span("confirm") as span:
+            await page.evaluate('() => { window.scrollBy(0, 300); }')
+            span.ok = await self.selectors.click(page, "'Got it' button", GOT_IT_BUTTON_SELECTORS, js_fallback=GOT_IT_BUTTON_JS)
+        if span.ok:
+            self._checkpoint("confirmed")
+        
+        # Reset happens implicitly: the next card's form is opened as soon as the modal lets
+        # the "Create virtual card" button receive clicks, instead of waiting for a fixed delay
+        return details
+    
+    async def _create_cards(self, page, form_open):
+        """Create num_cards cards, one state machine pass per card"""
+        created = 0
+        failures = 0
+        while created < self.num_cards:
+            number = created + 1
+            print(f"\n*************************************************************")
+            print(f"GENERATING CARD {number} OF {self.num_cards}")
+            print(f"*************************************************************\n")
             
-            # Wait to see results
-            await page.wait_for_load_state("networkidle")
+            try:
+                details = await self._create_card(page, number, form_open=form_open)
+            except Exception as card_error:
+                print(f"Error during card {number} creation process: {card_error}")
+                details = None
+            form_open = False
             
-            # Wait for authentication to complete
-            await asyncio.sleep(10)
+            if details:
+                created += 1
+                failures = 0
+                if not details.is_complete():
+                    self.cards_unreadable += 1
+                    self.journal.complete_one(self.job, "created but unreadable")
+            else:
+                failures += 1
+                if failures >= MAX_CARD_ATTEMPTS:
+                    print(f"Giving up after {failures} failed attempts at card {number}")
+                    break
+        if self.cards_unreadable:
+            print(f"⚠️ {self.cards_unreadable} created cards could not be read; copy them from the Virtual Cards Manager")
+        return created
+    
+    async def login(self):
+        # Pick up where an interrupted run of the same job stopped
+        self._start_job("create")
+        
+        async with self._browser_context() as context:
+            page = await context.new_page()
+            self.ready = Readiness(page, self.tracer)
             
-            # Navigate to Virtual Cards Manager
-            print("Navigating to Virtual Cards Manager...")
-            await page.goto("https://myaccounts.capitalone.com/VirtualCards/Manager")
+            # Set a smaller zoom level to ensure more content is visible
+            await page.evaluate('() => { document.body.style.zoom = "80%"; }')
+            print("Set page zoom to 80% to ensure buttons are visible")
             
-            # Wait for page to load
-            await page.wait_for_load_state("networkidle")
-            await asyncio.sleep(5)  # Extra wait to ensure page is fully loaded
+            # Sign in (or reuse the saved session) and open the Virtual Cards Manager
+            await self.open_card_manager(page, context)
+            self._checkpoint("signed in")
             
-            # Find and click "Create virtual card" button
-            print("Looking for 'Create virtual card' button...")
             try:
-                create_card_button = await page.wait_for_selector('button:has-text("Create virtual card")', 
-                                                                 state="visible", 
-                                                                 timeout=30000)
-                await create_card_button.click()
-                print("Clicked 'Create virtual card' button")
-                
-                # Wait for verification options to appear
-                await page.wait_for_load_state("networkidle")
-                await asyncio.sleep(3)
-                
-                # Skip the automatic selection and let the user handle it
-                print("\n*************************************************************")
-                print("MANUAL ACTION REQUIRED: Please complete the verification process")
-                print("1. Select 'Text me a temporary code' (first box)")
-                print("2. Click 'Send me the code'")
-                print("3. Enter the verification code you receive")
-                print("*************************************************************\n")
-                
-                # Wait for the user to complete verification by checking for the card creation form
-                print("Waiting for verification to complete and card creation form to appear...")
-                
-                # Loop to check for the card creation form
-                max_wait_time = 300  # 5 minutes maximum wait time
-                start_time = asyncio.get_event_loop().time()
-                verified = False
-                
-                while (asyncio.get_event_loop().time() - start_time) < max_wait_time:
-                    # Check for elements that indicate the card creation form is visible
-                    try:
-                        # Look for the card nickname field and limit to single use checkbox
-                        nickname_field = await page.query_selector('input[placeholder*="Example"], input[aria-label*="nickname"]')
-                        single_use_checkbox = await page.query_selector('input[type="checkbox"], label:has-text("Limit to a single use")')
-                        
-                        if nickname_field and single_use_checkbox:
-                            print("\n✅ SUCCESS: Verification completed successfully!")
-                            print("Card creation form is now visible.")
-                            verified = True
-                            break
-                    except Exception:
-                        pass  # Ignore any errors during checking
-                    
-                    # Check every 5 seconds
-                    await asyncio.sleep(5)
-                
-                if verified:
-                    print("Waiting at the card creation page as requested.")
-                    
-                    # Click the "Create virtual card" button in the form
-                    print("Clicking 'Create virtual card' button to generate a new card...")
-                    try:
-                        # Use the specific button selector from the provided HTML
-                        create_button = await page.wait_for_selector('button[data-e2e="create-virtual-card-create-submit-button"]', 
-                                                                   state="visible", 
-                                                                   timeout=15000)
-                        
-                        if create_button:
-                            # Try direct click first
-                            await create_button.click()
-                            print("Clicked the create virtual card button directly")
-                        else:
-                            # Fallback to previous approaches if specific selector not found
-                            print("Specific button not found, trying alternative approaches")
-                            
-                            # Try using the class from the provided HTML
-                            class_button = await page.wait_for_selector('button.c1-ease-commerce-create-virtual-card-create__submit', 
-                                                                     state="visible", 
-                                                                     timeout=5000)
-                            if class_button:
-                                await class_button.click()
-                                print("Clicked the button using class selector")
-                            else:
-                                # Use JavaScript with the exact attributes from the provided HTML
-                                await page.evaluate('''() => {
-                                    const button = document.querySelector('button[data-e2e="create-virtual-card-create-submit-button"]');
-                                    if (button) button.click();
-                                }''')
-                                print("Attempted to click using JavaScript with exact selector")
-                        
-                        # Wait for the card details to appear
-                        await page.wait_for_load_state("networkidle")
-                        await asyncio.sleep(10)  # Longer wait for card generation
-                                                
-                        # Check if we have the card created confirmation
-                        confirmation = await page.query_selector('text="Virtual card created"')
-                        if confirmation:
-                            print("✅ Virtual card successfully created!")
-                        
-                        # Extract card details
-                        print("Extracting card details...")
-                        
-                        try:
-                            # Use the specific elements provided in the HTML
-                            # Extract card number from <div class="vcNumber _TLPRIVATE">
-                            card_number = await page.evaluate('''() => {
-                                const cardNumberElement = document.querySelector('div.vcNumber._TLPRIVATE');
-                                if (cardNumberElement) {
-                                    return cardNumberElement.textContent.replace(/\\s+/g, '');
-                                }
-                                return '';
-                            }''')
-                            
-                            # Extract expiration date from <span> element
-                            exp_data = await page.evaluate('''() => {
-                                const expElements = Array.from(document.querySelectorAll('span'));
-                                const expElement = expElements.find(span => /\\d{2}\\/\\d{2}/.test(span.textContent));
-                                if (expElement) {
-                                    const match = expElement.textContent.match(/(\\d{2})\\/(\\d{2})/);
-                                    if (match) {
-                                        return {
-                                            month: match[1],
-                                            year: match[2]
-                                        };
-                                    }
-                                }
-                                return { month: '', year: '' };
-                            }''')
-                            
-                            # Extract CVV from <div class="_TLPRIVATE vcCVV">
-                            cvv = await page.evaluate('''() => {
-                                const cvvElement = document.querySelector('div._TLPRIVATE.vcCVV');
-                                if (cvvElement) {
-                                    const match = cvvElement.textContent.match(/Security\\s*Code:\\s*(\\d+)/);
-                                    if (match) {
-                                        return match[1];
-                                    }
-                                }
-                                return '';
-                            }''')
-                            
-                            print(f"Extracted card number: {card_number}")
-                            print(f"Extracted expiration: {exp_data['month']}/{exp_data['year']}")
-                            print(f"Extracted CVV: {cvv}")
-                            
-                            # Check if all data was extracted successfully
-                            if card_number and exp_data['month'] and exp_data['year'] and cvv:
-                                # Format the card details
-                                card_details = f"{card_number},{exp_data['month']},{exp_data['year']},{cvv}"
-                                print(f"Card details extracted: {card_details}")
-                                
-                                # Save to cap_genned.txt
-                                with open("cap_genned.txt", "a") as f:
-                                    f.write(card_details + "\n")
-                                
-                                print(f"✅ Card details saved to cap_genned.txt")
-                                
-                                # Scroll down before looking for the "Got it" button to ensure it's visible
-                                await page.evaluate('() => { window.scrollBy(0, 300); }')
-                                print("Scrolled down to ensure 'Got it' button is visible")
-                                
-                                print("Looking for 'Got it' button to complete the process...")
-                                try:
-                                    # Try to find and click the "Got it" button using the specific selector
-                                    got_it_button = await page.wait_for_selector('button[data-e2e="c1-ease-commerce-create-virtual-card-create-success__button-confirm"]', 
-                                                                             state="visible", 
-                                                                             timeout=10000)
-                                    if got_it_button:
-                                        await got_it_button.click()
-                                        print("✅ Clicked 'Got it' button")
-                                    else:
-                                        # Try alternative selector approaches
-                                        # Try by button text
-                                        text_button = await page.wait_for_selector('button:has-text("Got it")', 
-                                                                               state="visible", 
-                                                                               timeout=5000)
-                                        if text_button:
-                                            await text_button.click()
-                                            print("✅ Clicked 'Got it' button by text")
-                                        else:
-                                            # Try by class name
-                                            class_button = await page.wait_for_selector('button.c1-ease-commerce-create-virtual-card-create-success__button-confirm', 
-                                                                                   state="visible", 
-                                                                                   timeout=5000)
-                                            if class_button:
-                                                await class_button.click()
-                                                print("✅ Clicked 'Got it' button by class")
-                                            else:
-                                                # Try using JavaScript as a last resort
-                                                await page.evaluate('''() => {
-                                                    // Look for the button by text content
-                                                    const buttons = Array.from(document.querySelectorAll('button'));
-                                                    const gotItButton = buttons.find(btn => btn.textContent.trim() === 'Got it');
-                                                    if (gotItButton) {
-                                                        gotItButton.click();
-                                                        return true;
-                                                    }
-                                                    
-                                                    // Try by data-e2e attribute
-                                                    const attrButton = document.querySelector('button[data-e2e="c1-ease-commerce-create-virtual-card-create-success__button-confirm"]');
-                                                    if (attrButton) {
-                                                        attrButton.click();
-                                                        return true;
-                                                    }
-                                                    
-                                                    return false;
-                                                }''')
-                                                print("Attempted to click 'Got it' button using JavaScript")
-                                
-                                    # Wait a moment for any navigation or UI updates after clicking
-                                    await asyncio.sleep(3)
-                                    
-                                    # Wait 2 seconds as requested before restarting the process
-                                    print("Waiting 2 seconds before starting a new card creation process...")
-                                    await asyncio.sleep(2)
-                                    
-                                    # Generate the remaining cards
-                                    cards_generated = 1  # We've already generated one card
-                                    while cards_generated < self.num_cards:
-                                        print(f"\n*************************************************************")
-                                        print(f"GENERATING CARD {cards_generated+1} OF {self.num_cards}")
-                                        print(f"Looking for 'Create virtual card' button to create another card...")
-                                        print(f"*************************************************************\n")
-                                        
-                                        try:
-                                            # Find and click the first level "Create virtual card" button again
-                                            create_card_button = await page.wait_for_selector('button:has-text("Create virtual card")', 
-                                                                                           state="visible", 
-                                                                                           timeout=15000)
-                                            await create_card_button.click()
-                                            print(f"Clicked 'Create virtual card' button to start card {cards_generated+1} creation")
-                                            
-                                            # Wait for the form to appear - no verification needed after the first time
-                                            await page.wait_for_load_state("networkidle")
-                                            await asyncio.sleep(3)
-                                                                                        
-                                            # Check if we're seeing the card creation form directly
-                                            nickname_field = await page.query_selector('input[placeholder*="Example"], input[aria-label*="nickname"]')
-                                            single_use_checkbox = await page.query_selector('input[type="checkbox"], label:has-text("Limit to a single use")')
-                                            
-                                            if nickname_field and single_use_checkbox:
-                                                print("✅ Card creation form appeared directly without verification")
-                                                
-                                                # Click the second level "Create virtual card" button
-                                                print(f"Clicking 'Create virtual card' button to generate card {cards_generated+1}...")
-                                                
-                                                create_button = await page.wait_for_selector('button[data-e2e="create-virtual-card-create-submit-button"]', 
-                                                                                           state="visible", 
-                                                                                           timeout=15000)
-                                                
-                                                if create_button:
-                                                    await create_button.click()
-                                                    print(f"Clicked the button to create virtual card {cards_generated+1}")
-                                                    
-                                                    # Wait for the card details to appear
-                                                    await page.wait_for_load_state("networkidle")
-                                                    await asyncio.sleep(10)
-                                                    
-                                                    # Extract card details using the same methods as before
-                                                    print(f"Extracting details for card {cards_generated+1}...")
-                                                    
-                                                    # Extract card number from <div class="vcNumber _TLPRIVATE">
-                                                    card_number = await page.evaluate('''() => {
-                                                        const cardNumberElement = document.querySelector('div.vcNumber._TLPRIVATE');
-                                                        if (cardNumberElement) {
-                                                            return cardNumberElement.textContent.replace(/\\s+/g, '');
-                                                        }
-                                                        return '';
-                                                    }''')
-                                                    
-                                                    # Extract expiration date from <span> element
-                                                    exp_data = await page.evaluate('''() => {
-                                                        const expElements = Array.from(document.querySelectorAll('span'));
-                                                        const expElement = expElements.find(span => /\\d{2}\\/\\d{2}/.test(span.textContent));
-                                                        if (expElement) {
-                                                            const match = expElement.textContent.match(/(\\d{2})\\/(\\d{2})/);
-                                                            if (match) {
-                                                                return {
-                                                                    month: match[1],
-                                                                    year: match[2]
-                                                                };
-                                                            }
-                                                        }
-                                                        return { month: '', year: '' };
-                                                    }''')
-                                                    
-                                                    # Extract CVV from <div class="_TLPRIVATE vcCVV">
-                                                    cvv = await page.evaluate('''() => {
-                                                        const cvvElement = document.querySelector('div._TLPRIVATE.vcCVV');
-                                                        if (cvvElement) {
-                                                            const match = cvvElement.textContent.match(/Security\\s*Code:\\s*(\\d+)/);
-                                                            if (match) {
-                                                                return match[1];
-                                                            }
-                                                        }
-                                                        return '';
-                                                    }''')
-                                                    
-                                                    print(f"Extracted card number: {card_number}")
-                                                    print(f"Extracted expiration: {exp_data['month']}/{exp_data['year']}")
-                                                    print(f"Extracted CVV: {cvv}")
-                                                    
-                                                    if card_number and exp_data['month'] and exp_data['year'] and cvv:
-                                                        # Format the card details
-                                                        card_details = f"{card_number},{exp_data['month']},{exp_data['year']},{cvv}"
-                                                        print(f"Card details extracted: {card_details}")
-                                                        
-                                                        # Save to cap_genned.txt
-                                                        with open("cap_genned.txt", "a") as f:
-                                                            f.write(card_details + "\n")
-                                                        
-                                                        print(f"✅ Card details saved to cap_genned.txt")
-                                                        
-                                                        # Scroll and click "Got it" button
-                                                        await page.evaluate('() => { window.scrollBy(0, 300); }')
-                                                        print(f"Scrolled down to ensure 'Got it' button is visible for card {cards_generated+1}")
-                                                        
-                                                        # Click "Got it" button for the card
-                                                        print(f"Looking for 'Got it' button to complete card {cards_generated+1} process...")
-                                                        
-                                                        got_it_button = await page.wait_for_selector('button[data-e2e="c1-ease-commerce-create-virtual-card-create-success__button-confirm"], button:has-text("Got it")', 
-                                                                                                  state="visible", 
-                                                                                                  timeout=10000)
-                                                        if got_it_button:
-                                                            await got_it_button.click()
-                                                            print(f"✅ Clicked 'Got it' button for card {cards_generated+1}")
-                                                        else:
-                                                            # Try JavaScript as fallback
-                                                            await page.evaluate('''() => {
-                                                                const buttons = Array.from(document.querySelectorAll('button'));
-                                                                const gotItButton = buttons.find(btn => btn.textContent.trim() === 'Got it');
-                                                                if (gotItButton) {
-                                                                    gotItButton.click();
-                                                                }
-                                                            }''')
-                                                            print(f"Attempted to click 'Got it' button using JavaScript for card {cards_generated+1}")
-                                                    
-                                                        await asyncio.sleep(3)
-                                                        
-                                                        # Increment the counter
-                                                        cards_generated += 1
-                                                        
-                                                        # Wait 2 seconds before the next card
-                                                        await asyncio.sleep(2)
-                                                    else:
-                                                        print(f"Failed to extract all card {cards_generated+1} details automatically.")
-                                                        # Fallback to manual input for card
-                                                        # ... (similar to previous manual input code)
-                                                else:
-                                                    print(f"Could not find the 'Create virtual card' button for card {cards_generated+1}")
-                                                # Remove this break statement that was causing premature loop exit
-                                                # break  
-                                            else:
-                                                print(f"Card creation form for card {cards_generated+1} not found or incomplete")
-                                        except Exception as card_error:
-                                            print(f"Error during card {cards_generated+1} creation process: {card_error}")
-                                            # Remove this break statement that was causing premature loop exit
-                                            # break  
-                                
-                                except Exception as extract_error:
-                                    print(f"Error extracting card details: {extract_error}")
-                                    
-                                    # Fallback to manual input if any exception occurs
-                                    print("Exception occurred during extraction. Manual input required.")
-                                    
-                                    card_number = input("Please enter the card number (16 digits): ")
-                                    exp_month = input("Please enter the expiration month (MM): ")
-                                    exp_year = input("Please enter the expiration year (YY): ")
-                                    cvv = input("Please enter the CVV (3 digits): ")
-                                    
-                                    # Format and save the manual input
-                                    card_details = f"{card_number},{exp_month},{exp_year},{cvv}"
-                                    with open("cap_genned.txt", "a") as f:
-                                        f.write(card_details + "\n")
-                                    
-                                    print(f"✅ Manually entered card details saved to cap_genned.txt")
-                        except Exception as e:
-                            print(f"Error while creating or extracting card details: {e}")
-                            
-                    except Exception as e:
-                        print(f"Error while creating or extracting card details: {e}")
-                                                    
-                        # Let user manually create a card if automated click failed
-                        print("\n*************************************************************")
-                        print("MANUAL ACTION REQUIRED: Please click the 'Create virtual card' button")
-                        print("Wait for the card to be created, then enter the details manually:")
-                        print("*************************************************************\n")
-                        
-                        # Wait for user to create card and then manually input details
-                        input("Press Enter after you have clicked the button and the card is created...")
-                        
-                        card_number = input("Please enter the card number (16 digits): ")
-                        exp_month = input("Please enter the expiration month (MM): ")
-                        exp_year = input("Please enter the expiration year (YY): ")
-                        cvv = input("Please enter the CVV (3 digits): ")
-                        
-                        # Format and save the manual input
-                        card_details = f"{card_number},{exp_month},{exp_year},{cvv}"
-                        with open("cap_genned.txt", "a") as f:
-                            f.write(card_details + "\n")
-                        
-                        print(f"✅ Manually entered card details saved to cap_genned.txt")
+                if await self._verify_identity(page):
+                    await self._create_cards(page, form_open=True)
                 else:
                     print("Timed out waiting for verification. The verification process may not have completed successfully.")
-                
             except Exception as e:
                 print(f"Error during process: {e}")
+            if self._owns_tracer:
+                self.tracer.print_summary()
+            self._finish_store()
+            
             # Instead of closing, wait for user input to close
-            input("Process complete. Press Enter to close the browser...")
-            try:
-                await browser.close()
-            except:
-                print("Browser may already be closed")
+            if self.interactive:
+                input("Process complete. Press Enter to close the browser...")
+            
+            return self.cards_created
 
-    async def delete_cards(self):
-        async with async_playwright() as p:
+    async def _open_manage(self, page, card):
+        """Click the manage button of a specific card, or of the first card when card is None"""
+        if card is None:
+            return await self.selectors.click(page, "manage button", MANAGE_BUTTON_SELECTORS,
+                                              timeout=10000, js_fallback=MANAGE_BUTTON_JS)
+        
+        manage_button = await self.card_index.locate(page, card)
+        if manage_button is None:
+            print(f"Card ending in {card.last4 or '????'} is no longer in the table or can't be told apart from another row")
+            return False
+        await manage_button.click(timeout=10000)
+        return True
+    
+    async def _delete_card(self, page, number, card=None):
+        """Manage → Delete Virtual Card → confirm → check for the success dialog → dismiss it"""
+        with self.tracer.span("open card") as span:
+            span.ok = await self._open_manage(page, card)
+        if not span.ok:
+            print(f"Failed to find manage button for card {number}")
+            return False
+        
+        with self.tracer.span("delete button") as span:
+            span.ok = await self.selectors.click(page, "delete button", DELETE_BUTTON_SELECTORS,
+                                                 timeout=10000, js_fallback=DELETE_BUTTON_JS)
+        if not span.ok:
+            print(f"Failed to find delete button for card {number}")
+            return False
+        
+        with self.tracer.span("confirm delete") as span:
+            span.ok = await self.selectors.click(page, "confirm delete button", CONFIRM_DELETE_SELECTORS,
+                                                 timeout=10000, js_fallback=CONFIRM_DELETE_JS)
+        if not span.ok:
+            print(f"Failed to find confirm button for card {number}")
+            return False
+        
+        # Check for success message BEFORE dismissing the dialog
+        with self.tracer.span("await removal") as span:
+            span.ok = await self.selectors.wait(page, "delete success message", DELETE_SUCCESS_SELECTORS,
+                                                timeout=5000, js_fallback=DELETE_SUCCESS_JS)
+        if span.ok:
+            print(f"✅ Confirmed successful deletion of card {number}")
+        else:
+            print(f"⚠️ Warning: Could not verify successful deletion of card {number} - No success message found")
+            print(f"Continuing to next card anyway...")
+        
+        with self.tracer.span("dismiss dialog"):
+            await self._dismiss_dialog(page, number)
+        return True
+    
+    async def _delete_through_ui(self, page, targets):
+        """Delete each target card, clicking through the dialogs for each"""
+        for i, card in enumerate(targets):
+            # Without filters the targets are just the first cards in the table, so a row that can't be
+            # told apart from others is deleted as "the first card" like before the card index existed
+            target = card
+            if not self.card_filter and not card.manage_selector and not self.card_index.is_unique(card):
+                target = None
             try:
-                # Launch browser and create page, similar to login method
-                browser = await p.chromium.launch(
-                    headless=self.headless,
-                    args=["--disable-blink-features=AutomationControlled"]
-                )
+                if await self._delete_card(page, i + 1, target):
+                    self.cards_deleted += 1
+                    self.card_index.remove(card)
+                    self.journal.complete_one(self.job, "deleted")
                 
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-                )
+                # Wait for the modal backdrop to detach so the table is clickable for the next card
+                await self.ready.gone(MODAL_SELECTOR, "modal backdrop detached", timeout=10000, required=False)
                 
+            except Exception as e:
+                print(f"Error in deletion process for card {i+1}: {e}")
+    
+    async def _bulk_delete(self, page, context, targets):
+        """Delete the first target through the UI while recording its request, then replay that request for the rest"""
+        first, rest = targets[0], targets[1:]
+        table = list(self.card_index.cards)  # Before the delete, to tell per-card tokens from shared values
+        
+        with DeleteRequestRecorder(page) as recorder:
+            deleted_first = await self._delete_card(page, 1, first)
+        await self.ready.gone(MODAL_SELECTOR, "modal backdrop detached", timeout=10000, required=False)
+        
+        # The token is whichever of the card's row attributes shows up in the request that deleted it
+        template = await recorder.template_for(first, table) if deleted_first and rest else None
+        if rest and template is None:
+            print("Could not find a replayable delete request, deleting the remaining cards through the UI")
+        elif template:
+            replayable = [card for card in rest if template.token_of(card)]
+            print(f"Replaying {template.method} {template.url} for {len(replayable)} cards by their "
+                  f"{template.attribute} ({self.delete_concurrency} at a time)...")
+            with self.tracer.span("replay deletes"):
+                await template.replay(context, replayable, self.delete_concurrency)
+        
+        def identity(card):
+            return (template and template.token_of(card)) or card.key
+        
+        # Trust the table, not the response codes: reload it and see which cards are gone
+        with self.tracer.span("confirm deletions"):
+            await page.reload(wait_until="networkidle")
+            remaining = {identity(card) for card in await self.card_index.refresh(page)}
+        confirmed = [card for card in targets
+                     if (card is first and deleted_first) or (identity(card) is not None and identity(card) not in remaining)]
+        for card in confirmed:
+            self.cards_deleted += 1
+            self.journal.complete_one(self.job, "deleted")
+        print(f"Confirmed {len(confirmed)} of {len(targets)} deletions by re-reading the card table")
+        
+        # Whatever the replay didn't remove goes through the dialogs one by one
+        confirmed_ids = {id(card) for card in confirmed}
+        missing = [card for card in targets if id(card) not in confirmed_ids]
+        if missing:
+            print(f"{len(missing)} cards are still in the table, deleting them through the UI")
+            await self._delete_through_ui(page, missing)
+    
+    async def _dismiss_dialog(self, page, number):
+        """Close the delete success dialog: its button if it has one, otherwise click outside or press Escape"""
+        print(f"Now dismissing the confirmation dialog...")
+        try:
+            if await self.selectors.click(page, "dismiss button", DISMISS_BUTTON_SELECTORS, timeout=3000):
+                return
+            
+            # If no dismiss button found, click somewhere in the main document area, away from the dialog
+            print("No dismiss button found, clicking outside the dialog...")
+            await page.mouse.click(50, 50)
+            print(f"✅ Clicked outside dialog to dismiss it for card {number}")
+            
+            # Alternative approach: dispatch a click on the document body
+            if await page.query_selector(MODAL_SELECTOR):
+                await page.evaluate(CLICK_OUTSIDE_JS)
+                print(f"✅ Used JavaScript to click outside modal for card {number}")
+            
+            # If still not dismissed, try Escape key
+            if not await self.ready.gone(MODAL_SELECTOR, "modal dismissed", timeout=1000, required=False):
+                await page.keyboard.press("Escape")
+                print(f"Pressed Escape key to attempt to dismiss dialog for card {number}")
+        except Exception as dismiss_error:
+            print(f"Error dismissing dialog: {dismiss_error}")
+            
+            # Final fallback: just try to press Escape key
+            try:
+                await page.keyboard.press("Escape")
+                print(f"Pressed Escape key as fallback to dismiss dialog for card {number}")
+            except Exception as escape_error:
+                print(f"Error when trying to press Escape: {escape_error}")
+    
+    async def delete_cards(self):
+        # Pick up where an interrupted run of the same job stopped
+        self._start_job("delete")
+        
+        async with self._browser_context() as context:
+            try:
                 page = await context.new_page()
+                self.ready = Readiness(page, self.tracer)
                 
                 # Explicitly set the zoom level to 80% to ensure all buttons are visible
                 try:
@@ -492,359 +695,53 @@ class CapitalOneAutomation:
                 except Exception as zoom_error:
                     print(f"Warning: Could not set zoom level: {zoom_error}")
                 
-                # Navigate to Capital One login page and authenticate
-                await page.goto("https://verified.capitalone.com/auth/signin")
-                
-                # Set zoom again after page load
-                await page.evaluate('() => { document.body.style.zoom = "80%"; }')
-                print("Applied zoom level again after page load")
-                
-                await page.wait_for_load_state("networkidle")
-                
-                # Find and fill username field
-                username_field = await page.wait_for_selector('input[name="username"], input#username, input[id*="username"]', state="visible")
-                await username_field.fill(self.username)
-                
-                # Find and fill password field
-                password_field = await page.wait_for_selector('input[name="password"], input#password, input[type="password"]', state="visible")
-                await password_field.fill(self.password)
-                
-                # Find and click sign in button
-                sign_in_button = await page.wait_for_selector('button[type="submit"], button:has-text("Sign In"), button:has-text("Sign in")', state="visible")
-                await sign_in_button.click()
-                
-                # Wait for authentication to complete
-                await page.wait_for_load_state("networkidle")
-                await asyncio.sleep(10)
-                
-                # Apply zoom level again after authentication
-                await page.evaluate('() => { document.body.style.zoom = "80%"; }')
-                
-                # Navigate to Virtual Cards Manager
-                print("Navigating to Virtual Cards Manager...")
-                await page.goto("https://myaccounts.capitalone.com/VirtualCards/Manager")
-                
-                # Wait for page to load
-                await page.wait_for_load_state("networkidle")
-                await asyncio.sleep(5)  # Extra wait to ensure page is fully loaded
+                # Sign in (or reuse the saved session) and open the Virtual Cards Manager
+                await self.open_card_manager(page, context)
                 
                 # Apply zoom level one more time after loading the cards page
                 await page.evaluate('() => { document.body.style.zoom = "80%"; }')
                 print("Applied zoom level again after loading the cards page")
                 
                 # Wait for the virtual cards page to load
-                await page.wait_for_selector("c1-ease-commerce-virtual-cards-table-nickname-column", timeout=30000)
+                await self.ready.visible("c1-ease-commerce-virtual-cards-table-nickname-column", "virtual cards table", timeout=30000)
                 print("Virtual cards page loaded")
                 
-                # Extract the HTML content to check the number of existing cards
-                html_content = await page.content()
+                # Read every row of the card table in one pass
+                with self.tracer.span("read card index"):
+                    cards = await self.card_index.refresh(page)
+                print(f"Found {len(cards)} virtual cards")
                 
-                # Check how many cards exist by counting "Unnamed Virtual Card" instances
-                card_count = html_content.count('Unnamed Virtual Card')
-                print(f"Found {card_count} virtual cards")
+                # Pick the cards to delete: the first num_cards, or the first num_cards matching the filters
+                targets = self.card_index.select(limit=self.num_cards, **self.card_filter)
+                if self.card_filter:
+                    print(f"{len(targets)} cards match {self.card_filter}")
                 
                 # If there are no cards, log and return early
-                if card_count == 0:
+                if not targets:
                     print("No cards found to delete")
-                    return
-                
-                # Continue with deletion only if cards exist
-                cards_to_delete = min(self.num_cards, card_count)
-                print(f"Will delete {cards_to_delete} cards")
+                    self.journal.finish(self.job)
+                    return 0
                 
-                # Save HTML content to file for debugging/analysis
-                with open("cards.txt", "w", encoding="utf-8") as f:
-                    f.write(html_content)
-                print("Saved HTML content to cards.txt for analysis")
+                cards_to_delete = len(targets)
+                print(f"Will delete {cards_to_delete} cards: "
+                      f"{', '.join(card.last4 or '????' for card in targets)}")
                 
-                # Now proceed with deletion of the specified number of cards
-                for i in range(cards_to_delete):
-                    try:
-                        # Wait for the manage button to be visible and click it
-                        manage_button = await page.wait_for_selector(
-                            "button.c1-ease-commerce-virtual-cards-manager__manage-token-button", 
-                            timeout=10000
-                        )
-                        
-                        if manage_button:
-                            await manage_button.click()
-                            print(f"Clicked manage button for card {i+1}")
-                        else:
-                            # Try alternative selector if first one fails
-                            alt_button = await page.wait_for_selector(
-                                "button[aria-label^='Manage virtual card Unnamed Virtual Card']", 
-                                timeout=5000
-                            )
-                            if alt_button:
-                                await alt_button.click()
-                                print(f"Clicked manage button (alt selector) for card {i+1}")
-                            else:
-                                # Use JavaScript as last resort
-                                clicked = await page.evaluate('''() => {
-                                    const buttons = document.querySelectorAll('button.c1-ease-commerce-virtual-cards-manager__manage-token-button');
-                                    if (buttons && buttons.length > 0) {
-                                        buttons[0].click();
-                                        return true;
-                                    }
-                                    return false;
-                                }''')
-                                
-                                if clicked:
-                                    print(f"Clicked manage button via JavaScript for card {i+1}")
-                                else:
-                                    print(f"Failed to find manage button for card {i+1}")
-                                    continue
-                        
-                        # Wait for the manage modal to appear
-                        await asyncio.sleep(2)
-                        
-                        # Wait for the delete button to be visible and click it
-                        try:
-                            # First try with the exact selector
-                            delete_button = await page.wait_for_selector(
-                                "button[data-e2e='manage-virtual-number-delete-button']", 
-                                timeout=5000
-                            )
-                            if delete_button:
-                                await delete_button.click()
-                                print(f"Clicked delete button (exact selector) for card {i+1}")
-                            else:
-                                # Try by button text content
-                                text_delete_button = await page.wait_for_selector(
-                                    "button:has-text('Delete Virtual Card')", 
-                                    timeout=5000
-                                )
-                                if text_delete_button:
-                                    await text_delete_button.click()
-                                    print(f"Clicked delete button (text selector) for card {i+1}")
-                                else:
-                                    # Try by class
-                                    class_delete_button = await page.wait_for_selector(
-                                        "button.grv-button-tertiary--danger", 
-                                        timeout=5000
-                                    )
-                                    if class_delete_button:
-                                        await class_delete_button.click()
-                                        print(f"Clicked delete button (class selector) for card {i+1}")
-                                    else:
-                                        # Use JavaScript as last resort
-                                        deleted = await page.evaluate('''() => {
-                                            // First try data-e2e attribute
-                                            let button = document.querySelector("button[data-e2e='manage-virtual-number-delete-button']");
-                                            
-                                            // Then try by text content
-                                            if (!button) {
-                                                const buttons = Array.from(document.querySelectorAll('button'));
-                                                button = buttons.find(btn => btn.textContent.includes('Delete Virtual Card'));
-                                            }
-                                            
-                                            if (button) {
-                                                button.click();
-                                                return true;
-                                            }
-                                            return false;
-                                        }''')
-                                        
-                                        if deleted:
-                                            print(f"Clicked delete button via JavaScript for card {i+1}")
-                                        else:
-                                            print(f"Failed to find delete button for card {i+1}")
-                                            continue
-                        except Exception as delete_error:
-                            print(f"Error finding/clicking delete button for card {i+1}: {delete_error}")
-                            continue
-                        
-                        # Wait for the confirmation dialog
-                        await asyncio.sleep(2)
-                        
-                        # Wait for and click the confirm delete button
-                        try:
-                            # First try with the exact selector
-                            confirm_delete = await page.wait_for_selector(
-                                "button[data-e2e='manage-virtual-number-delete-confirm']", 
-                                timeout=5000
-                            )
-                            if confirm_delete:
-                                await confirm_delete.click()
-                                print(f"Confirmed deletion (exact selector) for card {i+1}")
-                            else:
-                                # Try by direct aria-label
-                                aria_confirm = await page.wait_for_selector("button[aria-label='Delete']", timeout=5000)
-                                if aria_confirm:
-                                    await aria_confirm.click()
-                                    print(f"Confirmed deletion (aria-label) for card {i+1}")
-                                else:
-                                    # Try by button text
-                                    text_confirm = await page.wait_for_selector("button:has-text('Delete')", timeout=5000)
-                                    if text_confirm:
-                                        await text_confirm.click()
-                                        print(f"Confirmed deletion (text) for card {i+1}")
-                                    else:
-                                        # Try by class
-                                        class_confirm = await page.wait_for_selector("button.deleteButton.grv-button-primary--danger", timeout=5000)
-                                        if class_confirm:
-                                            await class_confirm.click() 
-                                            print(f"Confirmed deletion (class selector) for card {i+1}")
-                                        else:
-                                            # Try JavaScript as last resort
-                                            confirmed = await page.evaluate('''() => {
-                                                // Try all possible selectors
-                                                let button = document.querySelector("button[data-e2e='manage-virtual-number-delete-confirm']");
-                                                
-                                                if (!button) {
-                                                    button = document.querySelector("button.deleteButton");
-                                                }
-                                                
-                                                if (!button) {
-                                                    button = document.querySelector("button.grv-button-primary--danger");
-                                                }
-                                                
-                                                if (!button) {
-                                                    const buttons = Array.from(document.querySelectorAll('button'));
-                                                    button = buttons.find(btn => btn.textContent.trim() === 'Delete');
-                                                }
-                                                
-                                                if (button) {
-                                                    button.click();
-                                                    return true;
-                                                }
-                                                return false;
-                                            }''')
-                                            
-                                            if confirmed:
-                                                print(f"Confirmed deletion via JavaScript for card {i+1}")
-                                            else:
-                                                print(f"Failed to find confirm button for card {i+1}")
-                                                continue
-                            
-                            # Wait for the deletion to complete with enough time to see the success message
-                            await page.wait_for_timeout(2000)
-                            
-                            # Check for success message BEFORE dismissing the dialog
-                            try:
-                                # Look for the specific success header
-                                success_message = await page.wait_for_selector(
-                                    "h1#title:has-text('Success')", 
-                                    timeout=5000
-                                )
-                                
-                                if success_message:
-                                    print(f"✅ Confirmed successful deletion of card {i+1} - Success message found")
-                                else:
-                                    # Try alternative selectors for the success message
-                                    alt_success = await page.wait_for_selector(
-                                        "h1.c1-ease-dialog-title:has-text('Success')", 
-                                        timeout=2000
-                                    )
-                                    
-                                    if alt_success:
-                                        print(f"✅ Confirmed successful deletion of card {i+1} - Success title found")
-                                    else:
-                                        # Try with JavaScript to find any success message
-                                        success_found = await page.evaluate('''() => {
-                                            // Check for the specific h1
-                                            const successTitle = document.querySelector("h1#title.c1-ease-dialog-title");
-                                            if (successTitle && successTitle.textContent.trim() === "Success") {
-                                                return true;
-                                            }
-                                            
-                                            // Check for any element containing "Success" text
-                                            const elements = document.querySelectorAll("*");
-                                            for (const el of elements) {
-                                                if (el.textContent && el.textContent.trim() === "Success") {
-                                                    return true;
-                                                }
-                                            }
-                                            
-                                            return false;
-                                        }''')
-                                        
-                                        if success_found:
-                                            print(f"✅ Confirmed successful deletion of card {i+1} - Success text found via JavaScript")
-                                        else:
-                                            print(f"⚠️ Warning: Could not verify successful deletion of card {i+1} - No success message found")
-                                            print(f"Continuing to next card anyway...")
-                                    
-                            except Exception as success_error:
-                                print(f"Error checking for success message for card {i+1}: {success_error}")
-                            
-                            # AFTER checking for success, now try to dismiss the dialog
-                            print(f"Now dismissing the confirmation dialog...")
-                            
-                            # Wait for any dismiss button or wait for the success message to disappear naturally
-                            try:
-                                dismiss_button = await page.wait_for_selector(
-                                    "button:has-text('OK'), button:has-text('Done'), button:has-text('Close')", 
-                                    timeout=3000
-                                )
-                                if dismiss_button:
-                                    await dismiss_button.click()
-                                    print(f"Clicked dismiss button after successful deletion of card {i+1}")
-                                else:
-                                    # If no dismiss button found, click outside the dialog
-                                    print("No dismiss button found, clicking outside the dialog...")
-                                    
-                                    # Click somewhere in the main document area, away from the dialog
-                                    await page.mouse.click(50, 50)  # Click near the top-left of the page
-                                    print(f"✅ Clicked outside dialog to dismiss it for card {i+1}")
-                                    
-                                    # Alternative approach: click in the empty space of the document body
-                                    if await page.query_selector("div.modal-backdrop, div.modal"):
-                                        await page.evaluate('''() => {
-                                            // Find the document body and click in an empty area
-                                            const body = document.body;
-                                            const bodyRect = body.getBoundingClientRect();
-                                            
-                                            // Create and dispatch a click event in the top left corner
-                                            const clickEvent = new MouseEvent('click', {
-                                                bubbles: true,
-                                                cancelable: true,
-                                                view: window,
-                                                clientX: 50,
-                                                clientY: 50
-                                            });
-                                            
-                                            // Dispatch the event directly on the body
-                                            body.dispatchEvent(clickEvent);
-                                        }''')
-                                        print(f"✅ Used JavaScript to click outside modal for card {i+1}")
-                                    
-                                    # If still not dismissed, try Escape key
-                                    await asyncio.sleep(1)
-                                    if await page.query_selector("div.modal-backdrop, div.modal"):
-                                        await page.keyboard.press("Escape")
-                                        print(f"Pressed Escape key to attempt to dismiss dialog for card {i+1}")
-                            except Exception as dismiss_error:
-                                print(f"Error dismissing dialog: {dismiss_error}")
-                                
-                                # Final fallback: just try to press Escape key
-                                try:
-                                    await page.keyboard.press("Escape")
-                                    print(f"Pressed Escape key as fallback to dismiss dialog for card {i+1}")
-                                except Exception as escape_error:
-                                    print(f"Error when trying to press Escape: {escape_error}")
-                        
-                        except Exception as confirm_error:
-                            print(f"Error confirming deletion for card {i+1}: {confirm_error}")
-                            continue
-
-                        # Additional wait to ensure the UI is ready for the next card deletion
-                        await page.wait_for_timeout(2000)
-                        
-                    except Exception as e:
-                        print(f"Error in deletion process for card {i+1}: {e}")
+                # Now proceed with deletion of the selected cards. Bulk delete works out which attribute is
+                # the card token from the first delete's request; cards without one go through the UI.
+                if self.bulk_delete:
+                    await self._bulk_delete(page, context, targets)
+                else:
+                    await self._delete_through_ui(page, targets)
                 
-                print(f"Deleted {cards_to_delete} cards")
+                print(f"Deleted {self.cards_deleted} of {cards_to_delete} cards")
+                if self._owns_tracer:
+                    self.tracer.print_summary()
                 
                 # Wait for user input before closing
-                input("Card deletion complete. Press Enter to close the browser...")
+                if self.interactive:
+                    input("Card deletion complete. Press Enter to close the browser...")
                 
             except Exception as e:
                 print(f"Error in delete_cards method: {e}")
-            
-            finally:
-                # Ensure browser is closed properly in all cases
-                try:
-                    await browser.close()
-                except:
-                    print("Browser may already be closed")
+        
+        return self.cards_deleted
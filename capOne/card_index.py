@@ -0,0 +1,171 @@
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+MANAGE_BUTTON_SELECTOR = "button.c1-ease-commerce-virtual-cards-manager__manage-token-button"
+
+# Attribute the card manager puts on each row or manage button with the card's own token
+TOKEN_ATTRIBUTE = "data-token"
+
+# One pass over the table: nickname, last 4, created date, usage text, identifying attributes and a
+# selector that finds the row's manage button again. The selector is only built from the same stable
+# identity as VirtualCard.key (the token, or an "ending in NNNN" label) and only when it is unique on
+# the page; positional attributes like data-index would point at another card once rows shift.
+READ_CARD_TABLE_JS = r"""([manageSelector, tokenAttribute]) => {
+    const unique = (selector) => {
+        try {
+            return document.querySelectorAll(selector).length === 1 ? selector : null;
+        } catch (e) {
+            return null;
+        }
+    };
+    const quote = (value) => value.replace(/\\/g, '\\\\').replace(/"/g, '\\"');
+
+    return Array.from(document.querySelectorAll(manageSelector)).map((button) => {
+        const row = button.closest('tr, [role="row"], li') || button.parentElement;
+        const attributes = {};
+        for (const element of [row, button]) {
+            for (const attribute of element.attributes) {
+                if (attribute.name.startsWith('data-') || attribute.name === 'id') {
+                    attributes[attribute.name] = attribute.value;
+                }
+            }
+        }
+
+        const label = button.getAttribute('aria-label') || '';
+        let selector = null;
+        if (button.hasAttribute(tokenAttribute)) {
+            selector = unique(`${manageSelector}[${tokenAttribute}="${quote(button.getAttribute(tokenAttribute))}"]`);
+        } else if (row.hasAttribute(tokenAttribute)) {
+            selector = unique(`[${tokenAttribute}="${quote(row.getAttribute(tokenAttribute))}"] ${manageSelector}`);
+        }
+        if (!selector && /ending in \d{4}/i.test(label)) {
+            selector = unique(`${manageSelector}[aria-label="${quote(label)}"]`);
+        }
+
+        const nicknameElement = row.querySelector('c1-ease-commerce-virtual-cards-table-nickname-column');
+        const text = row.innerText || row.textContent || '';
+        // Only an explicit "ending in NNNN"; any other four digits in the row may be the year
+        const last4 = label.match(/ending in (\d{4})/i) || text.match(/ending in (\d{4})/i);
+        const created = text.match(/\b(\d{1,2}\/\d{1,2}\/\d{2,4})\b/)
+            || text.match(/\b([A-Z][a-z]{2} \d{1,2}, \d{4})\b/);
+
+        let used = null;
+        if (/never used|not used|unused|no transactions/i.test(text)) {
+            used = false;
+        } else if (/last used|used on/i.test(text)) {
+            used = true;
+        }
+
+        return {
+            nickname: (nicknameElement ? nicknameElement.textContent : '').trim(),
+            last4: last4 ? last4[1] : '',
+            created: created ? created[1] : '',
+            used: used,
+            label: label,
+            attributes: attributes,
+            manage_selector: selector,
+        };
+    });
+}"""
+
+CREATED_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%b %d, %Y")
+
+
+@dataclass
+class VirtualCard:
+    """One row of the Virtual Cards table"""
+    nickname: str = ""
+    last4: str = ""
+    created: str = ""  # As shown in the table
+    used: bool = None  # None when the table doesn't say
+    label: str = ""  # The manage button's aria-label
+    attributes: dict = field(default_factory=dict)  # data-*/id attributes of the row and manage button
+    manage_selector: str = None  # Finds this row's manage button; None if no unique selector exists
+
+    @property
+    def token(self):
+        return self.attributes.get(TOKEN_ATTRIBUTE, "")
+
+    @property
+    def key(self):
+        """Identifies the card across table re-reads: its token, else its last 4, else None"""
+        # Nicknames, dates and positional attributes are shared between cards, so they never count
+        if self.token:
+            return ("token", self.token)
+        if self.last4:
+            return ("last4", self.last4)
+        return None
+
+    @property
+    def created_date(self):
+        for date_format in CREATED_DATE_FORMATS:
+            try:
+                return datetime.strptime(self.created, date_format).date()
+            except ValueError:
+                pass
+        return None
+
+
+class CardIndex:
+    """Parsed rows of the Virtual Cards table, read in one round-trip and kept until refreshed"""
+
+    def __init__(self):
+        self.cards = []
+        self.read_at = None
+
+    async def refresh(self, page):
+        """Re-read the table"""
+        rows = await page.evaluate(READ_CARD_TABLE_JS, [MANAGE_BUTTON_SELECTOR, TOKEN_ATTRIBUTE])
+        self.cards = [VirtualCard(**row) for row in rows]
+        self.read_at = time.time()
+        return self.cards
+
+    def is_unique(self, card):
+        """Whether no other row in the table shares the card's key"""
+        return card.key is not None and sum(other.key == card.key for other in self.cards) == 1
+
+    def remove(self, card):
+        """Drop a card that has been deleted without re-reading the table"""
+        # Only that one row: other cards may share its last 4
+        if any(other is card for other in self.cards):
+            self.cards = [other for other in self.cards if other is not card]
+        elif self.is_unique(card):
+            self.cards = [other for other in self.cards if other.key != card.key]
+
+    def select(self, nickname=None, last4=None, older_than_days=None, unused=None, limit=None):
+        """Cards matching every given filter, in table order"""
+        # nickname is a case-insensitive substring and last4 a list of endings. Cards whose created
+        # date or usage the table doesn't show never match the age or unused filters.
+        today = date.today()
+        matches = []
+        for card in self.cards:
+            if nickname and nickname.lower() not in card.nickname.lower():
+                continue
+            if last4 and card.last4 not in last4:
+                continue
+            if older_than_days is not None:
+                created = card.created_date
+                if created is None or (today - created).days < older_than_days:
+                    continue
+            if unused and card.used is not False:
+                continue
+            matches.append(card)
+        return matches[:limit] if limit is not None else matches
+
+    async def locate(self, page, card):
+        """The manage button for a card, even after earlier rows were deleted and positions shifted"""
+        # Re-verified on every call: a delete can leave a label selector matching nothing or several rows
+        if card.manage_selector:
+            manage_button = page.locator(card.manage_selector)
+            if await manage_button.count() == 1:
+                return manage_button
+
+        await self.refresh(page)
+        # A key two rows share could pick the wrong card, so only a unique one is followed
+        if not self.is_unique(card):
+            return None
+        for position, current in enumerate(self.cards):
+            if current.key == card.key:
+                return page.locator(MANAGE_BUTTON_SELECTOR).nth(position)
+        return None
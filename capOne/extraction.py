@@ -0,0 +1,166 @@
+import re
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from relay.validation import luhn_ok
+
+# Reads every card field in one page.evaluate round-trip. The expiry search starts from the
+# success modal that holds the card number and only widens if the date isn't in there,
+# instead of scanning every <span> in the document.
+EXTRACT_CARD_DETAILS_JS = r"""() => {
+    const numberElement = document.querySelector('div.vcNumber._TLPRIVATE');
+    const cvvElement = document.querySelector('div._TLPRIVATE.vcCVV');
+
+    const result = { number: '', month: '', year: '', cvv: '' };
+    if (numberElement) {
+        result.number = numberElement.textContent.replace(/\s+/g, '');
+    }
+    if (cvvElement) {
+        const match = cvvElement.textContent.match(/Security\s*Code:\s*(\d+)/);
+        if (match) {
+            result.cvv = match[1];
+        }
+    }
+
+    const findExpiry = (root) => {
+        for (const span of root.querySelectorAll('span')) {
+            const match = span.textContent.match(/(\d{2})\/(\d{2})/);
+            if (match) {
+                return match;
+            }
+        }
+        return null;
+    };
+
+    let scope = numberElement
+        ? (numberElement.closest('[role="dialog"], c1-ease-dialog, .modal') || numberElement.parentElement)
+        : null;
+    let expiry = scope ? findExpiry(scope) : null;
+    while (!expiry && scope && scope.parentElement && scope !== document.body) {
+        scope = scope.parentElement;
+        expiry = findExpiry(scope);
+    }
+    if (expiry) {
+        result.month = expiry[1];
+        result.year = expiry[2];
+    }
+    return result;
+}"""
+
+# Create responses are matched by URL path while the submit is in flight: only a POST to the card
+# collection itself counts, not analytics, logging or token-refresh calls that merely mention "card"
+CREATE_RESPONSE_URL_PATTERN = re.compile(r"/(?:virtual-?cards?|cards|tokens)/?$", re.IGNORECASE)
+
+# Payload keys (lowercased, without "_" or "-") that hold each card field. The funding account's
+# number and other bare "number" fields sit in the same responses, so only card-specific keys count.
+NUMBER_KEYS = {"cardnumber", "virtualcardnumber", "pan", "tokennumber"}
+CVV_KEYS = {"cvv", "cvv2", "cvc", "securitycode"}
+EXPIRY_KEYS = {"expiry", "expiration", "expirationdate", "expdate", "expirydate"}
+EXP_MONTH_KEYS = {"expmonth", "expirationmonth", "expirymonth"}
+EXP_YEAR_KEYS = {"expyear", "expirationyear", "expiryyear"}
+
+
+@dataclass
+class CardDetails:
+    """Fields read off the "Virtual card created" modal"""
+    card_number: str = ""
+    exp_month: str = ""
+    exp_year: str = ""
+    cvv: str = ""
+
+    def is_complete(self):
+        return bool(self.card_number and self.exp_month and self.exp_year and self.cvv)
+
+    def as_line(self):
+        """Format as a cap_genned.txt line: number,MM,YY,CVV"""
+        return f"{self.card_number},{self.exp_month},{self.exp_year},{self.cvv}"
+
+
+async def extract_card_details(page):
+    """Read the new card's number, expiry and CVV from the page in a single round-trip"""
+    data = await page.evaluate(EXTRACT_CARD_DETAILS_JS)
+    return CardDetails(
+        card_number=data.get("number", ""),
+        exp_month=data.get("month", ""),
+        exp_year=data.get("year", ""),
+        cvv=data.get("cvv", ""),
+    )
+
+
+def _objects(payload):
+    """Every JSON object in a document, outermost first"""
+    if isinstance(payload, dict):
+        yield payload
+        payload = list(payload.values())
+    if isinstance(payload, list):
+        for value in payload:
+            yield from _objects(value)
+
+
+def _card_details_in(obj):
+    """The card fields held directly by one JSON object (not its children)"""
+    details = CardDetails()
+    for key, value in obj.items():
+        if isinstance(value, (dict, list)) or value is None:
+            continue
+        key = re.sub(r"[_\-]", "", str(key)).lower()
+        text = str(value).strip()
+        digits = re.sub(r"[\s-]", "", text)
+
+        if key in NUMBER_KEYS and re.fullmatch(r"\d{13,19}", digits) and luhn_ok(digits) and not details.card_number:
+            details.card_number = digits
+        elif key in CVV_KEYS and re.fullmatch(r"\d{3,4}", text) and not details.cvv:
+            details.cvv = text
+        elif key in EXPIRY_KEYS and not details.exp_month:
+            # "09/29", "09/2029" or "2029-09(-30)"
+            match = re.fullmatch(r"(\d{1,2})/(\d{2}|\d{4})", text)
+            if match:
+                details.exp_month, details.exp_year = match.group(1), match.group(2)
+            match = re.match(r"(\d{4})-(\d{2})", text)
+            if match:
+                details.exp_year, details.exp_month = match.group(1), match.group(2)
+        elif key in EXP_MONTH_KEYS and text.isdigit() and not details.exp_month:
+            details.exp_month = text
+        elif key in EXP_YEAR_KEYS and text.isdigit() and not details.exp_year:
+            details.exp_year = text
+    return details
+
+
+def _score(details):
+    # A Luhn-valid PAN matters most; CVV and expiry in the same object break ties
+    return (bool(details.card_number), bool(details.cvv) + bool(details.exp_month and details.exp_year))
+
+
+def card_details_from_payload(payload):
+    """Pick the card fields out of a create-card API response; missing fields stay empty"""
+    # Take every field from the one object whose card number sits next to its CVV and expiry,
+    # so another card or account listed elsewhere in the response can't be mixed in
+    details = CardDetails()
+    for obj in _objects(payload):
+        candidate = _card_details_in(obj)
+        if _score(candidate) > _score(details):
+            details = candidate
+
+    # Same MM/YY shape as the success modal
+    if details.exp_month:
+        details.exp_month = details.exp_month.zfill(2)
+    if details.exp_year:
+        details.exp_year = details.exp_year[-2:]
+    return details
+
+
+def is_create_response(response):
+    """Whether a response looks like the card API answering the create form's submit"""
+    request = response.request
+    return (request.method == "POST" and request.resource_type in ("xhr", "fetch")
+            and bool(CREATE_RESPONSE_URL_PATTERN.search(urlparse(response.url).path)))
+
+
+async def card_details_from_response(response):
+    """Card fields from a create-card response, or None if it failed or isn't JSON"""
+    if not response.ok:
+        return None
+    try:
+        payload = await response.json()
+    except Exception:
+        return None
+    return card_details_from_payload(payload)
@@ -0,0 +1,70 @@
+import time
+from tracing.tracer import in_span
+
+
+class Readiness:
+    """Condition-driven waits on a page, timed by the run's tracer like every other step"""
+
+    def __init__(self, page, tracer):
+        self.page = page
+        self.tracer = tracer
+
+    async def _timed(self, label, timeout, awaitable, required):
+        """Run a wait; returns (ok, result)"""
+        # A wait inside a traced step is already part of that step's time, so only a wait
+        # outside any step becomes a step of its own; timing it twice would skew the report
+        if in_span():
+            return await self._wait(label, timeout, awaitable, required)
+        with self.tracer.span(f"wait {label}") as span:
+            span.ok, result = await self._wait(label, timeout, awaitable, required)
+        return span.ok, result
+
+    async def _wait(self, label, timeout, awaitable, required):
+        start = time.perf_counter()
+        try:
+            result = await awaitable
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            if required:
+                print(f"✗ {label} not ready after {elapsed:.2f}s (timeout {timeout / 1000:.0f}s)")
+                raise
+            print(f"⚠️ {label} not ready after {elapsed:.2f}s, continuing ({type(e).__name__})")
+            return False, None
+        print(f"✓ {label} ready after {time.perf_counter() - start:.2f}s")
+        return True, result
+
+    async def visible(self, selector, label, timeout=15000, required=True):
+        """Wait for an element to be visible and return its handle"""
+        _, handle = await self._timed(
+            label, timeout,
+            self.page.wait_for_selector(selector, state="visible", timeout=timeout),
+            required
+        )
+        return handle
+
+    async def gone(self, selector, label, timeout=15000, required=True):
+        """Wait for an element to be hidden or detached (e.g. a modal closing)"""
+        ok, _ = await self._timed(
+            label, timeout,
+            self.page.wait_for_selector(selector, state="hidden", timeout=timeout),
+            required
+        )
+        return ok
+
+    async def condition(self, expression, label, timeout=15000, arg=None, required=True):
+        """Wait for a JavaScript predicate to return something truthy"""
+        _, result = await self._timed(
+            label, timeout,
+            self.page.wait_for_function(expression, arg=arg, timeout=timeout),
+            required
+        )
+        return result
+
+    async def url(self, predicate, label, timeout=30000, required=True):
+        """Wait for the page to navigate to a URL matching the predicate"""
+        ok, _ = await self._timed(
+            label, timeout,
+            self.page.wait_for_url(predicate, timeout=timeout),
+            required
+        )
+        return ok
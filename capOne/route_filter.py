@@ -0,0 +1,100 @@
+from collections import Counter
+from fnmatch import fnmatch
+from urllib.parse import urlsplit
+
+# Nothing the automation reads or clicks depends on these
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Analytics, tag managers and session recorders loaded by the bank pages
+BLOCKED_HOSTS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googleadservices.com",
+    "adobedtm.com",
+    "omtrdc.net",
+    "demdex.net",
+    "everesttech.net",
+    "tiqcdn.com",
+    "tealiumiq.com",
+    "quantummetric.com",
+    "hotjar.com",
+    "nr-data.net",
+    "newrelic.com",
+    "facebook.net",
+    "facebook.com",
+    "bing.com",
+    "clarity.ms",
+    "optimizely.com",
+    "branch.io",
+]
+
+# Rough transfer sizes used to estimate what blocked requests would have cost, since an
+# aborted request never reports its real size
+ESTIMATED_BYTES = {"image": 25_000, "media": 250_000, "font": 40_000, "script": 60_000}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+class RouteFilter:
+    """Aborts requests for non-essential resource types and tracking hosts on every context it is installed on"""
+
+    def __init__(self, blocked_types=None, blocked_hosts=None, allow=()):
+        self.blocked_types = set(BLOCKED_RESOURCE_TYPES if blocked_types is None else blocked_types)
+        self.blocked_hosts = list(BLOCKED_HOSTS if blocked_hosts is None else blocked_hosts)
+        self.allow = list(allow)  # Host or URL glob patterns that are never blocked
+        self.requests_allowed = 0
+        self.bytes_loaded = 0
+        self.blocked_by_type = Counter()
+        self.blocked_by_host = Counter()
+        self.estimated_bytes_saved = 0
+
+    def _host_blocked(self, host):
+        return any(host == blocked or host.endswith("." + blocked) for blocked in self.blocked_hosts)
+
+    def is_allowed(self, url, resource_type):
+        """Whether a request should go through"""
+        host = urlsplit(url).hostname or ""
+        if any(fnmatch(host, pattern) or fnmatch(url, pattern) for pattern in self.allow):
+            return True
+        return resource_type not in self.blocked_types and not self._host_blocked(host)
+
+    async def install(self, context):
+        """Route every request of a browser context through the filter"""
+        await context.route("**/*", self._route)
+        context.on("response", self._on_response)
+
+    async def _route(self, route):
+        request = route.request
+        if self.is_allowed(request.url, request.resource_type):
+            self.requests_allowed += 1
+            await route.continue_()
+            return
+
+        host = urlsplit(request.url).hostname or ""
+        self.blocked_by_type[request.resource_type] += 1
+        if self._host_blocked(host):
+            self.blocked_by_host[host] += 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+        await route.abort("blockedbyclient")
+
+    def _on_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_loaded += int(length)
+
+    @property
+    def requests_blocked(self):
+        return sum(self.blocked_by_type.values())
+
+    def print_summary(self):
+        """Print how much traffic the filter kept off the wire this run"""
+        if not self.requests_allowed and not self.requests_blocked:
+            return
+        print(f"\nRequest filter: blocked {self.requests_blocked} of "
+              f"{self.requests_allowed + self.requests_blocked} requests "
+              f"(~{self.estimated_bytes_saved / 1_000_000:.1f} MB saved, "
+              f"{self.bytes_loaded / 1_000_000:.1f} MB loaded)")
+        if self.blocked_by_type:
+            print("  By type: " + ", ".join(f"{name} {count}" for name, count in self.blocked_by_type.most_common()))
+        if self.blocked_by_host:
+            print("  By host: " + ", ".join(f"{name} {count}" for name, count in self.blocked_by_host.most_common(5)))
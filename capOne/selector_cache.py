@@ -0,0 +1,80 @@
+import json
+import os
+
+
+class SelectorCache:
+    """Winning selector for each step plus hit/miss counts and latencies, kept on disk between runs"""
+
+    def __init__(self, path=None):
+        # Keep the cache next to this module unless told otherwise
+        if path is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_cache.json")
+        self.path = path
+        self.steps = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Selector cache {self.path} is unreadable ({e}), starting a new one")
+            return {}
+
+    def _selector_stats(self, step, selector):
+        entry = self.steps.setdefault(step, {"winner": None, "selectors": {}})
+        return entry["selectors"].setdefault(selector, {"wins": 0, "hits": 0, "misses": 0, "total_seconds": 0.0})
+
+    def winner(self, step, candidates):
+        """The selector that worked last time, if it is still one of the step's candidates"""
+        winner = self.steps.get(step, {}).get("winner")
+        return winner if winner in candidates else None
+
+    def record_win(self, step, selector, seconds, cached=False):
+        """Remember the selector that resolved the step; cached=True counts it as a cache hit"""
+        stats = self._selector_stats(step, selector)
+        stats["wins"] += 1
+        stats["total_seconds"] += seconds
+        if cached:
+            stats["hits"] += 1
+        self.steps[step]["winner"] = selector
+
+    def record_miss(self, step, selector):
+        """The cached selector didn't show up: drop it so the full fallback race runs"""
+        self._selector_stats(step, selector)["misses"] += 1
+        self.steps[step]["winner"] = None
+        print(f"Cached selector for {step} missed ({selector}), racing every candidate")
+
+    def save(self):
+        # Write to a temp file and rename so a crash never leaves a half written cache
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.steps, f, indent=2)
+        os.replace(self.path + ".tmp", self.path)
+
+    def summary(self):
+        """One row per step with its cached winner, hit rate and average resolve time"""
+        rows = []
+        for step, entry in self.steps.items():
+            selectors = entry["selectors"].values()
+            hits = sum(stats["hits"] for stats in selectors)
+            misses = sum(stats["misses"] for stats in selectors)
+            wins = sum(stats["wins"] for stats in selectors)
+            rows.append({
+                "step": step,
+                "winner": entry["winner"],
+                "hit_rate": round(hits / (hits + misses), 2) if hits + misses else None,
+                "avg_ms": round(sum(stats["total_seconds"] for stats in selectors) / wins * 1000) if wins else None,
+            })
+        return rows
+
+    def print_summary(self):
+        rows = self.summary()
+        if not rows:
+            return
+        print("\nSelector cache:")
+        for row in rows:
+            hit_rate = f"{row['hit_rate']:.0%}" if row["hit_rate"] is not None else "n/a"
+            print(f"  {row['step']}: {row['winner'] or '(none)'} (hit rate {hit_rate}, avg {row['avg_ms']}ms)")
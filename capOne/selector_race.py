@@ -0,0 +1,88 @@
+import asyncio
+import time
+from capOne.selector_cache import SelectorCache
+from tracing.tracer import note_retry, note_winner
+
+CACHED_HEAD_START = 1000  # ms the cached winner is waited on alone before the other candidates join
+
+
+class SelectorRace:
+    """Resolves a step's fallback selectors by waiting on all of them at once instead of one after another"""
+
+    def __init__(self, cache=None):
+        self.cache = cache or SelectorCache()  # Winning selector per step, shared with later runs
+
+    async def _race(self, page, step, candidates, timeout):
+        """Return (handle, selector) for the first visible candidate, or (None, None) on timeout"""
+        start = time.perf_counter()
+        tasks = {}
+
+        def watch(selector, wait_ms):
+            tasks[asyncio.ensure_future(page.wait_for_selector(selector, state="visible", timeout=wait_ms))] = selector
+
+        # Give the selector that worked last time a head start; if it hasn't shown up by then the rest
+        # join the race for what is left of the timeout instead of starting a second full one
+        cached = self.cache.winner(step, candidates)
+        if cached:
+            watch(cached, timeout)
+            await asyncio.wait(set(tasks), timeout=min(CACHED_HEAD_START, timeout) / 1000)
+        remaining = max(0, timeout - (time.perf_counter() - start) * 1000)
+        for selector in candidates:
+            if selector != cached:
+                watch(selector, remaining)
+
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # When several finish together, prefer the cached one, then the one earlier in the list
+                for task in sorted(done, key=lambda task: (tasks[task] != cached, candidates.index(tasks[task]))):
+                    if task.exception() is None and task.result() is not None:
+                        selector = tasks[task]
+                        if cached and selector != cached:
+                            self.cache.record_miss(step, cached)
+                            note_retry()
+                        self.cache.record_win(step, selector, time.perf_counter() - start, cached=selector == cached)
+                        return task.result(), selector
+            if cached:
+                self.cache.record_miss(step, cached)
+            return None, None
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def wait(self, page, step, candidates, timeout=10000, js_fallback=None):
+        """Wait for any candidate to be visible; falls back to a JavaScript check. Returns True if found"""
+        handle, selector = await self._race(page, step, candidates, timeout)
+        if handle is not None:
+            note_winner(selector)
+            return True
+
+        note_retry(len(candidates))
+        if js_fallback and await page.evaluate(js_fallback):
+            note_winner("javascript")
+            return True
+        return False
+
+    async def click(self, page, step, candidates, timeout=10000, js_fallback=None):
+        """Click whichever candidate shows up first; falls back to a JavaScript click. Returns True on success"""
+        handle, selector = await self._race(page, step, candidates, timeout)
+        if handle is not None:
+            try:
+                await handle.click()
+                note_winner(selector)
+                print(f"✅ Clicked {step} ({selector})")
+                return True
+            except Exception as click_error:
+                print(f"Clicking {step} ({selector}) failed: {click_error}")
+                self.cache.record_miss(step, selector)
+
+        note_retry(len(candidates))
+        if js_fallback and await page.evaluate(js_fallback):
+            note_winner("javascript")
+            print(f"Clicked {step} using JavaScript")
+            return True
+
+        print(f"Could not find {step}")
+        return False
@@ -0,0 +1,57 @@
+import json
+import os
+import time
+
+
+class SessionStore:
+    """Persist a signed-in Playwright storage state for each Capital One profile"""
+
+    def __init__(self, directory=None, max_age_hours=12):
+        # Keep the saved sessions next to this module unless told otherwise
+        if directory is None:
+            directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions")
+        self.directory = directory
+        self.max_age_hours = max_age_hours
+
+    def path_for(self, profile):
+        """Return the storage state file used by a profile"""
+        return os.path.join(self.directory, f"profile_{profile}.json")
+
+    def load(self, profile):
+        """Return the saved storage state path for a profile, or None if there is no usable one"""
+        path = self.path_for(profile)
+        if not os.path.exists(path):
+            return None
+
+        # Anything older than max_age_hours is almost certainly signed out already
+        age_hours = (time.time() - os.path.getmtime(path)) / 3600
+        if self.max_age_hours is not None and age_hours > self.max_age_hours:
+            print(f"Saved session for profile {profile} is {age_hours:.1f}h old, ignoring it")
+            self.invalidate(profile)
+            return None
+
+        try:
+            with open(path, "r") as f:
+                json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Saved session for profile {profile} is unreadable ({e}), ignoring it")
+            self.invalidate(profile)
+            return None
+
+        return path
+
+    async def save(self, context, profile):
+        """Write the context's cookies and local storage to disk"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(profile)
+        await context.storage_state(path=path)
+        print(f"Saved browser session for profile {profile} to {path}")
+        return path
+
+    def invalidate(self, profile):
+        """Remove a profile's saved session so the next run signs in from scratch"""
+        path = self.path_for(profile)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
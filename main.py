@@ -1,5 +1,13 @@
+import argparse
 import asyncio
+import json
 from capOne.capOne import CapitalOneAutomation
+from capOne.batch import load_profiles, run_profiles
+from capOne.browser_pool import BrowserPool
+from capOne.route_filter import RouteFilter
+from capOne.selector_cache import SelectorCache
+from storage.card_store import bank_output_path, open_card_store
+from tracing.tracer import Tracer
 from dotenv import load_dotenv
 import os
 
@@ -14,6 +22,10 @@ async def main():
     cap_one_password_2 = os.getenv('CAPITAL_ONE_PASSWORD_2')
     relay_username = os.getenv('RELAY_USERNAME')
     relay_password = os.getenv('RELAY_PASSWORD')
+    # Reuse the saved signed-in browser session between runs (opt-in)
+    persist_session = os.getenv('CAPITAL_ONE_PERSIST_SESSION', '').lower() in ('1', 'true', 'yes')
+    # How many profiles may run at the same time in "all profiles" mode (default: all of them)
+    max_concurrency = int(os.getenv('CAPITAL_ONE_MAX_CONCURRENCY', '0')) or None
     
     # Ask user to choose a bank
     while True:
@@ -29,7 +41,8 @@ async def main():
                 print("\nWhich Capital One profile would you like to use?")
                 print("1. Profile 1")
                 print("2. Profile 2")
-                profile_choice = input("Enter your choice (1 or 2): ")
+                print("3. All configured profiles (run in parallel)")
+                profile_choice = input("Enter your choice (1, 2 or 3): ")
                 
                 if profile_choice == '1':
                     if not cap_one_username or not cap_one_password:
@@ -47,8 +60,15 @@ async def main():
                     active_username = cap_one_username_2
                     active_password = cap_one_password_2
                     break
+                elif profile_choice == '3':
+                    profiles = load_profiles()
+                    if not profiles:
+                        print("Error: No Capital One credentials found in .env file")
+                        return
+                    print(f"Found {len(profiles)} profiles: {', '.join(profile for profile, _, _ in profiles)}")
+                    break
                 else:
-                    print("Invalid choice. Please enter 1 for Profile 1 or 2 for Profile 2.")
+                    print("Invalid choice. Please enter 1 for Profile 1, 2 for Profile 2 or 3 for all profiles.")
             
             # Add new selection for create or delete cards
             print("\nWhat would you like to do?")
@@ -69,6 +89,11 @@ async def main():
                     except ValueError:
                         print("Please enter a valid number.")
                 
+                if profile_choice == '3':
+                    await run_profiles(profiles, 'create', num_cards, max_concurrency=max_concurrency,
+                                       headless=False, persist_session=persist_session)
+                    break
+                
                 print(f"Starting automation to generate {num_cards} Capital One virtual cards...")
                 
                 # Create instance of CapitalOneAutomation
@@ -76,7 +101,9 @@ async def main():
                     username=active_username,
                     password=active_password,
                     headless=False,  # Set to True to run in headless mode
-                    num_cards=num_cards
+                    num_cards=num_cards,
+                    profile=profile_choice,
+                    persist_session=persist_session
                 )
                 
                 # Run the automation
@@ -99,7 +126,7 @@ async def main():
                 
                 # Card selection only for Profile 1
                 card_choice = None
-                if profile_choice == '1':
+                if profile_choice in ('1', '3'):
                     # Ask user which card they want to use for Profile 1
                     print("\nWhich card would you like to use?")
                     print("1. Card ending in 8060 (Savor)")
@@ -112,6 +139,11 @@ async def main():
                         else:
                             print("Invalid choice. Please enter 1 for 8060 or 2 for 2653.")
                     
+                    if profile_choice == '3':
+                        await run_profiles(profiles, 'delete', num_cards, max_concurrency=max_concurrency,
+                                           headless=False, persist_session=persist_session, card_choice=card_choice)
+                        break
+                    
                     print(f"Starting automation to delete {num_cards} Capital One virtual cards from card ending in {card_choice=='1' and '8060' or '2653'}...")
                 else:
                     # Profile 2 doesn't need card selection
@@ -124,7 +156,8 @@ async def main():
                     headless=False,
                     num_cards=num_cards,
                     card_choice=card_choice,  # This will be None for Profile 2
-                    profile=profile_choice  # Pass the profile choice to the class
+                    profile=profile_choice,  # Pass the profile choice to the class
+                    persist_session=persist_session
                 )
                 
                 # Run the automation for card deletion
@@ -218,5 +251,234 @@ async def main():
         else:
             print("Invalid choice. Please enter 1 for Capital One or 2 for Relay.")
 
+def parse_args(argv=None):
+    """Command line options for unattended runs; with none of them main.py stays interactive"""
+    parser = argparse.ArgumentParser(description="Generate or delete virtual cards without prompts")
+    parser.add_argument("--bank", choices=["capone", "relay"], default="capone",
+                        help="Which bank to automate (default: capone)")
+    parser.add_argument("--relay-engine", choices=["screen", "web"], default="screen",
+                        help="Relay engine: replay recorded screen clicks and OCR, or drive the page's DOM (default: screen)")
+    parser.add_argument("--relay-debug", action="store_true",
+                        help="Write Relay screenshots, crops and OCR masks to disk (same as RELAY_DEBUG_ARTIFACTS=1)")
+    parser.add_argument("--ocr-workers", type=int, metavar="N",
+                        help="Processes recognising Relay card screenshots while the next card is created (0 = in-process)")
+    parser.add_argument("--profile", default="1",
+                        help="Capital One profile number, or 'all' for every configured profile (default: 1)")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--create", type=int, metavar="N", help="Create N virtual cards")
+    action.add_argument("--delete", type=int, metavar="N", help="Delete N virtual cards")
+    parser.add_argument("--card-choice", choices=["1", "2"],
+                        help="Profile 1 card to delete from: 1 = 8060 (Savor), 2 = 2653 (Platinum)")
+    parser.add_argument("--headless", action="store_true", help="Run the browser headless")
+    parser.add_argument("--production", action="store_true",
+                        help="No physical display needed: Capital One runs headless and Relay runs in its own Xvfb display")
+    parser.add_argument("--display-size", default="1400x900", metavar="WxH",
+                        help="Geometry of the Relay virtual display with --production (default: 1400x900)")
+    parser.add_argument("--persist-session", action="store_true",
+                        help="Reuse the saved signed-in session (same as CAPITAL_ONE_PERSIST_SESSION=true)")
+    parser.add_argument("--concurrency", type=int, help="Max profiles running at once with --profile all")
+    parser.add_argument("--bulk-delete", action="store_true",
+                        help="Delete the first card through the UI, then replay its delete request for the rest")
+    parser.add_argument("--delete-concurrency", type=int, default=4, metavar="N",
+                        help="Replayed deletes in flight at once with --bulk-delete (default: 4)")
+    parser.add_argument("--nickname", help="Only delete cards whose nickname contains this text")
+    parser.add_argument("--last4", type=lambda value: value.split(","), metavar="1234[,5678]",
+                        help="Only delete cards ending in these digits")
+    parser.add_argument("--older-than", type=int, metavar="DAYS", help="Only delete cards created at least DAYS ago")
+    parser.add_argument("--unused", action="store_true", help="Only delete cards the table shows as never used")
+    parser.add_argument("--no-route-filter", action="store_true",
+                        help="Load every resource instead of blocking images, fonts, media and analytics hosts")
+    parser.add_argument("--allow-host", action="append", default=[], metavar="PATTERN",
+                        help="Host or URL glob that is never blocked (repeatable), e.g. '*.capitalone.com'")
+    parser.add_argument("--output", choices=["text", "jsonl", "sqlite"], default="text",
+                        help="Where generated cards go: the classic *_genned.txt files, JSON lines, or SQLite (default: text)")
+    parser.add_argument("--output-path", metavar="FILE",
+                        help="Override the output file for --output; with several banks each gets FILE with a _<bank> suffix")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignore checkpoints from an interrupted run and start the job over")
+    parser.add_argument("--jobs", metavar="FILE",
+                        help="JSON file with a list of jobs to run back to back in one process")
+    parser.add_argument("--trace-report", metavar="FILE",
+                        help="Write per-step timings (p50/p95, retries, winning selectors) to FILE; .csv for CSV, otherwise JSON")
+    args = parser.parse_args(argv)
+    
+    for count in (args.create, args.delete):
+        if count is not None and count <= 0:
+            parser.error("the number of cards must be a positive number")
+    return args
+
+
+def load_jobs(path):
+    """Read a job file: a JSON list of {"bank", "profile", "action", "count", "card_choice", "bulk", "filter"} objects"""
+    with open(path, "r") as f:
+        jobs = json.load(f)
+    
+    if not isinstance(jobs, list):
+        raise ValueError(f"{path} must contain a JSON list of jobs")
+    
+    for i, job in enumerate(jobs):
+        if job.get("action") not in ("create", "delete"):
+            raise ValueError(f"Job {i+1} in {path}: action must be 'create' or 'delete'")
+        if int(job.get("count", 0)) <= 0:
+            raise ValueError(f"Job {i+1} in {path}: count must be a positive number")
+    return jobs
+
+
+def job_from_args(args):
+    """Turn --create/--delete style options into a single job"""
+    return {
+        "bank": args.bank,
+        "engine": args.relay_engine,
+        "profile": args.profile,
+        "action": "create" if args.create is not None else "delete",
+        "count": args.create if args.create is not None else args.delete,
+        "card_choice": args.card_choice,
+        "bulk": args.bulk_delete,
+        "filter": card_filter_from_args(args),
+    }
+
+
+def card_filter_from_args(args):
+    """The delete filters given on the command line, in CardIndex.select() terms"""
+    card_filter = {
+        "nickname": args.nickname,
+        "last4": args.last4,
+        "older_than_days": args.older_than,
+        "unused": args.unused or None,
+    }
+    return {name: value for name, value in card_filter.items() if value is not None}
+
+
+async def run_job(job, pool, stores, headless, persist_session, max_concurrency, resume=True, tracer=None,
+                  selector_cache=None, delete_concurrency=4, virtual_display=None):
+    """Run one job; Capital One jobs borrow contexts from the shared browser pool"""
+    bank = job.get("bank", "capone")
+    action = job["action"]
+    count = int(job["count"])
+    
+    if bank == "relay" and job.get("engine") == "web":
+        # The DOM engine borrows a context from the shared browser like Capital One does
+        from relay.relay_web import RelayWebAutomation
+        
+        automation = RelayWebAutomation(
+            username=os.getenv('RELAY_USERNAME'),
+            password=os.getenv('RELAY_PASSWORD'),
+            headless=headless,
+            num_cards=count,
+            store=stores("relay"),
+            resume=resume,
+            tracer=tracer,
+            pool=pool,
+            selector_cache=selector_cache
+        )
+    elif bank == "relay":
+        # Relay replays recorded screen clicks, so it needs a desktop: the visible one, or in production
+        # a virtual display. pyautogui binds to DISPLAY when it is imported, so start the display first.
+        if virtual_display is not None:
+            virtual_display.start()
+        from relay.relay import RelayAutomation
+        
+        automation = RelayAutomation(
+            username=os.getenv('RELAY_USERNAME'),
+            password=os.getenv('RELAY_PASSWORD'),
+            headless=headless,
+            num_cards=count,
+            store=stores("relay"),
+            resume=resume,
+            tracer=tracer,
+            debug=job.get("debug", False),
+            ocr_workers=job.get("ocr_workers"),
+            unattended=headless or virtual_display is not None
+        )
+    
+    if bank == "relay":
+        if action == "create":
+            await automation.login()
+        else:
+            await automation.delete_cards()
+        return
+    
+    profiles = load_profiles()
+    profile = str(job.get("profile", "1"))
+    if profile != "all":
+        profiles = [entry for entry in profiles if entry[0] == profile]
+        if not profiles:
+            print(f"Error: Missing Capital One profile {profile} credentials in .env file")
+            return
+    
+    card_choice = job.get("card_choice")
+    await run_profiles(profiles, action, count, max_concurrency=max_concurrency, headless=headless,
+                       persist_session=persist_session, card_choice=str(card_choice) if card_choice else None,
+                       pool=pool, store=stores("capone") if action == "create" else None, resume=resume,
+                       tracer=tracer, selector_cache=selector_cache, bulk_delete=bool(job.get("bulk")),
+                       delete_concurrency=delete_concurrency, card_filter=job.get("filter"))
+
+
+async def run_cli(args):
+    """Run the jobs given on the command line or in a job file, sharing one browser startup"""
+    jobs = load_jobs(args.jobs) if args.jobs else [job_from_args(args)]
+    for job in jobs:
+        job.setdefault("engine", args.relay_engine)
+        job.setdefault("debug", args.relay_debug)
+        job.setdefault("ocr_workers", args.ocr_workers)
+        job.setdefault("bulk", args.bulk_delete)
+        job.setdefault("filter", card_filter_from_args(args))
+    persist_session = args.persist_session or os.getenv('CAPITAL_ONE_PERSIST_SESSION', '').lower() in ('1', 'true', 'yes')
+    max_concurrency = args.concurrency or int(os.getenv('CAPITAL_ONE_MAX_CONCURRENCY', '0')) or None
+    
+    # The browser only starts when the first Capital One job asks for a context
+    headless = args.headless or args.production
+    route_filter = None if args.no_route_filter else RouteFilter(allow=args.allow_host)
+    pool = BrowserPool(headless=headless, route_filter=route_filter)
+    
+    # ...and the virtual display only when the first Relay job needs one
+    virtual_display = None
+    if args.production:
+        from relay.virtual_display import VirtualDisplay
+        width, height = (int(size) for size in args.display_size.lower().split("x"))
+        virtual_display = VirtualDisplay(width=width, height=height)
+    
+    # Every job's steps go into one timing report, and every job learns from the same selector cache
+    tracer = Tracer()
+    selector_cache = SelectorCache()
+    
+    # One output store per bank, shared by every job in this run. Banks never share a file: the text
+    # formats differ per bank, and two writers on one file would interleave and miss each other's duplicates.
+    banks = {job.get("bank", "capone") for job in jobs}
+    open_stores = {}
+    def stores(bank):
+        if bank not in open_stores:
+            path = args.output_path
+            if path and len(banks) > 1:
+                path = bank_output_path(path, bank)
+                print(f"Writing {bank} cards to {path}")
+            open_stores[bank] = open_card_store(bank, args.output, path)
+        return open_stores[bank]
+    
+    try:
+        for i, job in enumerate(jobs):
+            print(f"\n=== Job {i+1} of {len(jobs)}: {job.get('bank', 'capone')} {job['action']} "
+                  f"{job['count']} (profile {job.get('profile', '1')}) ===")
+            await run_job(job, pool, stores, headless, persist_session, max_concurrency,
+                          resume=not args.fresh, tracer=tracer, selector_cache=selector_cache,
+                          delete_concurrency=args.delete_concurrency, virtual_display=virtual_display)
+    finally:
+        await pool.close()
+        if virtual_display is not None:
+            virtual_display.stop()
+        for store in open_stores.values():
+            store.close()
+        selector_cache.save()
+        selector_cache.print_summary()
+        if route_filter:
+            route_filter.print_summary()
+        tracer.print_summary()
+        if args.trace_report:
+            tracer.write_report(args.trace_report)
+
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.jobs or args.create is not None or args.delete is not None:
+        asyncio.run(run_cli(args))
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import cv2
+import numpy as np
+import pyautogui
+
+try:
+    import mss  # Shared-memory screen grabs; pyautogui.screenshot() is the fallback
+except ImportError:
+    mss = None
+
+ROI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "card_roi.json")
+
+_grabbers = threading.local()  # mss handles can't be shared between threads
+
+# Intermediate images (crops, masks, thresholded frames) are only written to disk when this is on
+DEBUG = os.getenv("RELAY_DEBUG_ARTIFACTS", "").lower() in ("1", "true", "yes")
+
+
+def set_debug(enabled):
+    """Turn writing debug artifacts on or off for the whole process"""
+    global DEBUG
+    DEBUG = bool(enabled)
+
+
+def grab_screen(region=None):
+    """The screen, or just region (left, top, width, height), as a BGR array without a PNG round-trip"""
+    if mss is not None:
+        if not hasattr(_grabbers, "mss"):
+            _grabbers.mss = mss.mss()
+        left, top, width, height = region or (0, 0) + tuple(pyautogui.size())
+        shot = _grabbers.mss.grab({"left": left, "top": top, "width": width, "height": height})
+        return np.ascontiguousarray(np.asarray(shot)[:, :, :3])  # BGRA -> BGR
+    return cv2.cvtColor(np.array(pyautogui.screenshot(region=region)), cv2.COLOR_RGB2BGR)
+
+
+def to_frame(image=None):
+    """A BGR array from a frame, an image path, or (when None) a fresh screen grab"""
+    if image is None:
+        return grab_screen()
+    if isinstance(image, np.ndarray):
+        return image
+    frame = cv2.imread(image)
+    if frame is None:
+        raise FileNotFoundError(f"Could not read image {image}")
+    return frame
+
+
+def save_frame(name, frame, directory=None):
+    """Write a frame to directory/name whether or not debug artifacts are on; returns the path"""
+    directory = directory or os.getcwd()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    cv2.imwrite(path, frame)
+    return path
+
+
+def save_debug(name, frame, directory=None):
+    """Write a frame to directory/name when debug artifacts are on; returns the path or None"""
+    if not DEBUG:
+        return None
+    path = save_frame(name, frame, directory)
+    print(f"Saved debug image {path}")
+    return path
+
+
+class CardRegion:
+    """Where on screen the card showed up last, so later captures grab only that area instead of the whole screen"""
+
+    def __init__(self, path=ROI_PATH, margin=40):
+        self.path = path
+        self.margin = margin  # Slack around the card in case the dialog shifts a little
+        self.region = None  # (left, top, width, height), or None to capture the full screen
+        self._load()
+
+    def _load(self):
+        # Only trusted for the screen size it was found on
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if saved.get("screen") == list(pyautogui.size()):
+            self.region = tuple(saved["region"])
+            print(f"Using cached card region {self.region}")
+
+    def capture(self):
+        """Grab the cached region (or the full screen); returns (frame, region) where region None means full screen"""
+        region = self.region
+        return grab_screen(region), region
+
+    def learn(self, region, box, frame_size):
+        """Remember where a card was found; box is (x, y, w, h) in pixels of the frame (frame_size) captured for region"""
+        screen_width, screen_height = pyautogui.size()
+        origin_x, origin_y, area_width, area_height = region or (0, 0, screen_width, screen_height)
+        # The region and grab() are in screen points, but a Retina/HiDPI capture has 2 pixels per point
+        scale_x = frame_size[0] / area_width
+        scale_y = frame_size[1] / area_height
+        x, y, w, h = box
+        x, y, w, h = int(x / scale_x), int(y / scale_y), int(w / scale_x + 0.5), int(h / scale_y + 0.5)
+        left = min(max(0, origin_x + x - self.margin), screen_width - 1)
+        top = min(max(0, origin_y + y - self.margin), screen_height - 1)
+        width = max(1, min(screen_width - left, w + 2 * self.margin))
+        height = max(1, min(screen_height - top, h + 2 * self.margin))
+        self.region = (left, top, width, height)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"screen": [screen_width, screen_height], "region": list(self.region)}, f)
+        os.replace(tmp_path, self.path)
+        print(f"Cached card region {self.region}")
+
+    def forget(self):
+        """Go back to full-screen captures, e.g. after the card wasn't readable in the cached region"""
+        if self.region is None:
+            return
+        print("Card not readable in the cached region, capturing the full screen next time")
+        self.region = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,112 @@
+import threading
+import cv2
+import pytesseract
+from PIL import Image
+from relay.ocr_text import parse_field
+from relay.validation import field_ok
+
+try:
+    import tesserocr  # The default: keeps one Tesseract instance in-process instead of spawning tesseract per call
+except ImportError:
+    tesserocr = None
+
+# Where each field sits on the cropped card, as (left, top, right, bottom) fractions of its size
+FIELD_REGIONS = {
+    "number": (0.04, 0.38, 0.96, 0.62),
+    "expiry": (0.04, 0.60, 0.60, 0.90),
+    "cvv": (0.35, 0.60, 0.96, 0.90),
+}
+
+FIELD_WHITELISTS = {
+    "number": "0123456789",
+    "expiry": "0123456789/",
+    "cvv": "0123456789",
+}
+
+# Tried in order for a field until its reading validates; later ones only run for fields that failed
+PREPROCESSING = ("gray", "binary", "otsu", "scaled")
+
+_engines = threading.local()  # A Tesseract instance is not safe to share between threads
+
+
+class TesserocrEngine:
+    """A long-lived Tesseract instance reading one line of text at a time (PSM 7)"""
+
+    max_variants = len(PREPROCESSING)  # Reads are in-process, so every preprocessing can be tried
+
+    def __init__(self):
+        self.api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_LINE)
+
+    def read_line(self, image, whitelist=""):
+        self.api.SetVariable("tessedit_char_whitelist", whitelist)
+        self.api.SetImage(Image.fromarray(image))
+        return self.api.GetUTF8Text().strip()
+
+
+class PytesseractEngine:
+    """The same line reads through pytesseract, which starts a tesseract process per call"""
+
+    max_variants = 2  # Each read is a new process, so a failing field only gets one retry
+
+    def read_line(self, image, whitelist=""):
+        config = "--psm 7"
+        if whitelist:
+            config += f" -c tessedit_char_whitelist={whitelist}"
+        return pytesseract.image_to_string(image, config=config).strip()
+
+
+def get_engine():
+    """This thread's OCR engine, created on first use"""
+    if not hasattr(_engines, "engine"):
+        if tesserocr is None:
+            print("tesserocr is not installed, OCR falls back to one tesseract process per read")
+        _engines.engine = TesserocrEngine() if tesserocr is not None else PytesseractEngine()
+    return _engines.engine
+
+
+def preprocess(card_only, variant="gray"):
+    """One of the PREPROCESSING versions of the card for OCR"""
+    # Increase contrast and sharpness first
+    gray = cv2.cvtColor(cv2.convertScaleAbs(card_only, alpha=1.5, beta=0), cv2.COLOR_BGR2GRAY)
+    if variant == "binary":
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    if variant == "otsu":
+        return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+    if variant == "scaled":
+        # Small glyphs read better at twice the size
+        return cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    return gray
+
+
+def crop_field(image, field):
+    height, width = image.shape[:2]
+    left, top, right, bottom = FIELD_REGIONS[field]
+    return image[int(height * top):int(height * bottom), int(width * left):int(width * right)]
+
+
+def read_field(image, field, engine=None):
+    """OCR one field's sub-region of a preprocessed card image"""
+    engine = engine or get_engine()
+    text = engine.read_line(crop_field(image, field), FIELD_WHITELISTS[field])
+    return parse_field(field, text)
+
+
+def read_card_fields(card_only, engine=None):
+    """Number, expiry and CVV read from their own sub-regions, re-reading only the fields that fail validation"""
+    engine = engine or get_engine()
+    variants = PREPROCESSING[:engine.max_variants]
+    images = {}
+    fields = {}
+    for field in FIELD_REGIONS:
+        for variant in variants:
+            if variant not in images:
+                images[variant] = preprocess(card_only, variant)
+            value = read_field(images[variant], field, engine)
+            # Keep the first reading as a best guess, replace it with the first one that validates
+            if field_ok(field, value):
+                fields[field] = value
+                break
+            fields.setdefault(field, value)
+            if variant != variants[-1]:
+                print(f"{field} read as {value or 'nothing'!r} doesn't validate, retrying with the next preprocessing")
+    return fields
@@ -0,0 +1,27 @@
+import re
+
+# Letters Tesseract commonly returns for digits. Only fixed inside a run that already holds a real digit,
+# so words on the card like "VALID THRU" are left alone. Some Tesseract builds ignore the digit whitelist.
+DIGIT_FIXES = str.maketrans({"O": "0", "o": "0", "Q": "0", "D": "0", "l": "1", "I": "1", "i": "1", "|": "1"})
+_CONFUSABLE_RUN = re.compile(r"[\dOoQDlIi|]+")
+
+
+def fix_digits(text):
+    """OCR text with letter-for-digit confusions inside numbers corrected"""
+    return _CONFUSABLE_RUN.sub(
+        lambda match: match.group(0).translate(DIGIT_FIXES) if re.search(r"\d", match.group(0)) else match.group(0),
+        text)
+
+
+def parse_field(field, text):
+    """The field's value in a line of OCR text, or "" if it isn't there"""
+    text = fix_digits(text)
+    if field == "number":
+        digits = re.sub(r"\D", "", text)
+        return digits if 13 <= len(digits) <= 19 else ""
+    if field == "expiry":
+        match = re.search(r"(\d{2})/(\d{2})", text)
+        return f"{match.group(1)}/{match.group(2)}" if match else ""
+    # The CVV region can overlap the expiry, so drop anything shaped like MM/YY first
+    match = re.search(r"(?<!\d)(\d{3})(?!\d)", re.sub(r"\d{2}/\d{2}", " ", text))
+    return match.group(1) if match else ""
@@ -1,6 +1,8 @@
 import asyncio
+import functools
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pyautogui
 import cv2
 import numpy as np
@@ -11,13 +13,33 @@ import json
 import random
 import string
 import re  # Add import at the module level
+from relay import frames, ocr
+from relay.validation import failed_fields, field_ok
+from storage.card_store import CardRecord, open_card_store
+from storage.journal import JobJournal
+from tracing.tracer import Tracer
+
+# Frames of cards that couldn't be read, kept so they can be typed in from the image
+FAILED_FRAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "failed_cards")
 
 class RelayAutomation:
-    def __init__(self, username, password, headless=False, num_cards=1):
+    def __init__(self, username, password, headless=False, num_cards=1, store=None, journal=None, resume=True, tracer=None,
+                 debug=False, ocr_workers=None, unattended=None):
         self.username = username
         self.password = password
         self.headless = headless
+        # Headless or on a virtual display nobody is watching: no frame guide, double-click gate or action prompts
+        self.unattended = headless if unattended is None else unattended
         self.num_cards = num_cards
+        self.store = store  # Shared CardStore; when None the run opens relay_genned.txt itself
+        self._owns_store = False
+        self.journal = journal or JobJournal()  # Checkpoints so an interrupted job can be resumed
+        self.resume = resume
+        self.job = None
+        self.tracer = tracer.child("relay") if tracer else Tracer("relay")  # Per-action timings
+        self._owns_tracer = tracer is None
+        if debug:
+            frames.set_debug(True)  # Also write screenshots, crops and masks to disk
         
         # Store actions (clicks and typing)
         self.actions = []  # Will contain dictionaries with type, position, name, and text
@@ -26,6 +48,11 @@ class RelayAutomation:
         # Set a small pause between actions to make movements more human-like
         pyautogui.PAUSE = 0.5
         
+        # pyautogui calls block (PAUSE included), so they run in order on one thread off the event loop
+        self._screen = ThreadPoolExecutor(max_workers=1, thread_name_prefix="relay-screen")
+        self.card_region = frames.CardRegion()  # Screen area the card appears in, learned from the first card
+        self.ocr_workers = ocr_workers  # OCR processes; None picks one from the CPU count, 0 recognises in-process
+        
         # Load saved actions if available
         self.load_actions()
     
@@ -79,6 +106,10 @@ class RelayAutomation:
     
     def display_frame_guide(self, width=1400, height=900):
         """Create a simple outline image and display it using macOS Preview"""
+        if self.unattended:
+            print("Unattended run, skipping the browser positioning guide")
+            return True
+        
         # Create a new image with black background
         img = Image.new('RGB', (width, height), color=(0, 0, 0))
         draw = ImageDraw.Draw(img)
@@ -115,10 +146,115 @@ class RelayAutomation:
         print("Browser positioned. Starting automation...")
         return True
     
+    async def _on_screen(self, func, *args, **kwargs):
+        """Run a blocking pyautogui call on the screen thread without stalling the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._screen, functools.partial(func, *args, **kwargs))
+    
+    async def _click_at(self, x, y):
+        """Move the mouse to (x, y) and click"""
+        await self._on_screen(pyautogui.moveTo, x, y, duration=0.2)
+        await asyncio.sleep(0.2)  # Small pause before clicking
+        await self._on_screen(pyautogui.click)
+    
+    async def _save_screenshot(self, path):
+        await self._on_screen(lambda: pyautogui.screenshot().save(path))
+    
+    def _start_ocr_pool(self):
+        """Worker processes for card recognition, or None to use the default thread pool"""
+        if self.ocr_workers == 0:
+            return None
+        workers = self.ocr_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        # Workers that are spawned rather than forked need the debug flag handed over
+        return ProcessPoolExecutor(max_workers=workers, initializer=frames.set_debug, initargs=(frames.DEBUG,))
+    
+    async def _commit_cards(self, queue):
+        """Save recognised cards in the order they were created, however the workers finish"""
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            number, region, frame, recognition = item
+            
+            with self.tracer.span("ocr wait"):
+                try:
+                    (card_number, exp_month, exp_year, cvv), box, seconds = await recognition
+                except Exception as e:
+                    print(f"OCR of card {number} failed: {e}")
+                    card_number = exp_month = exp_year = cvv = box = None
+                    seconds = 0.0
+            
+            # Luhn, BIN, expiry and a 3-digit CVV, after the per-field re-reads
+            invalid = failed_fields(card_number, exp_month, exp_year, cvv)
+            self.tracer.record("ocr", seconds, ok=not invalid)
+            
+            if not invalid and box and region is None:
+                self.card_region.learn(region, box, (frame.shape[1], frame.shape[0]))
+            elif invalid:
+                self.card_region.forget()
+            
+            if not invalid:
+                print(f"\nSUCCESS: Found card {number} details")
+                print(f"Card Number: {card_number}")
+                print(f"CVV: {cvv}")
+            else:
+                print(f"\nFAILED: Could not read a valid {', '.join(invalid)} for card {number} (read {card_number}, {cvv})")
+                
+                # The UI has already moved on to later cards, so the captured frame is the only place left
+                # to read this card from; it is kept even without debug artifacts
+                try:
+                    frame_path = frames.save_frame(f"failed_card_{int(self.job['started_at'])}_{number}.png", frame, FAILED_FRAMES_DIR)
+                    print(f"Card {number} as captured: {frame_path}")
+                except Exception as e:
+                    print(f"Could not save the frame of card {number}: {e}")
+                
+                # Ask for manual input only for what failed; with nobody to ask, the card is left for later
+                print(f"Please enter the details of card {number} manually, reading them from that image:")
+                if "number" in invalid:
+                    card_number = await self._ask("Card Number: ")
+                if "cvv" in invalid and card_number is not None:
+                    cvv = await self._ask("CVV: ")
+                if card_number is None or cvv is None:
+                    print(f"⚠️ Card {number} was created but could not be read; type it in later from its saved frame")
+                    self.journal.complete_one(self.job, "created but unreadable")
+                    continue
+            
+            # Save card details to the output store
+            try:
+                self.save_card(card_number, cvv)
+            except Exception as e:
+                print(f"Error saving to file: {e}")
+    
+    async def _prompt(self, message):
+        """input() on a worker thread so other jobs keep running while we wait for the user"""
+        return await asyncio.get_running_loop().run_in_executor(None, input, message)
+    
+    async def _ask(self, message):
+        """_prompt() during a replay; None when the run is unattended or stdin is closed"""
+        # Under Xvfb there is nobody to answer: input() would hang the job or raise EOFError and
+        # take the committer (and every card still queued behind it) down with it
+        if self.unattended:
+            print(f"Unattended run, not asking: {message.strip()}")
+            return None
+        try:
+            return await self._prompt(message)
+        except EOFError:
+            print(f"No input available, not asking: {message.strip()}")
+            return None
+    
     async def login(self):
         """Main entry point that assumes browser is already logged in"""
         print("Using existing logged-in browser session")
         
+        # Nobody can record actions or double-click on an unattended display, so replay the saved ones straight away
+        if self.unattended:
+            if not self.actions:
+                print("❌ No saved Relay actions; record them once on a visible desktop before running unattended")
+                return
+            print(f"Unattended run, replaying {len(self.actions)} saved actions")
+            await self.run_automation()
+            return
+        
         # Determine if we need to collect actions or use saved ones
         if not self.actions:
             print("\n*************************************************************")
@@ -130,7 +266,7 @@ class RelayAutomation:
             await self.collect_actions()
             self.save_actions()
         else:
-            use_saved = input(f"Use {len(self.actions)} saved actions? (y/n): ").lower() == 'y'
+            use_saved = (await self._prompt(f"Use {len(self.actions)} saved actions? (y/n): ")).lower() == 'y'
             if not use_saved:
                 self.actions = []
                 await self.collect_actions()
@@ -144,7 +280,7 @@ class RelayAutomation:
         
         # Wait for user to double-click instead of typing "start"
         print("\nPosition your cursor where you want and DOUBLE-CLICK to begin the automation")
-        self.wait_for_double_click()
+        await asyncio.get_running_loop().run_in_executor(None, self.wait_for_double_click)
         
         print("\nDouble-click detected! Starting automation process...")
         # Now run the automation using the collected actions
@@ -152,6 +288,9 @@ class RelayAutomation:
     
     def wait_for_double_click(self):
         """Wait for the user to perform a double-click to start automation"""
+        if self.unattended:
+            return
+        
         import threading
         import time
         
@@ -272,6 +411,27 @@ class RelayAutomation:
                 else:
                     print(f"{i+1}. Type '{action['text']}' (delay: {action['delay']}s)")
     
+    def save_card(self, card_number, cvv):
+        """Hand a card to the output store (relay_genned.txt by default)"""
+        if self.store is None:
+            self.store = open_card_store("relay")
+            self._owns_store = True
+        
+        # Save only card number and CVV as requested
+        self.journal.record_card(self.job, self.store, CardRecord(bank="relay", card_number=card_number, cvv=cvv))
+        print(f"\n✅ Card details saved to {self.store.path}")
+    
+    def finish_store(self):
+        """Commit buffered cards; close the store if this run opened it"""
+        if self.store is None:
+            return
+        if self._owns_store:
+            self.store.close()
+            self.store = None
+            self._owns_store = False
+        else:
+            self.store.flush()
+    
     def generate_random_text(self, length=5):
         """Generate a random string of letters with the specified length"""
         return ''.join(random.choice(string.ascii_letters) for _ in range(length))
@@ -279,17 +439,13 @@ class RelayAutomation:
     def extract_card_details_from_screen(self):
         """Extract card number, expiration date, and CVV from the screen"""
         print("Taking screenshot to extract card details...")
-        screenshot = pyautogui.screenshot()
-        screenshot_path = "card_details_screenshot.png"
-        screenshot.save(screenshot_path)
-        
-        # Convert the image for OCR processing
-        img = cv2.imread(screenshot_path)
+        img = frames.grab_screen()
+        frames.save_debug("card_details_screenshot.png", img)
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         
         # Increase contrast to make text more readable
         gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
-        cv2.imwrite("processed_card_screenshot.png", gray)
+        frames.save_debug("processed_card_screenshot.png", gray)
         
         # Extract the details based on the screenshot layout
         # The screenshot shows card details in specific regions:
@@ -360,7 +516,9 @@ class RelayAutomation:
         print(f"STARTING AUTOMATION WITH {len(self.actions)} ACTIONS")
         print("*************************************************************")
         
-        cards_generated = 0
+        # Pick up where an interrupted run of the same job stopped
+        self.job = self.journal.start("relay", "1", "create", self.num_cards, resume=self.resume)
+        cards_generated = self.job["completed"]
         
         # Reset action to perform between card generations
         reset_action = {
@@ -371,6 +529,11 @@ class RelayAutomation:
             "delay": 5
         }
         
+        # Card screenshots queue up for the OCR workers and come back out in order
+        ocr_pool = self._start_ocr_pool()
+        pending = asyncio.Queue()
+        committer = asyncio.create_task(self._commit_cards(pending))
+        
         while cards_generated < self.num_cards:
             print(f"\nGenerating card {cards_generated + 1} of {self.num_cards}")
             
@@ -378,109 +541,82 @@ class RelayAutomation:
                 # Execute each action in sequence
                 for i, action in enumerate(self.actions):
                     # Add a brief pause before each action to ensure stability
-                    time.sleep(0.5)
+                    await asyncio.sleep(0.5)
                     
-                    if action["type"] == "click":
-                        x, y = action["position"]
-                        print(f"Step {i+1}: Clicking '{action['name']}' at position ({x}, {y})")
+                    with self.tracer.span(f"action {action.get('name') or action['type']}"):
+                        if action["type"] == "click":
+                            x, y = action["position"]
+                            print(f"Step {i+1}: Clicking '{action['name']}' at position ({x}, {y})")
                         
-                        # Move mouse to position first, then click
-                        pyautogui.moveTo(x, y, duration=0.2)
-                        time.sleep(0.2)  # Small pause before clicking
-                        pyautogui.click()
+                            # Move mouse to position first, then click
+                            await self._click_at(x, y)
                         
-                        print(f"✓ Clicked at position ({x}, {y})")
+                            print(f"✓ Clicked at position ({x}, {y})")
                         
-                        # Take screenshots at key points
-                        if any(keyword in action["name"].lower() for keyword in ["create", "radio", "next", "submit"]):
-                            screenshot_name = f"{action['name'].lower().replace(' ', '_')}_{cards_generated + 1}.png"
-                            pyautogui.screenshot().save(screenshot_name)
-                            print(f"Saved screenshot: {screenshot_name}")
+                            # Take screenshots at key points when debugging
+                            if frames.DEBUG and any(keyword in action["name"].lower() for keyword in ["create", "radio", "next", "submit"]):
+                                screenshot_name = f"{action['name'].lower().replace(' ', '_')}_{cards_generated + 1}.png"
+                                await self._save_screenshot(screenshot_name)
+                                print(f"Saved screenshot: {screenshot_name}")
                         
-                        # If this is the final action, wait 5 seconds then capture the card screenshot
-                        if i == len(self.actions) - 1:
-                            print("\nFinal click completed. Waiting 5 seconds before capturing card details...")
-                            # Add a longer delay (5 seconds as requested) to ensure the card details are fully displayed
-                            time.sleep(5)
+                            # If this is the final action, wait 5 seconds then capture the card screenshot
+                            if i == len(self.actions) - 1:
+                                print("\nFinal click completed. Waiting 5 seconds before capturing card details...")
+                                # Add a longer delay (5 seconds as requested) to ensure the card details are fully displayed
+                                await asyncio.sleep(5)
                             
-                            # Take a screenshot of the card details and save it as 1.png in parent directory
-                            current_dir = os.path.dirname(os.path.abspath(__file__))
-                            parent_dir = os.path.dirname(current_dir)
-                            screenshot_path = os.path.join(parent_dir, "1.png")
+                                # Grab the card details in memory; 1.png in the parent directory is only
+                                # written when debugging the OCR
+                                current_dir = os.path.dirname(os.path.abspath(__file__))
+                                parent_dir = os.path.dirname(current_dir)
                             
-                            pyautogui.screenshot().save(screenshot_path)
-                            print(f"Saved card screenshot to {screenshot_path}")
+                                with self.tracer.span("card screenshot"):
+                                    # Only the cached card region once the first card has been found
+                                    frame, region = await self._on_screen(self.card_region.capture)
+                                    frames.save_debug("1.png", frame, parent_dir)
                             
-                            # Process the screenshot to extract card details
-                            card_number, exp_month, exp_year, cvv = test_card_extraction_from_image(screenshot_path)
+                                self.journal.step(self.job, f"card {cards_generated + 1} screenshot")
                             
-                            if card_number and cvv:
-                                print("\nSUCCESS: Found card details")
-                                print(f"Card Number: {card_number}")
-                                print(f"CVV: {cvv}")
-                                
-                                # Save card details to relay_genned.txt in the parent directory
-                                output_file = os.path.join(parent_dir, "relay_genned.txt")
-                                try:
-                                    with open(output_file, "a") as f:
-                                        # Save only card number and CVV as requested
-                                        f.write(f"{card_number},{cvv}\n")
-                                    # Flush the file to ensure data is written immediately
-                                    f.flush()
-                                    print(f"\n✅ Card details saved to {output_file}")
-                                except Exception as e:
-                                    print(f"Error saving to file: {e}")
-                            else:
-                                print("\nFAILED: Could not extract complete card details")
-                                
-                                # Ask for manual input if extraction fails
-                                print("Please enter the card details manually:")
-                                card_number = input("Card Number: ")
-                                cvv = input("CVV: ")
-                                
-                                # Save manually entered details
-                                output_file = os.path.join(parent_dir, "relay_genned.txt")
-                                try:
-                                    with open(output_file, "a") as f:
-                                        f.write(f"{card_number},{cvv}\n")
-                                    # Flush the file to ensure data is written immediately
-                                    f.flush()
-                                    print(f"\n✅ Card details saved to {output_file}")
-                                except Exception as e:
-                                    print(f"Error saving to file: {e}")
+                                # Recognised by an OCR worker while the UI goes on to RESET and the next card;
+                                # the committer saves the results in card order
+                                recognition = asyncio.get_running_loop().run_in_executor(
+                                    ocr_pool, recognise_card, frame, parent_dir, region is not None)
+                                await pending.put((cards_generated + 1, region, frame, recognition))
                         
-                        # Use the custom delay from the action
-                        delay = action.get("delay", 1)  # Default to 1 if not specified
-                        if delay > 0:
-                            print(f"Waiting for {delay} seconds...")
-                            time.sleep(delay)
-                    
-                    elif action["type"] == "type":
-                        try:
-                            # Check if this is a random text request
-                            if action["text"].lower() == 'random':
-                                random_text = self.generate_random_text()
-                                print(f"Step {i+1}: Typing random text: '{random_text}'")
-                                pyautogui.write(random_text, interval=0.1)
-                            else:
-                                print(f"Step {i+1}: Typing '{action['text']}'")
-                                pyautogui.write(action['text'], interval=0.1)
-                            
-                            print(f"✓ Typed text successfully")
-                            
                             # Use the custom delay from the action
                             delay = action.get("delay", 1)  # Default to 1 if not specified
                             if delay > 0:
                                 print(f"Waiting for {delay} seconds...")
-                                time.sleep(delay)
-                        except Exception as typing_error:
-                            print(f"Error during typing: {typing_error}")
-                            input("Press Enter to continue with next action (or Ctrl+C to exit)...")
+                                await asyncio.sleep(delay)
+                    
+                        elif action["type"] == "type":
+                            try:
+                                # Check if this is a random text request
+                                if action["text"].lower() == 'random':
+                                    random_text = self.generate_random_text()
+                                    print(f"Step {i+1}: Typing random text: '{random_text}'")
+                                    await self._on_screen(pyautogui.write, random_text, interval=0.1)
+                                else:
+                                    print(f"Step {i+1}: Typing '{action['text']}'")
+                                    await self._on_screen(pyautogui.write, action['text'], interval=0.1)
+                            
+                                print(f"✓ Typed text successfully")
+                            
+                                # Use the custom delay from the action
+                                delay = action.get("delay", 1)  # Default to 1 if not specified
+                                if delay > 0:
+                                    print(f"Waiting for {delay} seconds...")
+                                    await asyncio.sleep(delay)
+                            except Exception as typing_error:
+                                print(f"Error during typing: {typing_error}")
+                                if await self._ask("Press Enter to continue with next action (or Ctrl+C to exit)...") is None:
+                                    raise  # Nobody can fix the field by hand, so give up on this card
                     
                     # If this is a form step, ask user to fill it
                     if action["type"] == "click" and "form" in action["name"].lower():
                         print("\nPlease fill out the card creation form")
-                        input("Press Enter when you've filled the form and are ready to continue...")
+                        if await self._ask("Press Enter when you've filled the form and are ready to continue...") is None:
+                            print("Continuing with the recorded actions for the form")
                 
                 # Increment counter
                 cards_generated += 1
@@ -490,40 +626,50 @@ class RelayAutomation:
                     print(f"\nPreparing to generate card {cards_generated + 1} of {self.num_cards}...")
                     
                     # Perform reset click to prepare for next card
-                    x, y = reset_action["position"]
-                    print(f"Performing RESET click at position ({x}, {y})")
+                    with self.tracer.span("reset"):
+                        x, y = reset_action["position"]
+                        print(f"Performing RESET click at position ({x}, {y})")
                     
-                    # Move mouse to reset position and click
-                    pyautogui.moveTo(x, y, duration=0.2)
-                    time.sleep(0.2)
-                    pyautogui.click()
+                        # Move mouse to reset position and click
+                        await self._click_at(x, y)
                     
-                    print(f"✓ Reset click completed")
-                    print(f"Waiting {reset_action['delay']} seconds after reset...")
-                    time.sleep(reset_action["delay"])
+                        print(f"✓ Reset click completed")
+                        print(f"Waiting {reset_action['delay']} seconds after reset...")
+                        await asyncio.sleep(reset_action["delay"])
             
             except Exception as e:
                 print(f"Error generating card: {e}")
                 print("Please complete this card generation manually.")
-                response = input("Press Enter to continue or type 'q' to quit: ")
-                if response.lower() == 'q':
+                response = await self._ask("Press Enter to continue or type 'q' to quit: ")
+                if response is None:
+                    # Abort the card: it isn't saved or checkpointed, and the run moves on to the next one
+                    print(f"⚠️ Abandoning card {cards_generated + 1}")
+                    self.journal.step(self.job, f"card {cards_generated + 1} abandoned")
+                elif response.lower() == 'q':
                     break
                 
                 # Still perform reset click even after an error
                 try:
                     x, y = reset_action["position"]
                     print(f"Performing RESET click at position ({x}, {y}) to recover...")
-                    pyautogui.moveTo(x, y, duration=0.2)
-                    time.sleep(0.2)
-                    pyautogui.click()
-                    time.sleep(reset_action["delay"])
+                    await self._click_at(x, y)
+                    await asyncio.sleep(reset_action["delay"])
                 except Exception as reset_error:
                     print(f"Error during reset click: {reset_error}")
                     print("Please reset manually before continuing.")
-                    input("Press Enter when ready to continue...")
+                    await self._ask("Press Enter when ready to continue...")
                 
                 cards_generated += 1
         
+        # Let the workers finish the cards still being recognised
+        await pending.put(None)
+        await committer
+        if ocr_pool is not None:
+            ocr_pool.shutdown()
+        
+        self.finish_store()
+        if self._owns_tracer:
+            self.tracer.print_summary()
         print(f"\nCompleted generation of {cards_generated} cards")
     
     def get_mouse_position(self):
@@ -574,23 +720,17 @@ class RelayAutomation:
         print("\nCalibration complete!")
         return True
 
-    def find_text_on_screen(self, text, screenshot_path=None, confidence=0.7):
+    def find_text_on_screen(self, text, image=None, confidence=0.7):
         """Find text on screen using OCR and return its coordinates"""
-        # Take a screenshot if not provided
-        if not screenshot_path:
-            screenshot = pyautogui.screenshot()
-            screenshot_path = "temp_screenshot.png"
-            screenshot.save(screenshot_path)
-        
-        # Read the image
-        img = cv2.imread(screenshot_path)
+        # image is a frame or a path; take a screenshot if not provided
+        img = frames.to_frame(image)
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         
         # Apply some image processing to improve OCR accuracy
         gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
         
         # Save the processed image
-        cv2.imwrite("processed_screenshot.png", gray)
+        frames.save_debug("processed_screenshot.png", gray)
         
         # Use pytesseract to get text and bounding boxes
         data = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT)
@@ -636,13 +776,10 @@ class RelayAutomation:
             print(f"Could not find '{text}' on screen")
             return False
 
-    def find_sidebar_elements(self, screenshot_path=None):
+    def find_sidebar_elements(self, image=None):
         """Find elements in the sidebar based on their position and appearance"""
-        # Take a screenshot if not provided
-        if not screenshot_path:
-            screenshot = pyautogui.screenshot()
-            screenshot_path = "temp_screenshot.png"
-            screenshot.save(screenshot_path)
+        # image is a frame or a path; take a screenshot if not provided
+        img = frames.to_frame(image)
         
         # Use template matching to find the Cards menu item
         try:
@@ -654,7 +791,6 @@ class RelayAutomation:
                 os.makedirs("templates")
             
             # Analyze the screenshot to find the sidebar
-            img = cv2.imread(screenshot_path)
             # Convert to HSV for better color detection
             hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
             
@@ -683,7 +819,7 @@ class RelayAutomation:
                 for y in range(100, img.shape[0] - 100, 50):  # Sample at different heights
                     # Extract a region that might contain "Cards"
                     region = img[y:y+50, sidebar_x-100:sidebar_x+100]
-                    cv2.imwrite(f"region_{y}.png", region)
+                    frames.save_debug(f"region_{y}.png", region)
                     
                     # Use OCR on this region
                     text = pytesseract.image_to_string(region).strip()
@@ -701,7 +837,7 @@ class RelayAutomation:
             
             # As a fallback, look for text with more robust methods
             print("Trying more robust text detection for 'Cards'...")
-            return self.find_text_on_screen("Cards", screenshot_path)
+            return self.find_text_on_screen("Cards", img)
             
         except Exception as e:
             print(f"Error finding sidebar elements: {e}")
@@ -725,14 +861,14 @@ class RelayAutomation:
         
         # If first approach fails, try the sidebar detection approach
         try:
-            screenshot_path = "relay_screen.png"
-            pyautogui.screenshot().save(screenshot_path)
+            frame = frames.grab_screen()
+            frames.save_debug("relay_screen.png", frame)
             
             # Specifically look for the coordinates shown in the screenshot
             # Based on your screenshot, the Cards menu item appears to be in the left sidebar
             # around coordinates (X: ~64, Y: ~450) - these are estimates from the screenshot
             
-            coords = self.find_sidebar_elements(screenshot_path)
+            coords = self.find_sidebar_elements(frame)
             if coords:
                 x, y = coords
                 print(f"Found Cards menu item at ({x}, {y}). Clicking...")
@@ -766,16 +902,14 @@ class RelayAutomation:
             print(f"Unknown color: {color_name}")
             return False
         
-        screenshot = pyautogui.screenshot()
-        screenshot_path = f"color_detection_{color_name}.png"
-        screenshot.save(screenshot_path)
+        img = frames.grab_screen()
+        frames.save_debug(f"color_detection_{color_name}.png", img)
         
-        img = cv2.imread(screenshot_path)
         hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
         
         lower_range, upper_range = color_ranges[color_name]
         mask = cv2.inRange(hsv, np.array(lower_range), np.array(upper_range))
-        cv2.imwrite(f"color_mask_{color_name}.png", mask)
+        frames.save_debug(f"color_mask_{color_name}.png", mask)
         
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
@@ -803,6 +937,14 @@ class RelayAutomation:
         """Main entry point for deleting cards"""
         print("Using existing logged-in browser session for card deletion")
         
+        if self.unattended:
+            if not self.delete_actions:
+                print("❌ No saved Relay delete actions; record them once on a visible desktop before running unattended")
+                return
+            print(f"Unattended run, replaying {len(self.delete_actions)} saved delete actions")
+            await self.run_delete_automation()
+            return
+        
         # Determine if we need to collect actions or use saved ones
         if not self.delete_actions:
             print("\n*************************************************************")
@@ -814,7 +956,7 @@ class RelayAutomation:
             await self.collect_delete_actions()
             self.save_actions(is_delete=True)
         else:
-            use_saved = input(f"Use {len(self.delete_actions)} saved delete actions? (y/n): ").lower() == 'y'
+            use_saved = (await self._prompt(f"Use {len(self.delete_actions)} saved delete actions? (y/n): ")).lower() == 'y'
             if not use_saved:
                 self.delete_actions = []
                 await self.collect_delete_actions()
@@ -828,7 +970,7 @@ class RelayAutomation:
         
         # Wait for user to double-click instead of typing "start"
         print("\nPosition your cursor where you want and DOUBLE-CLICK to begin the deletion automation")
-        self.wait_for_double_click()
+        await asyncio.get_running_loop().run_in_executor(None, self.wait_for_double_click)
         
         print("\nDouble-click detected! Starting deletion automation process...")
         # Now run the automation using the collected actions
@@ -916,7 +1058,10 @@ class RelayAutomation:
         print(f"STARTING DELETION AUTOMATION WITH {len(self.delete_actions)} ACTIONS")
         print("*************************************************************")
         
-        cards_deleted = 0
+        # Pick up where an interrupted run of the same job stopped
+        self.job = self.journal.start("relay", "1", "delete", self.num_cards, resume=self.resume)
+        cards_deleted = self.job["completed"]
+        abandoned = 0  # Cards an unattended run gave up on
         
         # If needed, add a reset action between card deletions
         reset_action = {
@@ -927,89 +1072,99 @@ class RelayAutomation:
             "delay": 2
         }
         
-        while cards_deleted < self.num_cards:
-            print(f"\nDeleting card {cards_deleted + 1} of {self.num_cards}")
+        while cards_deleted + abandoned < self.num_cards:
+            print(f"\nDeleting card {cards_deleted + abandoned + 1} of {self.num_cards}")
             
             try:
                 # Execute each action in sequence
                 for i, action in enumerate(self.delete_actions):
                     # Add a brief pause before each action to ensure stability
-                    time.sleep(0.5)
+                    await asyncio.sleep(0.5)
                     
-                    if action["type"] == "click":
-                        x, y = action["position"]
-                        print(f"Step {i+1}: Clicking '{action['name']}' at position ({x}, {y})")
+                    with self.tracer.span(f"delete action {action.get('name') or action['type']}"):
+                        if action["type"] == "click":
+                            x, y = action["position"]
+                            print(f"Step {i+1}: Clicking '{action['name']}' at position ({x}, {y})")
                         
-                        # Move mouse to position first, then click
-                        pyautogui.moveTo(x, y, duration=0.2)
-                        time.sleep(0.2)  # Small pause before clicking
-                        pyautogui.click()
+                            # Move mouse to position first, then click
+                            await self._click_at(x, y)
                         
-                        print(f"✓ Clicked at position ({x}, {y})")
+                            print(f"✓ Clicked at position ({x}, {y})")
                         
-                        # No OCR or card detail extraction needed for deletion
+                            # No OCR or card detail extraction needed for deletion
                         
-                        # Use the custom delay from the action
-                        delay = action.get("delay", 1)  # Default to 1 if not specified
-                        if delay > 0:
-                            print(f"Waiting for {delay} seconds...")
-                            time.sleep(delay)
-                    
-                    elif action["type"] == "type":
-                        try:
-                            # Check if this is a random text request
-                            if action["text"].lower() == 'random':
-                                random_text = self.generate_random_text()
-                                print(f"Step {i+1}: Typing random text: '{random_text}'")
-                                pyautogui.write(random_text, interval=0.1)
-                            else:
-                                print(f"Step {i+1}: Typing '{action['text']}'")
-                                pyautogui.write(action['text'], interval=0.1)
-                            
-                            print(f"✓ Typed text successfully")
-                            
                             # Use the custom delay from the action
                             delay = action.get("delay", 1)  # Default to 1 if not specified
                             if delay > 0:
                                 print(f"Waiting for {delay} seconds...")
-                                time.sleep(delay)
-                        except Exception as typing_error:
-                            print(f"Error during typing: {typing_error}")
-                            input("Press Enter to continue with next action (or Ctrl+C to exit)...")
+                                await asyncio.sleep(delay)
+                    
+                        elif action["type"] == "type":
+                            try:
+                                # Check if this is a random text request
+                                if action["text"].lower() == 'random':
+                                    random_text = self.generate_random_text()
+                                    print(f"Step {i+1}: Typing random text: '{random_text}'")
+                                    await self._on_screen(pyautogui.write, random_text, interval=0.1)
+                                else:
+                                    print(f"Step {i+1}: Typing '{action['text']}'")
+                                    await self._on_screen(pyautogui.write, action['text'], interval=0.1)
+                            
+                                print(f"✓ Typed text successfully")
+                            
+                                # Use the custom delay from the action
+                                delay = action.get("delay", 1)  # Default to 1 if not specified
+                                if delay > 0:
+                                    print(f"Waiting for {delay} seconds...")
+                                    await asyncio.sleep(delay)
+                            except Exception as typing_error:
+                                print(f"Error during typing: {typing_error}")
+                                if await self._ask("Press Enter to continue with next action (or Ctrl+C to exit)...") is None:
+                                    raise  # Nobody can fix the field by hand, so give up on this card
                 
                 # Increment counter after completing all delete actions for one card
                 cards_deleted += 1
+                self.journal.complete_one(self.job, "deleted")
                 
                 # If more cards need to be deleted, perform reset action first
                 if cards_deleted < self.num_cards:
                     print(f"\nPreparing to delete card {cards_deleted + 1} of {self.num_cards}...")
                     
                     # Perform reset click to prepare for next card deletion
-                    x, y = reset_action["position"]
-                    print(f"Performing RESET click at position ({x}, {y})")
+                    with self.tracer.span("delete reset"):
+                        x, y = reset_action["position"]
+                        print(f"Performing RESET click at position ({x}, {y})")
                     
-                    # Move mouse to reset position and click
-                    pyautogui.moveTo(x, y, duration=0.2)
-                    time.sleep(0.2)
-                    pyautogui.click()
+                        # Move mouse to reset position and click
+                        await self._click_at(x, y)
                     
-                    print(f"✓ Reset click completed")
-                    print(f"Waiting {reset_action['delay']} seconds after reset...")
-                    time.sleep(reset_action["delay"])
+                        print(f"✓ Reset click completed")
+                        print(f"Waiting {reset_action['delay']} seconds after reset...")
+                        await asyncio.sleep(reset_action["delay"])
             
             except Exception as e:
                 print(f"Error deleting card: {e}")
                 print("Please complete this card deletion manually.")
-                response = input("Press Enter to continue or type 'q' to quit: ")
+                response = await self._ask("Press Enter to continue or type 'q' to quit: ")
+                if response is None:
+                    # Abort the card: it isn't counted as deleted, so a resumed job tries it again
+                    print(f"⚠️ Abandoning deletion of card {cards_deleted + abandoned + 1}")
+                    self.journal.step(self.job, f"card {cards_deleted + abandoned + 1} delete abandoned")
+                    abandoned += 1
+                    continue
                 if response.lower() == 'q':
                     break
                 
+                # The user finished this deletion by hand
                 cards_deleted += 1
+                self.journal.complete_one(self.job, "deleted manually")
         
+        if self._owns_tracer:
+            self.tracer.print_summary()
         print(f"\nCompleted deletion of {cards_deleted} cards")
 
 def test_card_extraction_from_image(image_path):
-    """Extract card details from screenshot with focused cropping"""
+    """Extract card details from a screenshot file with focused cropping"""
     print(f"Testing card extraction from image: {image_path}")
     
     # Check if file exists
@@ -1017,97 +1172,111 @@ def test_card_extraction_from_image(image_path):
         print(f"Error: File not found at {image_path}")
         return None, None, None, None
     
-    # Get the directory where the original image is located
-    img_dir = os.path.dirname(image_path)
-    
+    # Debug crops go next to the original image
+    return extract_card_details_from_frame(cv2.imread(image_path), os.path.dirname(image_path))
+
+def recognise_card(frame, debug_dir=None, cropped=False):
+    """Locate and OCR the card in one call, for the OCR workers; returns (details, box, seconds)"""
+    start = time.perf_counter()
     try:
-        # Load the original image
-        original_img = Image.open(image_path)
-        width, height = original_img.size
-        print(f"Image dimensions: {width}x{height}")
-        
+        card_only, box = locate_card(frame, debug_dir, cropped)
+    except Exception as e:
+        print(f"Error processing image: {e}")
+        return (None, None, None, None), None, time.perf_counter() - start
+    return extract_card_details_from_card(card_only), box, time.perf_counter() - start
+
+def extract_card_details_from_frame(frame, debug_dir=None, cropped=False):
+    """Extract card details from a BGR screen frame, cropping and thresholding in memory"""
+    try:
+        card_only, _ = locate_card(frame, debug_dir, cropped)
+    except Exception as e:
+        print(f"Error processing image: {e}")
+        return None, None, None, None
+    return extract_card_details_from_card(card_only)
+
+def locate_card(frame, debug_dir=None, cropped=False):
+    """Crop a frame to the green card; returns the crop and its (x, y, w, h) box in the frame, or None if not found"""
+    height, width = frame.shape[:2]
+    print(f"Image dimensions: {width}x{height}")
+    
+    if cropped:
+        # The frame is already the cached card region
+        first_crop_x = 0
+        first_crop = frame
+    else:
         # FIRST CROP: Focus on the right panel where card details are shown
         first_crop_x = int(width * 0.6)  # Start at 60% of screen width 
-        first_crop_width = width - first_crop_x
         first_crop_height = int(height * 0.45)  # Slightly larger vertical area
         
-        first_crop = original_img.crop((first_crop_x, 0, width, first_crop_height))
-        first_crop_path = os.path.join(img_dir, "card_area_first_crop.png")
-        first_crop.save(first_crop_path)
-        print(f"Created first crop: {first_crop_path}")
-        
-        # FINAL CROP: Focus specifically on the card
-        first_crop_cv = cv2.cvtColor(np.array(first_crop), cv2.COLOR_RGB2BGR)
-        
-        # Use HSV color space to detect the green card
-        hsv = cv2.cvtColor(first_crop_cv, cv2.COLOR_BGR2HSV)
-        
-        # Green color range for the card 
-        lower_green = np.array([40, 40, 40])  # Darker green
-        upper_green = np.array([90, 255, 255])  # Brighter green
-        
-        # Create a mask for green regions
-        mask = cv2.inRange(hsv, lower_green, upper_green)
-        
-        # Find contours for the green regions
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Look for the largest green contour (likely the card)
-        max_area = 0
-        card_rect = None
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > max_area and area > 1000:  # Minimum size threshold
-                max_area = area
-                x, y, w, h = cv2.boundingRect(contour)
-                card_rect = (x, y, w, h)
-        
-        # If we found a green card area, crop to it
-        if card_rect:
-            x, y, w, h = card_rect
-            # Add a slightly larger margin
-            margin = 10
-            x = max(0, x - margin)
-            y = max(0, y - margin)
-            w = min(first_crop.width - x, w + (2 * margin))
-            h = min(first_crop.height - y, h + (2 * margin))
-            
-            card_only = first_crop.crop((x, y, x + w, y + h))
-        else:
-            # Fallback if color detection fails
-            card_only = first_crop.crop((
-                int(first_crop.width * 0.05),  # 5% from left
-                int(first_crop.height * 0.1),  # 10% from top
-                int(first_crop.width * 0.95),  # 95% from left
-                int(first_crop.height * 0.65)   # 65% from top
-            ))
-        
-        card_only_path = os.path.join(img_dir, "card_area_only.png")
-        card_only.save(card_only_path)
-        print(f"Created card-only crop: {card_only_path}")
-        
-        # Enhance the card image for better OCR
-        card_cv = cv2.cvtColor(np.array(card_only), cv2.COLOR_RGB2BGR)
-        
-        # Increase contrast and sharpness
-        card_cv = cv2.convertScaleAbs(card_cv, alpha=1.5, beta=0)
-        
-        # Convert to grayscale for OCR
-        gray = cv2.cvtColor(card_cv, cv2.COLOR_BGR2GRAY)
-        
-        # Apply adaptive thresholding to improve text extraction
-        binary = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY, 11, 2
-        )
-        
-        # Extract text using multiple OCR approaches for better results
-        card_text_gray = pytesseract.image_to_string(gray)
-        card_text_binary = pytesseract.image_to_string(binary)
-        
-        # Combine results and clean up
-        card_text = card_text_gray + "\n" + card_text_binary
+        first_crop = frame[0:first_crop_height, first_crop_x:width]
+        frames.save_debug("card_area_first_crop.png", first_crop, debug_dir)
+    first_crop_height, first_crop_width = first_crop.shape[:2]
+    
+    # FINAL CROP: Focus specifically on the card
+    # Use HSV color space to detect the green card
+    hsv = cv2.cvtColor(first_crop, cv2.COLOR_BGR2HSV)
+    
+    # Green color range for the card 
+    lower_green = np.array([40, 40, 40])  # Darker green
+    upper_green = np.array([90, 255, 255])  # Brighter green
+    
+    # Create a mask for green regions
+    mask = cv2.inRange(hsv, lower_green, upper_green)
+    
+    # Find contours for the green regions
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    # Look for the largest green contour (likely the card)
+    max_area = 0
+    card_rect = None
+    
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area > max_area and area > 1000:  # Minimum size threshold
+            max_area = area
+            x, y, w, h = cv2.boundingRect(contour)
+            card_rect = (x, y, w, h)
+    
+    # If we found a green card area, crop to it
+    box = None
+    if card_rect:
+        x, y, w, h = card_rect
+        # Add a slightly larger margin
+        margin = 10
+        x = max(0, x - margin)
+        y = max(0, y - margin)
+        w = min(first_crop_width - x, w + (2 * margin))
+        h = min(first_crop_height - y, h + (2 * margin))
+        
+        card_only = first_crop[y:y + h, x:x + w]
+        box = (first_crop_x + x, y, w, h)
+    else:
+        # Fallback if color detection fails
+        card_only = first_crop[
+            int(first_crop_height * 0.1):int(first_crop_height * 0.65),  # 10% to 65% from top
+            int(first_crop_width * 0.05):int(first_crop_width * 0.95)   # 5% to 95% from left
+        ]
+    
+    frames.save_debug("card_area_only.png", card_only, debug_dir)
+    return card_only, box
+
+def extract_card_details_from_card(card_only):
+    """OCR a frame cropped to the card and pick out its number, expiry and CVV"""
+    try:
+        # Read each field from its own sub-region as one line of digits
+        fields = ocr.read_card_fields(card_only)
+        missed = [field for field, value in fields.items() if not field_ok(field, value)]
+        if not missed:
+            exp_month, exp_year = fields["expiry"].split("/")
+            print(f"Found card details: {fields['number']} {fields['expiry']} {fields['cvv']}")
+            return fields["number"], exp_month, exp_year, fields["cvv"]
+        
+        # Only OCR the whole card when a field didn't validate after the per-field retries
+        print(f"Could not read a valid {', '.join(missed)} from its region, reading the whole card...")
+        
+        # One whole-card read of the contrast-boosted grayscale card: it is a tesseract process of its own,
+        # and the thresholded variants were already tried field by field
+        card_text = pytesseract.image_to_string(ocr.preprocess(card_only, "gray"))
         card_text = card_text.replace('@@', '00').replace('@', '0')
         
         print("\nRaw OCR output:")
@@ -1194,20 +1363,7 @@ def test_card_extraction_from_image(image_path):
                     cvv_cleaned += ocr_fixes[char.upper()]
                 # Ignore other characters
             
-            # If we have a partial CVV (1-2 digits), try to complete it
-            if len(cvv_cleaned) < 3 and len(raw_cvv) >= 3:
-                # Fill remaining positions with best guesses
-                for i in range(len(cvv_cleaned), 3):
-                    if i < len(raw_cvv):
-                        char = raw_cvv[i]
-                        if char.upper() in ocr_fixes:
-                            cvv_cleaned += ocr_fixes[char.upper()]
-                        else:
-                            # Default to '0' if can't determine
-                            cvv_cleaned += '0'
-                    else:
-                        cvv_cleaned += '0'
-            
+            # A partial CVV is left short so validation rejects it instead of guessing the missing digits.
             # Return only the first 3 digits if longer
             if len(cvv_cleaned) > 3:
                 return cvv_cleaned[:3]
@@ -1274,6 +1430,14 @@ def test_card_extraction_from_image(image_path):
                         print(f"Found CVV by elimination: {cvv}")
                         break
 
+        # Fields the region reads got right stay; the whole-card values only replace fields they fix
+        whole_card = {"number": card_number, "expiry": f"{exp_month}/{exp_year}", "cvv": cvv}
+        for field in missed:
+            if field_ok(field, whole_card[field]):
+                fields[field] = whole_card[field]
+        card_number, cvv = fields["number"], fields["cvv"]
+        exp_month, _, exp_year = fields["expiry"].partition("/")
+        
         print("\nExtracted card details:")
         print(f"Card Number: {card_number}")
         print(f"Expiration: {exp_month}/{exp_year}")
@@ -1288,6 +1452,7 @@ def test_card_extraction_from_image(image_path):
         return None, None, None, None
 
 if __name__ == "__main__":
+    # Run from the repository root with: python -m relay.relay
     # Handle paths correctly when relay is a sub-repo
     current_dir = os.path.dirname(os.path.abspath(__file__))
     parent_dir = os.path.dirname(current_dir)
@@ -1329,12 +1494,11 @@ if __name__ == "__main__":
     
     if success:
         # Save card details to relay_genned.txt in the parent directory (main repo)
-        output_file = os.path.join(parent_dir, "relay_genned.txt")
         try:
-            with open(output_file, "a") as f:
+            with open_card_store("relay") as store:
                 # Save only card number and CVV as requested
-                f.write(f"{card_number},{cvv}\n")
-            print(f"\n✅ Card details saved to {output_file}")
+                store.add(CardRecord(bank="relay", card_number=card_number, cvv=cvv))
+            print(f"\n✅ Card details saved to {store.path}")
         except Exception as e:
             print(f"Error saving to file: {e}")
     else:
@@ -1351,11 +1515,10 @@ if __name__ == "__main__":
                 print(f"RESULT: {card_number},{cvv}")
                 
                 # Save card details to relay_genned.txt in the parent directory
-                output_file = os.path.join(parent_dir, "relay_genned.txt")
                 try:
-                    with open(output_file, "a") as f:
-                        f.write(f"{card_number},{cvv}\n")
-                    print(f"\n✅ Card details saved to {output_file}")
+                    with open_card_store("relay") as store:
+                        store.add(CardRecord(bank="relay", card_number=card_number, cvv=cvv))
+                    print(f"\n✅ Card details saved to {store.path}")
                 except Exception as e:
                     print(f"Error saving to file: {e}")
             else:
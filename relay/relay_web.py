@@ -0,0 +1,400 @@
+import json
+import os
+import random
+import re
+import string
+from contextlib import asynccontextmanager
+from capOne.browser_pool import BrowserPool
+from capOne.session import SessionStore
+from capOne.selector_race import SelectorRace
+from capOne.selector_cache import SelectorCache
+from storage.card_store import CardRecord, open_card_store
+from storage.journal import JobJournal
+from tracing.tracer import Tracer
+
+RELAY_DIR = os.path.dirname(os.path.abspath(__file__))
+SELECTORS_PATH = os.path.join(RELAY_DIR, "relay_web_selectors.json")
+
+# Every step takes a list of fallback selectors; relay/relay_web_selectors.json overrides any of them
+DEFAULT_SELECTORS = {
+    "signin_url": "https://app.relayfi.com/login",
+    "cards_url": "https://app.relayfi.com/cards",
+    "email_input": ["input[type='email']", "input[name='email']", "input[name='username']"],
+    "password_input": ["input[type='password']", "input[name='password']"],
+    "signin_button": ["button[type='submit']", "button:has-text('Log in')", "button:has-text('Sign in')"],
+    "cards_ready": ["[data-testid='cards-table']", "table", "button:has-text('Create Card')"],
+    "create_button": ["[data-testid='create-card-button']", "button:has-text('Create Card')", "button:has-text('New Card')"],
+    "virtual_option": ["[data-testid='virtual-card-option']", "label:has-text('Virtual')", "input[value='virtual']"],
+    "nickname_input": ["input[name='nickname']", "input[name='cardName']", "input[placeholder*='name' i]"],
+    "next_button": ["button:has-text('Next')", "button:has-text('Continue')"],
+    "submit_button": ["button:has-text('Create Card')", "button:has-text('Create')", "button[type='submit']"],
+    "reveal_button": ["button:has-text('Show')", "button:has-text('Reveal')", "[aria-label*='show' i]"],
+    "card_number": ["[data-testid='card-number']", "[class*='cardNumber']", "[class*='card-number']"],
+    "card_expiry": ["[data-testid='card-expiry']", "[class*='expir']"],
+    "card_cvv": ["[data-testid='card-cvv']", "[class*='cvv']", "[class*='cvc']"],
+    "close_button": ["button[aria-label='Close']", "button:has-text('Done')", "button:has-text('Close')"],
+    "card_row": ["[data-testid='card-row']", "table tbody tr"],
+    "card_menu": ["[data-testid='card-actions']", "button[aria-label*='more' i]", "button:has-text('Manage')"],
+    "delete_button": ["button:has-text('Delete card')", "button:has-text('Cancel card')", "[role='menuitem']:has-text('Delete')"],
+    "confirm_delete_button": ["[role='dialog'] button:has-text('Delete')", "[role='dialog'] button:has-text('Confirm')",
+                              "[role='dialog'] button:has-text('Yes')"],
+}
+
+# Reads every field from the first of its selectors that exists and has text, in a single round-trip
+READ_FIELDS_JS = r"""(fields) => {
+    const read = (selectors) => {
+        for (const selector of selectors) {
+            let element = null;
+            try {
+                element = document.querySelector(selector);
+            } catch (e) {
+                continue;
+            }
+            const text = element ? (element.value || element.innerText || element.textContent || '').trim() : '';
+            if (text) {
+                return text;
+            }
+        }
+        return '';
+    };
+    const result = {};
+    for (const [field, selectors] of Object.entries(fields)) {
+        result[field] = read(selectors);
+    }
+    return result;
+}"""
+
+
+def row_mark(text, nicknames, last4s):
+    """The nickname or last 4 this run knows that a card row shows, or None for a card it didn't make"""
+    for nickname in nicknames:
+        if re.search(rf"(?<!\w){re.escape(nickname)}(?!\w)", text):
+            return nickname
+    # Only a masked or "ending in" last 4; any other four digits in the row may be a date
+    for match in re.finditer(r"(?:ending in|[•*·.]{2,})\s*(\d{4})\b", text, re.IGNORECASE):
+        if match.group(1) in last4s:
+            return match.group(1)
+    return None
+
+
+def load_selectors(path=SELECTORS_PATH):
+    """Default selectors, with any overrides from the selectors file"""
+    selectors = dict(DEFAULT_SELECTORS)
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                overrides = json.load(f)
+            for step, value in overrides.items():
+                # A single selector is fine too
+                selectors[step] = [value] if isinstance(value, str) and not step.endswith("_url") else value
+            print(f"Loaded {len(overrides)} Relay selector overrides from {path}")
+        except (OSError, ValueError) as e:
+            print(f"Could not load Relay selectors from {path}: {e}")
+    return selectors
+
+
+class RelayWebAutomation:
+    """Creates and deletes Relay cards through the page's DOM, so it runs headless and needs no OCR"""
+
+    def __init__(self, username, password, headless=False, num_cards=1, store=None, journal=None, resume=True,
+                 tracer=None, pool=None, selectors=None, selector_cache=None, session_store=None, interactive=True):
+        self.username = username
+        self.password = password
+        self.headless = headless
+        self.num_cards = num_cards
+        self.store = store  # Shared CardStore; when None the run opens relay_genned.txt itself
+        self._owns_store = False
+        self.journal = journal or JobJournal()  # Same checkpoints as the screen engine, so either can resume a job
+        self.resume = resume
+        self.job = None
+        self.tracer = tracer.child("relay/web") if tracer else Tracer("relay/web")
+        self._owns_tracer = tracer is None
+        self.pool = pool  # Shared BrowserPool; when None each run launches (and closes) its own browser
+        self.selectors = selectors or load_selectors()
+        self.race = SelectorRace(selector_cache or SelectorCache())
+        self._owns_selector_cache = selector_cache is None
+        # Relay asks for a code on new devices, so the signed-in session is always kept
+        self.session_store = session_store or SessionStore(directory=os.path.join(RELAY_DIR, "sessions"))
+        self.interactive = interactive  # False when nobody is around to type a sign in code
+        self.cards_created = []
+        self.nicknames = []  # Given to the cards this run created, so delete can tell them apart from others
+        self.cards_unreadable = 0  # Submitted cards whose details couldn't be read
+        self.cards_deleted = 0
+
+    @asynccontextmanager
+    async def _browser_context(self):
+        """Borrow a context from the shared pool (or a private one-off browser), restoring the saved session"""
+        pool = self.pool
+        owns_pool = pool is None
+        if owns_pool:
+            pool = BrowserPool(headless=self.headless, policy="teardown")
+
+        context = await pool.acquire("relay", storage_state=self.session_store.load("relay"))
+        try:
+            yield context
+        finally:
+            await pool.release(context, "relay")
+            if owns_pool:
+                await pool.close()
+            if self._owns_selector_cache:
+                self.race.cache.save()
+
+    async def _click(self, page, step, timeout=10000):
+        return await self.race.click(page, f"relay {step}", self.selectors[step], timeout=timeout)
+
+    async def _wait(self, page, step, timeout=10000):
+        return await self.race.wait(page, f"relay {step}", self.selectors[step], timeout=timeout)
+
+    async def open_cards_page(self, page, context):
+        """Get the page onto the cards list, signing in only when the saved session has expired"""
+        with self.tracer.span("navigate to cards"):
+            await page.goto(self.selectors["cards_url"])
+            if await self._wait(page, "cards_ready", timeout=15000):
+                print("✅ Saved Relay session is still valid, skipped sign in")
+                return True
+
+        with self.tracer.span("sign in") as span:
+            await page.goto(self.selectors["signin_url"])
+            await self._fill(page, "email_input", self.username)
+            await self._fill(page, "password_input", self.password)
+            await self._click(page, "signin_button")
+
+            # A new device gets a verification code; give a person at a visible browser time to enter it
+            timeout = 180000 if self.interactive and not self.headless else 30000
+            print("Waiting for Relay sign in to finish (enter the verification code in the browser if asked)...")
+            try:
+                await page.wait_for_url(lambda url: "login" not in url, timeout=timeout)
+            except Exception:
+                print("❌ Relay sign in did not finish")
+                span.ok = False
+                return False
+            await page.goto(self.selectors["cards_url"])
+            span.ok = await self._wait(page, "cards_ready", timeout=30000)
+
+        if span.ok:
+            await self.session_store.save(context, "relay")
+        return span.ok
+
+    async def _fill(self, page, step, text, timeout=10000):
+        for selector in self.selectors[step]:
+            field = page.locator(selector).first
+            try:
+                await field.wait_for(state="visible", timeout=timeout)
+            except Exception:
+                timeout = 1000  # Later candidates only get a short look once the first one missed
+                continue
+            await field.fill(text)
+            return True
+        print(f"Could not find {step}")
+        return False
+
+    async def _read_card(self, page):
+        """Number, expiry and CVV of the card shown after creating it, read from the DOM in one round-trip"""
+        fields = await page.evaluate(READ_FIELDS_JS, {field: self.selectors[f"card_{field}"]
+                                                      for field in ("number", "expiry", "cvv")})
+
+        number = re.sub(r"\D", "", fields["number"])
+        match = re.search(r"(\d{1,2})\s*/\s*(\d{2,4})", fields["expiry"])
+        exp_month, exp_year = (match.group(1).zfill(2), match.group(2)[-2:]) if match else ("", "")
+        cvv = re.sub(r"\D", "", fields["cvv"])
+        return number, exp_month, exp_year, cvv
+
+    async def _create_card(self, page, number):
+        """Walk the create card form once; (details, readable) once submitted, None if the card was never submitted"""
+        with self.tracer.span("open form") as span:
+            span.ok = await self._click(page, "create_button")
+            if not span.ok:
+                return None
+
+        # Steps some versions of the form don't have only get a short look
+        with self.tracer.span("fill form"):
+            await self._click(page, "virtual_option", timeout=3000)
+            nickname = ''.join(random.choice(string.ascii_letters) for _ in range(5))
+            if await self._fill(page, "nickname_input", nickname, timeout=5000):
+                self.nicknames.append(nickname)
+            await self._click(page, "next_button", timeout=2000)
+
+        with self.tracer.span("submit") as span:
+            span.ok = await self._click(page, "submit_button")
+            if not span.ok:
+                return None
+
+        # From here on Relay may have made the card, so a failure must not send login() round to make another
+        with self.tracer.span("await card") as span:
+            span.ok = await self._wait(page, "card_number", timeout=30000)
+        if not span.ok:
+            print(f"Card {number}: ⚠️ submitted but its details never showed up")
+            return ("", "", "", ""), False
+
+        with self.tracer.span("extract") as span:
+            card = await self._read_card(page)
+            # Masked until revealed on some layouts
+            if len(card[0]) < 13 or not card[3]:
+                await self._click(page, "reveal_button", timeout=3000)
+                card = await self._read_card(page)
+            span.ok = len(card[0]) >= 13 and len(card[3]) in (3, 4)
+
+        with self.tracer.span("confirm"):
+            if not await self._click(page, "close_button", timeout=3000):
+                await page.keyboard.press("Escape")
+
+        print(f"Card {number}: {'✅ ending in ' + card[0][-4:] if span.ok else '⚠️ could not read details'}")
+        return card, span.ok
+
+    def _save_card(self, card_number, exp_month, exp_year, cvv):
+        if self.store is None:
+            self.store = open_card_store("relay")
+            self._owns_store = True
+
+        self.journal.record_card(self.job, self.store, CardRecord(bank="relay", card_number=card_number,
+                                                                  exp_month=exp_month, exp_year=exp_year, cvv=cvv))
+        self.cards_created.append(f"{card_number},{exp_month},{exp_year},{cvv}")
+
+    def _finish_store(self):
+        """Commit buffered cards; close the store if this run opened it"""
+        if self.store is None:
+            return
+        if self._owns_store:
+            self.store.close()
+            self.store = None
+            self._owns_store = False
+        else:
+            self.store.flush()
+
+    async def login(self):
+        """Create num_cards Relay cards (same entry point as RelayAutomation)"""
+        self.job = self.journal.start("relay", "1", "create", self.num_cards, resume=self.resume)
+        remaining = self.journal.remaining(self.job)
+        failures = 0
+
+        async with self._browser_context() as context:
+            page = await context.new_page()
+            try:
+                if not await self.open_cards_page(page, context):
+                    print("❌ Could not reach the Relay cards page")
+                    return
+
+                while remaining and failures < 3:
+                    number = len(self.cards_created) + self.cards_unreadable + 1
+                    result = await self._create_card(page, number)
+                    if result is None:
+                        # Never submitted, so no card was made and trying again is safe
+                        failures += 1
+                        await page.goto(self.selectors["cards_url"])
+                        continue
+                    card, readable = result
+                    remaining -= 1
+                    if readable:
+                        self._save_card(*card)
+                        continue
+                    # Submitted but unreadable: count it rather than create a duplicate
+                    self.cards_unreadable += 1
+                    self.journal.complete_one(self.job, "created but unreadable")
+                    await page.goto(self.selectors["cards_url"])
+            finally:
+                self._finish_store()
+                await page.close()
+
+        if self._owns_tracer:
+            self.tracer.print_summary()
+        print(f"\nCompleted generation of {len(self.cards_created)} Relay cards")
+        if self.cards_unreadable:
+            print(f"⚠️ {self.cards_unreadable} submitted cards could not be read; copy them from the Relay cards page")
+
+    def _known_last4s(self):
+        """Last 4 of every card this run created or the store has saved"""
+        if self.store is None:
+            self.store = open_card_store("relay")
+            self._owns_store = True
+        numbers = self.store.card_numbers() | {line.split(",")[0] for line in self.cards_created}
+        return {number[-4:] for number in numbers if len(number) >= 4}
+
+    async def _find_row(self, page, rows):
+        """(position, mark) of the first row holding a card this run or the store knows, or (None, None)"""
+        texts = await rows.all_inner_texts()
+        last4s = self._known_last4s()
+        for position, text in enumerate(texts):
+            mark = row_mark(text, self.nicknames, last4s)
+            if mark:
+                return position, mark
+        return None, None
+
+    async def _close_menus(self, page):
+        """Back out of a half-finished delete so no menu or dialog is left open over the list"""
+        try:
+            await page.keyboard.press("Escape")
+            await page.goto(self.selectors["cards_url"])
+            await self._wait(page, "cards_ready", timeout=15000)
+        except Exception as close_error:
+            print(f"Could not return to the Relay cards list: {close_error}")
+
+    async def _delete_card(self, page):
+        """Delete one card this run or the store recorded; True once its row is gone, None if none are left"""
+        rows = page.locator(", ".join(self.selectors["card_row"]))
+        position, mark = await self._find_row(page, rows)
+        if position is None:
+            print("No Relay cards recorded by this run or the card store are left to delete; other cards are skipped")
+            return None
+
+        try:
+            with self.tracer.span("open card") as span:
+                # The actions menu lives in the row on some layouts and behind the row's detail view on others
+                await rows.nth(position).click()
+                span.ok = await self._click(page, "card_menu", timeout=5000) or await self._wait(page, "delete_button", 3000)
+
+            with self.tracer.span("delete button") as span:
+                span.ok = await self._click(page, "delete_button")
+            if not span.ok:
+                await self._close_menus(page)
+                return False
+
+            with self.tracer.span("confirm delete") as span:
+                span.ok = await self._click(page, "confirm_delete_button")
+            if not span.ok:
+                await self._close_menus(page)
+                return False
+        except Exception as delete_error:
+            print(f"Error deleting Relay card {mark}: {delete_error}")
+            await self._close_menus(page)
+            return False
+
+        with self.tracer.span("await removal") as span:
+            await page.goto(self.selectors["cards_url"])
+            await self._wait(page, "cards_ready", timeout=15000)
+            nicknames, last4s = ([mark], set()) if mark in self.nicknames else ([], {mark})
+            span.ok = all(row_mark(text, nicknames, last4s) is None for text in await rows.all_inner_texts())
+        if span.ok and mark in self.nicknames:
+            self.nicknames.remove(mark)
+        return span.ok
+
+    async def delete_cards(self):
+        """Delete num_cards Relay cards (same entry point as RelayAutomation)"""
+        self.job = self.journal.start("relay", "1", "delete", self.num_cards, resume=self.resume)
+        remaining = self.journal.remaining(self.job)
+        failures = 0
+
+        async with self._browser_context() as context:
+            page = await context.new_page()
+            try:
+                if not await self.open_cards_page(page, context):
+                    print("❌ Could not reach the Relay cards page")
+                    return
+
+                while remaining and failures < 3:
+                    deleted = await self._delete_card(page)
+                    if deleted is None:
+                        break
+                    if deleted:
+                        self.cards_deleted += 1
+                        self.journal.complete_one(self.job, "deleted")
+                        remaining -= 1
+                        print(f"✅ Deleted Relay card {self.cards_deleted} of {self.num_cards}")
+                    else:
+                        failures += 1
+            finally:
+                self._finish_store()
+                await page.close()
+
+        if self._owns_tracer:
+            self.tracer.print_summary()
+        print(f"\nCompleted deletion of {self.cards_deleted} Relay cards")
@@ -0,0 +1,62 @@
+import os
+import re
+from datetime import date
+
+# Visa and Mastercard ranges; set RELAY_BIN_PREFIXES (comma-separated) to accept only your own card BINs
+DEFAULT_BIN_PREFIXES = ("4", "51", "52", "53", "54", "55", "22", "23", "24", "25", "26", "27")
+
+MAX_YEARS_AHEAD = 10  # Newly issued cards never expire further out than this
+
+
+def bin_prefixes():
+    configured = os.getenv("RELAY_BIN_PREFIXES", "")
+    return tuple(prefix.strip() for prefix in configured.split(",") if prefix.strip()) or DEFAULT_BIN_PREFIXES
+
+
+def luhn_ok(number):
+    """Whether a digit string passes the Luhn checksum"""
+    total = 0
+    for position, digit in enumerate(reversed(number)):
+        value = int(digit)
+        if position % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def number_ok(number):
+    return bool(re.fullmatch(r"\d{16}", number or "")) and number.startswith(bin_prefixes()) and luhn_ok(number)
+
+
+def expiry_ok(exp_month, exp_year):
+    """MM between 01 and 12 and a YY that isn't in the past or implausibly far ahead"""
+    if not re.fullmatch(r"\d{2}", exp_month or "") or not re.fullmatch(r"\d{2}", exp_year or ""):
+        return False
+    this_year = date.today().year % 100
+    return 1 <= int(exp_month) <= 12 and this_year <= int(exp_year) <= this_year + MAX_YEARS_AHEAD
+
+
+def cvv_ok(cvv):
+    return bool(re.fullmatch(r"\d{3}", cvv or ""))
+
+
+def field_ok(field, value):
+    """Check one field as read by the OCR: "number", "expiry" (MM/YY) or "cvv\""""
+    if field == "number":
+        return number_ok(value)
+    if field == "expiry":
+        exp_month, _, exp_year = (value or "").partition("/")
+        return expiry_ok(exp_month, exp_year)
+    return cvv_ok(value)
+
+
+def failed_fields(card_number, exp_month, exp_year, cvv):
+    """Names of the fields that don't validate; empty when the card looks right"""
+    checks = {
+        "number": number_ok(card_number),
+        "expiry": expiry_ok(exp_month, exp_year),
+        "cvv": cvv_ok(cvv),
+    }
+    return [field for field, ok in checks.items() if not ok]
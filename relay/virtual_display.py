@@ -0,0 +1,104 @@
+import os
+import select
+import shlex
+import shutil
+import subprocess
+import time
+
+
+class VirtualDisplay:
+    """An Xvfb display of known geometry that Relay's screen automation runs inside, started and torn down by us"""
+
+    def __init__(self, width=1400, height=900, depth=24, browser_command=None, startup_timeout=10):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        # Started inside the display once it is up, e.g. a browser already signed in to Relay
+        self.browser_command = browser_command or os.getenv("RELAY_BROWSER_COMMAND")
+        self.startup_timeout = startup_timeout
+        self.display = None  # ":N" once started
+        self._xvfb = None
+        self._browser = None
+        self._previous_display = None
+
+    @property
+    def running(self):
+        return self._xvfb is not None and self._xvfb.poll() is None
+
+    def start(self):
+        """Start Xvfb on a free display number and point DISPLAY at it; does nothing if already running"""
+        if self.running:
+            return self.display
+        if not shutil.which("Xvfb"):
+            raise RuntimeError("Xvfb is not installed (apt install xvfb)")
+
+        # -displayfd lets Xvfb pick a free display number itself, so parallel jobs never collide
+        read_fd, write_fd = os.pipe()
+        try:
+            self._xvfb = subprocess.Popen(
+                ["Xvfb", "-displayfd", str(write_fd), "-screen", "0",
+                 f"{self.width}x{self.height}x{self.depth}", "-nolisten", "tcp"],
+                pass_fds=(write_fd,),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            os.close(write_fd)
+            number = self._read_display_number(read_fd)
+        finally:
+            os.close(read_fd)
+
+        if number is None:
+            self.stop()
+            raise RuntimeError(f"Xvfb did not start within {self.startup_timeout}s")
+
+        self.display = f":{number}"
+        self._previous_display = os.environ.get("DISPLAY")
+        os.environ["DISPLAY"] = self.display
+        print(f"🖥️ Virtual display {self.display} started ({self.width}x{self.height})")
+
+        if self.browser_command:
+            self._browser = subprocess.Popen(shlex.split(self.browser_command), env=dict(os.environ))
+            print(f"Started browser in {self.display}: {self.browser_command}")
+        return self.display
+
+    def _read_display_number(self, read_fd):
+        deadline = time.monotonic() + self.startup_timeout
+        output = b""
+        while not output.endswith(b"\n"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._xvfb.poll() is not None:
+                return None
+            ready, _, _ = select.select([read_fd], [], [], remaining)
+            if ready:
+                chunk = os.read(read_fd, 16)
+                if not chunk:
+                    return None
+                output += chunk
+        return int(output.strip())
+
+    def stop(self):
+        """Stop the browser and Xvfb and restore the previous DISPLAY"""
+        for process in (self._browser, self._xvfb):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        self._browser = None
+        self._xvfb = None
+
+        if self.display is not None:
+            if self._previous_display is None:
+                os.environ.pop("DISPLAY", None)
+            else:
+                os.environ["DISPLAY"] = self._previous_display
+            print(f"Virtual display {self.display} stopped")
+            self.display = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
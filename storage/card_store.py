@@ -0,0 +1,221 @@
+import abc
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+# Repository root, where the generated card files have always been written
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Columns written by the legacy text files for each bank
+TEXT_FIELDS = {
+    "capone": ("card_number", "exp_month", "exp_year", "cvv"),
+    "relay": ("card_number", "cvv"),
+}
+
+
+@dataclass
+class CardRecord:
+    """One generated virtual card plus where it came from"""
+    bank: str
+    card_number: str
+    exp_month: str = ""
+    exp_year: str = ""
+    cvv: str = ""
+    profile: str = ""
+    source_card: str = ""  # The physical card the virtual card was created from, when known
+    created_at: float = field(default_factory=time.time)
+
+
+class CardStore(abc.ABC):
+    """Single buffered writer for generated cards that skips card numbers it has already saved"""
+
+    def __init__(self, path, batch_size=5, flush_interval=5.0):
+        self.path = path
+        self.batch_size = batch_size  # Commit after this many new cards...
+        self.flush_interval = flush_interval  # ...or once the oldest buffered card is this many seconds old
+        self._buffer = []
+        self._buffered_since = None
+        self._seen = set()
+        self._lock = threading.Lock()  # Relay hands cards over from executor threads
+        self._closed = False
+        self._open()
+        self._seen.update(self._load_card_numbers())
+        # Whatever is still buffered when the interpreter exits gets written out
+        atexit.register(self.close)
+
+    def add(self, record):
+        """Buffer a card for writing; returns False if that card number was already saved"""
+        with self._lock:
+            if record.card_number in self._seen:
+                print(f"Card ending in {record.card_number[-4:]} is already saved, skipping duplicate")
+                return False
+            self._seen.add(record.card_number)
+            self._buffer.append(record)
+            if self._buffered_since is None:
+                self._buffered_since = time.monotonic()
+
+            if (len(self._buffer) >= self.batch_size
+                    or time.monotonic() - self._buffered_since >= self.flush_interval):
+                self._flush_locked()
+        return True
+
+    def flush(self):
+        """Write and durably commit everything buffered so far"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self._buffer = []
+        self._buffered_since = None
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._close()
+            self._closed = True
+        # A closed store has nothing left to write at exit, and shouldn't be kept alive until then
+        atexit.unregister(self.close)
+
+    def __contains__(self, card_number):
+        return card_number in self._seen
+
+    def card_numbers(self):
+        """Every card number saved so far, including earlier runs"""
+        with self._lock:
+            return set(self._seen)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Sinks implement these
+    @abc.abstractmethod
+    def _open(self):
+        pass
+
+    @abc.abstractmethod
+    def _load_card_numbers(self):
+        pass
+
+    @abc.abstractmethod
+    def _write_batch(self, records):
+        pass
+
+    @abc.abstractmethod
+    def _close(self):
+        pass
+
+
+class _AppendFileStore(CardStore):
+    """Shared plumbing for the append-only file sinks: one handle, fsync per batch"""
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._existing_lines = []
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self._existing_lines = [line.strip() for line in f if line.strip()]
+        self._file = open(self.path, "a")
+
+    def _write_batch(self, records):
+        self._file.write("".join(self._format(record) + "\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class TextCardStore(_AppendFileStore):
+    """The original comma separated format (cap_genned.txt / relay_genned.txt)"""
+
+    def __init__(self, path, fields, **kwargs):
+        self.fields = fields
+        super().__init__(path, **kwargs)
+
+    def _load_card_numbers(self):
+        return {line.split(",")[0] for line in self._existing_lines}
+
+    def _format(self, record):
+        return ",".join(str(getattr(record, name)) for name in self.fields)
+
+
+class JsonlCardStore(_AppendFileStore):
+    """One JSON object per line with the full record (bank, profile, source card, timestamp)"""
+
+    def _load_card_numbers(self):
+        numbers = set()
+        for line in self._existing_lines:
+            try:
+                numbers.add(json.loads(line)["card_number"])
+            except (ValueError, KeyError):
+                pass  # A torn last line from a crash shouldn't stop the run
+        return numbers
+
+    def _format(self, record):
+        return json.dumps(asdict(record))
+
+
+class SqliteCardStore(CardStore):
+    """SQLite in WAL mode; the card number is the primary key"""
+
+    def _open(self):
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS cards (
+                card_number TEXT PRIMARY KEY,
+                bank TEXT NOT NULL,
+                exp_month TEXT,
+                exp_year TEXT,
+                cvv TEXT,
+                profile TEXT,
+                source_card TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def _load_card_numbers(self):
+        return {row[0] for row in self._db.execute("SELECT card_number FROM cards")}
+
+    def _write_batch(self, records):
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO cards (card_number, bank, exp_month, exp_year, cvv, profile, source_card, created_at) "
+                "VALUES (:card_number, :bank, :exp_month, :exp_year, :cvv, :profile, :source_card, :created_at)",
+                [asdict(record) for record in records]
+            )
+
+    def _close(self):
+        self._db.close()
+
+
+def bank_output_path(path, bank):
+    """A bank's own file next to path, e.g. cards.txt -> cards_relay.txt, for runs that write several banks"""
+    root, extension = os.path.splitext(path)
+    return f"{root}_{bank}{extension}"
+
+
+def open_card_store(bank, kind="text", path=None, **kwargs):
+    """Open the output store for a bank: "text" (legacy files), "jsonl" or "sqlite" """
+    if kind == "text":
+        default_name = "cap_genned.txt" if bank == "capone" else os.path.join(ROOT_DIR, "relay_genned.txt")
+        return TextCardStore(path or default_name, TEXT_FIELDS[bank], **kwargs)
+    if kind == "jsonl":
+        return JsonlCardStore(path or f"{bank}_cards.jsonl", **kwargs)
+    if kind == "sqlite":
+        return SqliteCardStore(path or "cards.db", **kwargs)
+    raise ValueError(f"Unknown card store type: {kind}")
@@ -0,0 +1,90 @@
+import json
+import os
+import time
+from storage.card_store import ROOT_DIR
+
+
+class JobJournal:
+    """Checkpoint files recording how far each create/delete job got, one file per bank/profile/action"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(ROOT_DIR, "jobs")
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, entry):
+        # Write to a temp file and rename so a crash never leaves a half written checkpoint
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(entry["key"])
+        entry["updated_at"] = time.time()
+        with open(path + ".tmp", "w") as f:
+            json.dump(entry, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def start(self, bank, profile, action, target, resume=True):
+        """Return the job entry, resuming an unfinished job with the same target if there is one"""
+        key = f"{bank}_{profile}_{action}"
+        entry = self._load(key)
+
+        if resume and entry and entry["status"] == "running" and entry["target"] == target:
+            print(f"Resuming {bank} {action} job for profile {profile}: "
+                  f"{entry['completed']} of {entry['target']} already done (last step: {entry['last_step']})")
+            return entry
+
+        if entry and entry["status"] == "running":
+            print(f"Starting a new {bank} {action} job for profile {profile} "
+                  f"(previous unfinished job had {entry['completed']} of {entry['target']} done)")
+
+        entry = {
+            "key": key,
+            "bank": bank,
+            "profile": profile,
+            "action": action,
+            "target": target,
+            "completed": 0,
+            "last_step": None,
+            "status": "running",
+            "started_at": time.time(),
+        }
+        self._save(entry)
+        return entry
+
+    def remaining(self, entry):
+        return max(entry["target"] - entry["completed"], 0)
+
+    def step(self, entry, name):
+        """Record the last step that succeeded"""
+        entry["last_step"] = name
+        self._save(entry)
+
+    def complete_one(self, entry, step="saved"):
+        """Count one more card as done"""
+        entry["completed"] += 1
+        entry["last_step"] = step
+        if entry["completed"] >= entry["target"]:
+            entry["status"] = "done"
+        self._save(entry)
+
+    def record_card(self, entry, store, record):
+        """Save a card and count it only once the output store has durably written it"""
+        added = store.add(record)
+        if added and entry:
+            # The store batches writes; the checkpoint must never count a card that is still buffered
+            store.flush()
+            self.complete_one(entry, "saved")
+        return added
+
+    def finish(self, entry):
+        """Mark the job as done (a later run with the same target starts fresh)"""
+        entry["status"] = "done"
+        self._save(entry)
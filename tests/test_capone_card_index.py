@@ -0,0 +1,52 @@
+from capOne.bulk_delete import DeleteRequestTemplate
+from capOne.card_index import CardIndex, VirtualCard
+
+
+def test_key_uses_only_the_token_or_last4():
+    assert VirtualCard(nickname="Groceries", attributes={"data-token": "tok_1", "data-row": "0"}).key == ("token", "tok_1")
+    assert VirtualCard(nickname="Groceries", last4="1111", created="01/02/2025").key == ("last4", "1111")
+    assert VirtualCard(nickname="Groceries", created="01/02/2025", attributes={"data-row": "0"}).key is None
+
+
+def test_remove_drops_only_the_deleted_row():
+    index = CardIndex()
+    first, second = VirtualCard(last4="1111"), VirtualCard(last4="1111")
+    index.cards = [first, second]
+
+    index.remove(first)
+    assert index.cards == [second] and index.cards[0] is second
+
+    # A stale copy of a row whose last 4 another row shares isn't enough to drop either
+    index.cards = [VirtualCard(last4="2222"), VirtualCard(last4="2222")]
+    index.remove(VirtualCard(last4="2222"))
+    assert len(index.cards) == 2
+
+
+def test_bulk_delete_is_refused_without_a_token():
+    card = VirtualCard(last4="1111", attributes={"data-row": "3"})
+    assert DeleteRequestTemplate.infer("DELETE", "https://bank.example/cards/1111", {}, None, card) is None
+    assert DeleteRequestTemplate.infer("DELETE", "https://bank.example/cards/3", {}, None, card) is None
+
+    tokened = VirtualCard(last4="1111", attributes={"data-token": "tok_1abc"})
+    template = DeleteRequestTemplate.infer("DELETE", "https://bank.example/cards/tok_1abc", {}, None, tokened)
+    assert template.for_card(VirtualCard(attributes={"data-token": "tok_2abc"})) == ("https://bank.example/cards/tok_2abc", None)
+    assert template.for_card(VirtualCard(last4="2222")) is None
+
+
+def test_token_attribute_is_learned_from_the_delete_request():
+    table = [
+        VirtualCard(last4="1111", attributes={"data-row": "0", "data-virtual-card-id": "vc-8f3a91", "data-test": "row"}),
+        VirtualCard(last4="2222", attributes={"data-row": "1", "data-virtual-card-id": "vc-27bd44", "data-test": "row"}),
+    ]
+    body = '{"cardReferenceId": "vc-8f3a91", "reason": "USER_REQUEST"}'
+    template = DeleteRequestTemplate.infer("POST", "https://bank.example/cards/delete", {}, body, table[0], table)
+
+    assert template.attribute == "data-virtual-card-id"
+    url, replayed = template.for_card(table[1])
+    assert url == "https://bank.example/cards/delete"
+    assert replayed == '{"cardReferenceId": "vc-27bd44", "reason": "USER_REQUEST"}'
+
+
+def test_value_every_row_shares_is_not_a_token():
+    table = [VirtualCard(attributes={"data-kind": "virtual"}), VirtualCard(attributes={"data-kind": "virtual"})]
+    assert DeleteRequestTemplate.infer("DELETE", "https://bank.example/virtual", {}, None, table[0], table) is None
@@ -0,0 +1,33 @@
+from capOne.extraction import CREATE_RESPONSE_URL_PATTERN, card_details_from_payload
+
+
+def test_account_number_is_not_taken_for_the_card_number():
+    payload = {
+        "account": {"accountNumber": "4000000000000002", "number": "1234567890123"},
+        "virtualCard": {"cardNumber": "4111 1111 1111 1111", "cvv": "123", "expirationDate": "2029-09-30"},
+    }
+    details = card_details_from_payload(payload)
+    assert details.as_line() == "4111111111111111,09,29,123"
+
+
+def test_card_number_next_to_cvv_and_expiry_wins():
+    payload = {
+        "funding": {"cardNumber": "4012888888881881"},
+        "cards": [{"virtualCardNumber": "5555555555554444", "cvv": "456", "expMonth": "3", "expYear": "2030"}],
+    }
+    details = card_details_from_payload(payload)
+    assert details.as_line() == "5555555555554444,03,30,456"
+
+
+def test_number_failing_luhn_is_rejected():
+    details = card_details_from_payload({"cardNumber": "4111111111111112", "cvv": "123", "expiry": "09/29"})
+    assert details.card_number == ""
+    assert not details.is_complete()
+
+
+def test_create_url_pattern_only_matches_the_card_collection():
+    assert CREATE_RESPONSE_URL_PATTERN.search("/api/cards")
+    assert CREATE_RESPONSE_URL_PATTERN.search("/customer/virtual-cards/")
+    assert not CREATE_RESPONSE_URL_PATTERN.search("/analytics/card-viewed")
+    assert not CREATE_RESPONSE_URL_PATTERN.search("/auth/token/refresh")
+    assert not CREATE_RESPONSE_URL_PATTERN.search("/api/cards/abc123")
@@ -0,0 +1,45 @@
+import asyncio
+import time
+from capOne.selector_cache import SelectorCache
+from capOne.selector_race import SelectorRace
+
+
+class FakePage:
+    """Each selector becomes visible after its delay in seconds, or never when it isn't listed"""
+
+    def __init__(self, delays):
+        self.delays = delays
+
+    async def wait_for_selector(self, selector, state="visible", timeout=30000):
+        delay = self.delays.get(selector)
+        if delay is None or delay * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError(f"{selector} not visible after {timeout}ms")
+        await asyncio.sleep(delay)
+        return selector
+
+
+def _race(tmp_path, delays, timeout):
+    cache = SelectorCache(str(tmp_path / "selectors.json"))
+    cache.record_win("step", "#stale", 0.1)
+    race = SelectorRace(cache)
+
+    async def run():
+        start = time.perf_counter()
+        result = await race._race(FakePage(delays), "step", ["#stale", "#fresh"], timeout)
+        return result, time.perf_counter() - start
+
+    return asyncio.run(run()), cache
+
+
+def test_stale_cached_selector_costs_only_its_head_start(tmp_path):
+    ((handle, selector), seconds), cache = _race(tmp_path, {"#fresh": 0.05}, timeout=3000)
+    assert selector == "#fresh"
+    assert seconds < 1.5
+    assert cache.winner("step", ["#stale", "#fresh"]) == "#fresh"
+
+
+def test_nothing_visible_times_out_once(tmp_path):
+    ((handle, selector), seconds), cache = _race(tmp_path, {}, timeout=1500)
+    assert handle is None
+    assert seconds < 2.0
@@ -0,0 +1,67 @@
+import gc
+import weakref
+import pytest
+from storage.card_store import CardRecord, CardStore, bank_output_path, open_card_store
+from storage.journal import JobJournal
+
+
+def _saved_numbers(store):
+    with open(store.path, "r") as f:
+        return [line.split(",")[0] for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("batch_size", [1, 5])
+def test_journal_never_counts_a_card_the_output_file_does_not_have(tmp_path, batch_size):
+    journal = JobJournal(str(tmp_path / "jobs"))
+    job = journal.start("capone", "1", "create", 3)
+    store = open_card_store("capone", path=str(tmp_path / "cap_genned.txt"), batch_size=batch_size,
+                            flush_interval=3600)
+    try:
+        for number in ("4111111111111111", "4012888888881881", "4222222222222"):
+            journal.record_card(job, store, CardRecord(bank="capone", card_number=number))
+
+            # What a resumed run would see if the process were killed right here
+            resumed = JobJournal(str(tmp_path / "jobs"))._load("capone_1_create")
+            assert resumed["completed"] == len(_saved_numbers(store))
+    finally:
+        store.close()
+
+
+def test_duplicate_card_is_not_counted_twice(tmp_path):
+    journal = JobJournal(str(tmp_path / "jobs"))
+    job = journal.start("relay", "1", "create", 2)
+    with open_card_store("relay", path=str(tmp_path / "relay_genned.txt")) as store:
+        record = CardRecord(bank="relay", card_number="4111111111111111", cvv="123")
+        assert journal.record_card(job, store, record)
+        assert not journal.record_card(job, store, record)
+
+    assert job["completed"] == 1
+    assert _saved_numbers(store) == ["4111111111111111"]
+
+
+def test_each_bank_gets_its_own_output_path(tmp_path):
+    path = str(tmp_path / "cards.txt")
+    capone_path, relay_path = bank_output_path(path, "capone"), bank_output_path(path, "relay")
+    assert capone_path != relay_path
+    assert capone_path.endswith("cards_capone.txt") and relay_path.endswith("cards_relay.txt")
+
+    with open_card_store("capone", path=capone_path) as capone, open_card_store("relay", path=relay_path) as relay:
+        capone.add(CardRecord(bank="capone", card_number="4111111111111111", exp_month="09", exp_year="29", cvv="123"))
+        relay.add(CardRecord(bank="relay", card_number="4111111111111111", cvv="456"))
+
+    assert open(capone_path).read().strip() == "4111111111111111,09,29,123"
+    assert open(relay_path).read().strip() == "4111111111111111,456"
+
+
+def test_card_store_is_abstract():
+    with pytest.raises(TypeError):
+        CardStore("cards.txt")
+
+
+def test_closed_store_is_not_kept_alive_by_its_exit_hook(tmp_path):
+    store = open_card_store("relay", path=str(tmp_path / "relay_genned.txt"))
+    store.close()
+    ref = weakref.ref(store)
+    del store
+    gc.collect()
+    assert ref() is None
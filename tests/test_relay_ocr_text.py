@@ -0,0 +1,30 @@
+import pytest
+from relay.ocr_text import fix_digits, parse_field
+
+
+@pytest.mark.parametrize("field, text, value", [
+    ("number", "4111 1111 1111 1111", "4111111111111111"),
+    ("number", "4111-1111-1111-1111", "4111111111111111"),
+    ("number", "4lll 1111 1111 1111", "4111111111111111"),  # l for 1
+    ("number", "4111 1111 1111 11I1", "4111111111111111"),  # I for 1
+    ("number", "4O12 8888 8888 1881", "4012888888881881"),  # O for 0
+    ("number", "4111 1111 1111", ""),  # Too short
+    ("expiry", "O9/29", "09/29"),
+    ("expiry", "VALID THRU 1l/3O", "11/30"),
+    ("expiry", "09 29", ""),
+    ("cvv", "CVV 4O7", "407"),
+    ("cvv", "09/29 123", "123"),  # Expiry overlapping the CVV region is skipped
+    ("cvv", "1234", ""),
+    ("cvv", "", ""),
+])
+def test_parse_field(field, text, value):
+    assert parse_field(field, text) == value
+
+
+@pytest.mark.parametrize("text, fixed", [
+    ("VALID THRU", "VALID THRU"),  # No digit in the run, so the letters stay
+    ("4lO1", "4101"),
+    ("Ol", "Ol"),
+])
+def test_fix_digits_only_touches_numbers(text, fixed):
+    assert fix_digits(text) == fixed
@@ -0,0 +1,77 @@
+from datetime import date
+import pytest
+from relay.validation import cvv_ok, expiry_ok, failed_fields, field_ok, luhn_ok, number_ok
+
+THIS_YEAR = date.today().year % 100
+NEXT_YEAR = f"{(THIS_YEAR + 1) % 100:02d}"
+LAST_YEAR = f"{(THIS_YEAR - 1) % 100:02d}"
+
+
+@pytest.mark.parametrize("number, ok", [
+    ("4111111111111111", True),
+    ("5555555555554444", True),
+    ("4012888888881881", True),
+    ("4111111111111112", False),  # Last digit off by one
+    ("4111111111111121", False),  # Two digits swapped
+])
+def test_luhn(number, ok):
+    assert luhn_ok(number) is ok
+
+
+@pytest.mark.parametrize("number, ok", [
+    ("4111111111111111", True),  # Visa
+    ("2223003122003222", True),  # Mastercard 2-series
+    ("6011111111111117", False),  # Discover: passes Luhn, wrong BIN
+    ("378282246310005", False),  # Amex: passes Luhn, 15 digits
+    ("4111111111111112", False),  # Right BIN, fails Luhn
+    ("", False),
+    (None, False),
+])
+def test_number(number, ok):
+    assert number_ok(number) is ok
+
+
+def test_bin_prefixes_can_be_narrowed(monkeypatch):
+    monkeypatch.setenv("RELAY_BIN_PREFIXES", "5555, 2223")
+    assert number_ok("5555555555554444")
+    assert not number_ok("4111111111111111")
+
+
+@pytest.mark.parametrize("exp_month, exp_year, ok", [
+    ("01", NEXT_YEAR, True),
+    ("12", NEXT_YEAR, True),
+    ("00", NEXT_YEAR, False),
+    ("13", NEXT_YEAR, False),
+    ("06", LAST_YEAR, False),  # Expired
+    ("06", f"{(THIS_YEAR + 11) % 100:02d}", False),  # Further out than any new card
+    ("6", NEXT_YEAR, False),  # Not MM
+    ("06", "2030", False),  # Not YY
+])
+def test_expiry(exp_month, exp_year, ok):
+    assert expiry_ok(exp_month, exp_year) is ok
+
+
+@pytest.mark.parametrize("cvv, ok", [("123", True), ("012", True), ("1234", False), ("12", False), ("12a", False), ("", False)])
+def test_cvv(cvv, ok):
+    assert cvv_ok(cvv) is ok
+
+
+@pytest.mark.parametrize("field, value, ok", [
+    ("number", "4111111111111111", True),
+    ("expiry", f"09/{NEXT_YEAR}", True),
+    ("expiry", f"09/{LAST_YEAR}", False),
+    ("expiry", "0929", False),
+    ("cvv", "123", True),
+])
+def test_field(field, value, ok):
+    assert field_ok(field, value) is ok
+
+
+@pytest.mark.parametrize("card, failed", [
+    (("4111111111111111", "09", NEXT_YEAR, "123"), []),
+    (("4111111111111112", "09", NEXT_YEAR, "123"), ["number"]),
+    (("4111111111111111", "09", LAST_YEAR, "1234"), ["expiry", "cvv"]),
+    ((None, None, None, None), ["number", "expiry", "cvv"]),
+])
+def test_failed_fields(card, failed):
+    assert failed_fields(*card) == failed
@@ -0,0 +1,34 @@
+import asyncio
+from capOne.readiness import Readiness
+from tracing.tracer import Tracer
+
+
+class FakePage:
+    async def wait_for_selector(self, selector, state="visible", timeout=30000):
+        await asyncio.sleep(0.01)
+        return selector
+
+
+def test_wait_inside_a_step_is_not_counted_twice():
+    tracer = Tracer("capone/1")
+    ready = Readiness(FakePage(), tracer)
+
+    async def run():
+        with tracer.span("await card"):
+            await ready.visible("#card", "card details")
+        assert await ready.gone("#modal", "modal dismissed")
+
+    asyncio.run(run())
+    assert [span.step for span in tracer.spans] == ["await card", "wait modal dismissed"]
+
+
+def test_same_step_from_each_bank_gets_its_own_row():
+    tracer = Tracer()
+    tracer.child("capone/1").record("submit", 1.0)
+    tracer.child("capone/2").record("submit", 3.0)
+    tracer.child("relay/web").record("submit", 0.5)
+
+    rows = {(row["bank"], row["step"]): row for row in tracer.summary()}
+    assert set(rows) == {("capone", "submit"), ("relay", "submit")}
+    assert rows["capone", "submit"]["count"] == 2
+    assert rows["relay", "submit"]["p50"] == 0.5
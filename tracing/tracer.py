@@ -0,0 +1,174 @@
+import contextvars
+import csv
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+# The span currently being timed in this task/thread, so helpers deep in a step can
+# report retries and winning selectors without being handed the tracer
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed step of an automation run"""
+    step: str
+    source: str = ""  # Which run the step belongs to, e.g. "capone/1" or "relay"
+    seconds: float = 0.0
+    ok: bool = True
+    retries: int = 0  # Candidates that failed before one worked
+    winner: str = ""  # The fallback selector (or method) that finally worked
+    started_at: float = field(default_factory=time.time)
+
+
+def in_span():
+    """Whether a step is being timed in this task/thread"""
+    return _current_span.get() is not None
+
+
+def note_retry(count=1):
+    """Count a failed attempt against the step currently being timed"""
+    span = _current_span.get()
+    if span is not None:
+        span.retries += count
+
+
+def note_winner(winner):
+    """Record which selector or fallback made the current step succeed"""
+    span = _current_span.get()
+    if span is not None:
+        span.winner = winner
+
+
+def _percentile(values, pct):
+    """Linear interpolation between closest ranks, matching numpy's default"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class Tracer:
+    """Collects step timings from one or more runs and writes a p50/p95 report"""
+
+    def __init__(self, source=""):
+        self.source = source
+        self.spans = []
+        self._lock = threading.Lock()  # Relay steps can finish on executor threads
+
+    def child(self, source):
+        """A tracer for one run that records into the same span list"""
+        child = Tracer(source)
+        child.spans = self.spans
+        child._lock = self._lock
+        return child
+
+    @contextmanager
+    def span(self, step):
+        """Time the enclosed block; exceptions mark the step failed and propagate"""
+        span = Span(step, source=self.source)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.ok = False
+            raise
+        finally:
+            span.seconds = time.perf_counter() - start
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def record(self, step, seconds, ok=True):
+        """Add a step that was timed somewhere else, e.g. in a worker process"""
+        with self._lock:
+            self.spans.append(Span(step, source=self.source, seconds=seconds, ok=ok))
+
+    def summary(self):
+        """One row per bank and step: count, failures, retries, p50/p95/max seconds and winning selectors"""
+        # Profiles ("capone/1", "capone/2") and engines ("relay", "relay/web") of a bank share a row per step
+        by_step = {}
+        for span in self.spans:
+            by_step.setdefault((span.source.split("/")[0], span.step), []).append(span)
+
+        rows = []
+        for (bank, step), spans in by_step.items():
+            seconds = [span.seconds for span in spans]
+            winners = Counter(span.winner for span in spans if span.winner)
+            rows.append({
+                "bank": bank,
+                "step": step,
+                "count": len(spans),
+                "failures": sum(1 for span in spans if not span.ok),
+                "retries": sum(span.retries for span in spans),
+                "p50": round(_percentile(seconds, 50), 3),
+                "p95": round(_percentile(seconds, 95), 3),
+                "max": round(max(seconds), 3),
+                "total": round(sum(seconds), 3),
+                "winners": dict(winners.most_common()),
+            })
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def write_report(self, path):
+        """Write the summary as CSV (for a .csv path) or JSON with every span included"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        rows = self.summary()
+
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["bank", "step", "count", "failures", "retries",
+                                                       "p50", "p95", "max", "total", "winners"])
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(dict(row, winners=";".join(f"{name}={count}" for name, count in row["winners"].items())))
+        else:
+            with open(path, "w") as f:
+                json.dump({"steps": rows, "spans": [asdict(span) for span in self.spans]}, f, indent=2)
+        print(f"Wrote timing report for {len(self.spans)} steps to {path}")
+
+    def print_summary(self, limit=10):
+        """Print the steps that took the most time overall"""
+        rows = self.summary()
+        if not rows:
+            return
+        print(f"\nStep timings ({len(self.spans)} steps):")
+        for row in rows[:limit]:
+            line = f"  {row['bank'] + ' ' if row['bank'] else ''}{row['step']}: p50 {row['p50']:.2f}s, p95 {row['p95']:.2f}s over {row['count']} runs"
+            if row["failures"]:
+                line += f", {row['failures']} failed"
+            if row["retries"]:
+                line += f", {row['retries']} retries"
+            print(line)
+
+
+def traced(step):
+    """Time a method as a step using its object's tracer; returning False counts as a failure"""
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                with self.tracer.span(step) as span:
+                    result = await method(self, *args, **kwargs)
+                    span.ok = result is not False
+                    return result
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(step) as span:
+                result = method(self, *args, **kwargs)
+                span.ok = result is not False
+                return result
+        return wrapper
+    return decorator